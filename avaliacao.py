@@ -0,0 +1,100 @@
+import logging
+import numpy as np
+
+# Ativos usados como ponte quando não há mercado direto contra a moeda de avaliação,
+# ex.: XYZ -> BTC -> USDT. A ordem é a preferência.
+PONTES = ("BTC", "ETH", "BNB", "FDUSD", "USDC")
+
+
+class Avaliador:
+    """Valor em USDT de todos os saldos a partir de um único snapshot de preços.
+
+    Cada ativo ganha uma rota de até duas pernas (par direto, par invertido ou via uma
+    ponte), montada uma vez a partir da tabela de filtros e guardada até ela mudar.
+    A conta em si é vetorizada: quantidades × produto das pernas, com as pernas
+    invertidas como 1/preço.
+    """
+
+    def __init__(self, registro_filtros, moeda="USDT", pontes=PONTES):
+        self.registro_filtros = registro_filtros
+        self.moeda = moeda
+        self.pontes = [ponte for ponte in pontes if ponte != moeda]
+        self._pares = {}
+        self._rotas = {}
+        self._compiladas = {}
+        self._versao = None
+        self._sem_rota = set()
+
+    def _indexar(self):
+        simbolos = self.registro_filtros.todos()
+        if self._versao == self.registro_filtros.atualizado_em:
+            return
+        self._pares = {(f["base"], f["quote"]): symbol for symbol, f in simbolos.items() if f["status"] == "TRADING"}
+        self._rotas = {}
+        self._compiladas = {}
+        self._versao = self.registro_filtros.atualizado_em
+
+    def _perna(self, de, para):
+        # (símbolo, invertido): vender `de` por `para` é o preço do par de/para ou 1/preço do par para/de
+        if (de, para) in self._pares:
+            return self._pares[de, para], False
+        if (para, de) in self._pares:
+            return self._pares[para, de], True
+        return None
+
+    def rota(self, ativo):
+        """Lista de pernas (símbolo, invertido) de `ativo` até a moeda; [] para a própria moeda, None sem rota."""
+        if ativo not in self._rotas:
+            rota = None
+            if ativo == self.moeda:
+                rota = []
+            elif self._perna(ativo, self.moeda):
+                rota = [self._perna(ativo, self.moeda)]
+            else:
+                for ponte in self.pontes:
+                    primeira, segunda = self._perna(ativo, ponte), self._perna(ponte, self.moeda)
+                    if primeira and segunda:
+                        rota = [primeira, segunda]
+                        break
+            self._rotas[ativo] = rota
+        return self._rotas[ativo]
+
+    def pares(self, ativos):
+        """Símbolos cujos preços são necessários para avaliar `ativos`."""
+        self._indexar()
+        return sorted({symbol for ativo in ativos for symbol, _ in (self.rota(ativo) or [])})
+
+    def _compilar(self, ativos):
+        # Duas pernas por ativo em arrays planos; a perna ausente é o "símbolo" None, que vale 1
+        chave = tuple(ativos)
+        if chave not in self._compiladas:
+            simbolos, invertidas, sem_rota = [], [], []
+            for ativo in ativos:
+                rota = self.rota(ativo)
+                if rota is None and ativo not in self._sem_rota:
+                    self._sem_rota.add(ativo)
+                    logging.warning(f"Sem rota de preço para {ativo} em {self.moeda}; contado como 0")
+                sem_rota.append(rota is None)
+                pernas = (rota or []) + [(None, False)] * (2 - len(rota or []))
+                simbolos.extend(symbol for symbol, _ in pernas)
+                invertidas.extend(invertido for _, invertido in pernas)
+            self._compiladas[chave] = (simbolos, np.array(invertidas).reshape(-1, 2), np.array(sem_rota))
+        return self._compiladas[chave]
+
+    def avaliar(self, saldo, precos):
+        """(total, composição) de `saldo` (ativo -> quantidade) com `precos` (símbolo -> preço).
+
+        Ativos zerados ficam de fora da composição; sem rota ou sem preço valem 0.
+        """
+        self._indexar()
+        ativos = [ativo for ativo, quantidade in saldo.items() if quantidade]
+        if not ativos:
+            return 0.0, {}
+        simbolos, invertidas, sem_rota = self._compilar(ativos)
+        quantidades = np.fromiter((saldo[ativo] for ativo in ativos), dtype=np.float64, count=len(ativos))
+        pernas = np.fromiter((1.0 if symbol is None else precos.get(symbol, 0) for symbol in simbolos),
+                             dtype=np.float64, count=len(simbolos)).reshape(-1, 2)
+        with np.errstate(divide="ignore"):
+            fatores = np.where(invertidas, 1 / pernas, pernas).prod(axis=1)
+        valores = np.where(sem_rota | ~np.isfinite(fatores), 0.0, quantidades * fatores)
+        return float(valores.sum()), dict(zip(ativos, valores.tolist()))
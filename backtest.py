@@ -0,0 +1,199 @@
+import argparse
+import glob
+import logging
+import os
+import time
+import numpy as np
+import pandas as pd
+from cache_candles import COLUNAS, OPEN_TIME, OPEN, HIGH, LOW, CLOSE
+from gravador import klines_gravadas
+from indicadores import sma_vetorizada
+
+# Backtest da estratégia de cruzamento de médias (mesmas regras do Robot.py):
+#   compra no cruzamento da média curta para cima da longa;
+#   stop-loss em preço_compra * (1 - percentual_stop_loss);
+#   take-profit na máxima dos últimos 7 dias * (1 + percentual_take_profit);
+#   venda também no cruzamento para baixo.
+# Os sinais são calculados com operações vetoriais sobre o histórico inteiro; o único laço em
+# Python é por operação (entrada -> saída), nunca por candle.
+
+MS_DIA = 24 * 60 * 60 * 1000
+MOTIVOS = ["stop", "take-profit", "cruzamento", "fim"]
+
+
+def carregar_klines(*caminhos):
+    """Lê klines de CSVs da Binance (data.binance.vision), .bin do cache_candles, .npy ou do gravador.
+
+    Aceita arquivos, pastas e padrões glob; uma pasta klines_<intervalo> do gravador
+    (ex.: dados_mercado/BTCUSDT/*/klines_1h) é lida coluna a coluna. Devolve um array
+    (n, 7) nas colunas de COLUNAS, ordenado e sem candles repetidos.
+    """
+    arquivos = []
+    for caminho in caminhos:
+        for item in glob.glob(caminho):
+            if os.path.isdir(item) and not _tabela_gravada(item):
+                arquivos += glob.glob(os.path.join(item, "*.csv")) + glob.glob(os.path.join(item, "*.bin"))
+            else:
+                arquivos.append(item)
+    partes = []
+    for arquivo in sorted(arquivos):
+        if _tabela_gravada(arquivo):
+            # dados_mercado/<symbol>/<dia>/klines_<intervalo>
+            pasta, symbol, dia, tabela = os.path.abspath(arquivo).rsplit(os.sep, 3)
+            partes.append(klines_gravadas(symbol, tabela[len("klines_"):], [dia], pasta))
+        elif arquivo.endswith(".bin"):
+            partes.append(np.fromfile(arquivo, dtype=np.float64).reshape(-1, len(COLUNAS)))
+        elif arquivo.endswith(".npy"):
+            partes.append(np.load(arquivo)[:, :len(COLUNAS)].astype(np.float64))
+        else:
+            df = pd.read_csv(arquivo, header=None, usecols=range(len(COLUNAS)))
+            df = df.apply(pd.to_numeric, errors="coerce").dropna()  # descarta cabeçalho, se houver
+            partes.append(df.to_numpy(dtype=np.float64))
+    if not partes:
+        return np.zeros((0, len(COLUNAS)))
+    dados = np.concatenate(partes)
+    # Arquivos recentes da Binance usam microssegundos
+    micro = dados[:, OPEN_TIME] > 1e14
+    dados[micro, OPEN_TIME] /= 1000
+    dados[micro, -1] /= 1000
+    _, unicos = np.unique(dados[:, OPEN_TIME], return_index=True)
+    return dados[unicos]
+
+
+def _tabela_gravada(caminho):
+    return os.path.isdir(caminho) and os.path.basename(os.path.normpath(caminho)).startswith("klines_")
+
+
+def maximo_rolante(valores, janela):
+    """Máxima dos últimos `janela` valores (inclusive o atual) em O(n log janela)."""
+    resultado = valores.copy()
+    alcance = 1
+    while alcance * 2 <= janela:
+        resultado[alcance:] = np.maximum(resultado[alcance:], resultado[:-alcance])
+        alcance *= 2
+    # resultado[i] cobre `alcance` valores; completa a janela com o bloco deslocado
+    resto = janela - alcance
+    if resto > 0:
+        final = resultado.copy()
+        final[resto:] = np.maximum(resultado[resto:], resultado[:-resto])
+        resultado = final
+    return resultado
+
+
+def _proximo(mascara):
+    # proximo[i] = menor j >= i com mascara[j]; len(mascara) se não houver
+    n = len(mascara)
+    indices = np.where(mascara, np.arange(n), n)
+    return np.append(np.minimum.accumulate(indices[::-1])[::-1], n)
+
+
+def _primeiro(condicao):
+    return int(np.argmax(condicao)) if len(condicao) and condicao.any() else None
+
+
+def sinais(close, janela_curta, janela_longa):
+    curta = sma_vetorizada(close, janela_curta)
+    longa = sma_vetorizada(close, janela_longa)
+    cruzou_para_cima = np.zeros(len(close), dtype=bool)
+    cruzou_para_baixo = np.zeros(len(close), dtype=bool)
+    cruzou_para_cima[1:] = (curta[:-1] <= longa[:-1]) & (curta[1:] > longa[1:])
+    cruzou_para_baixo[1:] = (curta[:-1] >= longa[:-1]) & (curta[1:] < longa[1:])
+    return cruzou_para_cima, cruzou_para_baixo
+
+
+def backtest(klines, janela_curta=7, janela_longa=40, percentual_stop_loss=0.03, percentual_take_profit=0.04,
+             taxa=0.001, capital_inicial=1000.0, min_qty=0.0, step=0.0, min_notional=0.0, dias_maxima=7):
+    n = len(klines)
+    abertura, maxima, minima, close = (klines[:, c] for c in (OPEN, HIGH, LOW, CLOSE))
+    cruzou_para_cima, cruzou_para_baixo = sinais(close, janela_curta, janela_longa)
+    proxima_entrada = _proximo(cruzou_para_cima)
+    proxima_saida = _proximo(cruzou_para_baixo)
+
+    duracao_candle = np.median(np.diff(klines[:, OPEN_TIME])) if n > 1 else MS_DIA
+    candles_janela = max(1, int(round(dias_maxima * MS_DIA / duracao_candle)))
+    maxima_periodo = maximo_rolante(maxima, candles_janela)
+
+    capital = capital_inicial
+    operacoes = []
+    i = proxima_entrada[0]
+    while i < n:
+        preco_compra = close[i]
+        quantidade = capital / preco_compra
+        if step:
+            quantidade = np.floor(quantidade / step) * step
+        if quantidade < min_qty or quantidade <= 0 or quantidade * preco_compra < min_notional:
+            i = proxima_entrada[i + 1]
+            continue
+        # A taxa da compra sai da moeda recebida, como na Binance sem BNB
+        recebido = quantidade * (1 - taxa)
+        quantidade_venda = np.floor(recebido / step) * step if step else recebido
+
+        stop = preco_compra * (1 - percentual_stop_loss)
+        alvo = maxima_periodo[i] * (1 + percentual_take_profit)
+        fim = min(proxima_saida[i + 1], n - 1)
+        trecho = slice(i + 1, fim + 1)
+        saidas = []
+        j = _primeiro(minima[trecho] <= stop)
+        if j is not None:
+            saidas.append((i + 1 + j, 0, min(abertura[i + 1 + j], stop)))
+        j = _primeiro(maxima[trecho] >= alvo)
+        if j is not None:
+            saidas.append((i + 1 + j, 1, max(abertura[i + 1 + j], alvo)))
+        if proxima_saida[i + 1] < n:
+            saidas.append((fim, 2, close[fim]))
+        if saidas:
+            saida, motivo, preco_venda = min(saidas)
+        else:
+            saida, motivo, preco_venda = n - 1, 3, close[n - 1]
+
+        capital += quantidade_venda * preco_venda * (1 - taxa) - quantidade * preco_compra
+        operacoes.append((i, saida, preco_compra, preco_venda, motivo, quantidade, capital))
+        i = proxima_entrada[saida + 1] if saida + 1 < n else n
+
+    return _resumo(klines, operacoes, capital_inicial, capital)
+
+
+def _resumo(klines, operacoes, capital_inicial, capital):
+    tipos = [("entrada", np.int64), ("saida", np.int64), ("preco_compra", np.float64), ("preco_venda", np.float64),
+             ("motivo", np.int8), ("quantidade", np.float64), ("capital", np.float64)]
+    ops = np.array(operacoes, dtype=tipos)
+    curva = np.concatenate([[capital_inicial], ops["capital"]])
+    picos = np.maximum.accumulate(curva)
+    retornos = ops["preco_venda"] / ops["preco_compra"] - 1 if len(ops) else np.zeros(0)
+    return {
+        "operacoes": ops,
+        "candles": len(klines),
+        "capital_final": capital,
+        "retorno_total": capital / capital_inicial - 1,
+        "max_drawdown": float(np.max(1 - curva / picos)),
+        "num_operacoes": len(ops),
+        "taxa_acerto": float(np.mean(retornos > 0)) if len(ops) else 0.0,
+        "saidas": {m: int(np.sum(ops["motivo"] == k)) for k, m in enumerate(MOTIVOS)},
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Backtest do cruzamento de médias com stop e take-profit")
+    parser.add_argument("arquivos", nargs="+",
+                        help="CSVs de klines, .bin do cache, pastas ou dados_mercado/<symbol>/*/klines_1h do gravador")
+    parser.add_argument("--curta", type=int, default=7)
+    parser.add_argument("--longa", type=int, default=40)
+    parser.add_argument("--stop", type=float, default=0.03)
+    parser.add_argument("--take", type=float, default=0.04)
+    parser.add_argument("--taxa", type=float, default=0.001)
+    parser.add_argument("--capital", type=float, default=1000.0)
+    args = parser.parse_args()
+
+    klines = carregar_klines(*args.arquivos)
+    inicio = time.perf_counter()
+    resultado = backtest(klines, args.curta, args.longa, args.stop, args.take, args.taxa, args.capital)
+    duracao = time.perf_counter() - inicio
+
+    logging.info(f"{resultado['candles']} candles em {duracao:.3f}s ({resultado['candles'] / max(duracao, 1e-9):,.0f} candles/s)")
+    logging.info(f"Operações: {resultado['num_operacoes']} | Acerto: {resultado['taxa_acerto'] * 100:.1f}% | Saídas: {resultado['saidas']}")
+    logging.info(f"Capital final: {resultado['capital_final']:.2f} | Retorno: {resultado['retorno_total'] * 100:.2f}% | Drawdown máx.: {resultado['max_drawdown'] * 100:.2f}%")
+
+
+if __name__ == "__main__":
+    main()
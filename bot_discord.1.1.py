@@ -1,7 +1,7 @@
 import discord
 import os
-import json
 from dotenv import load_dotenv
+from estado_compartilhado import LeitorEstado
 
 # Carrega variáveis do .env
 load_dotenv()
@@ -22,13 +22,8 @@ async def on_message(message):
     if message.channel.id != CHANNEL_ID:
         return  # ignora se não for no canal autorizado
 
-# Arquivo com os dados do bot de trading
-arquivo_dados = "dados_bot.json"
-
-# Função para carregar os dados salvos
-def carregar_dados():
-    with open(arquivo_dados, "r") as f:
-        return json.load(f)
+# Estado publicado pelo bot de trading (memória compartilhada, só é relido quando muda)
+leitor_estado = LeitorEstado()
 
 # Evento de conexão
 @client.event
@@ -44,43 +39,56 @@ async def on_message(message):
 
     # Comando: !saldo
     if message.content.lower() == "!saldo":
-        dados = carregar_dados()
-        saldo_atual = dados["historico_patrimonio"][-1]["saldo_total_usdt"] if dados["historico_patrimonio"] else 0
-        historico = dados["historico_patrimonio"]
-
-        def buscar_antigo(horas):
-            from datetime import datetime, timedelta
-            alvo = datetime.now() - timedelta(hours=horas)
-            for item in reversed(historico):
-                t = datetime.strptime(item["timestamp"], "%Y-%m-%d %H:%M:%S")
-                if t <= alvo:
-                    return item["saldo_total_usdt"]
-            return None
-
-        antigo_24h = buscar_antigo(24)
-        antigo_7d = buscar_antigo(24*7)
-
-        variacao_24h = f"{((saldo_atual - antigo_24h) / antigo_24h) * 100:.2f}%" if antigo_24h else "N/A"
-        variacao_7d = f"{((saldo_atual - antigo_7d) / antigo_7d) * 100:.2f}%" if antigo_7d else "N/A"
-
-        resposta = (
-            f"📊 **Resumo Atual**:\n"
-            f"💰 Saldo Total: **{saldo_atual:.2f} USDT**\n"
-            f"📈 Valorização em 24h: {variacao_24h}\n"
-            f"📈 Valorização em 7 dias: {variacao_7d}"
-        )
+        estado = leitor_estado.ler()
+        if estado is None:
+            await message.channel.send("❌ O bot de trading ainda não publicou nenhum estado.")
+            return
+        linhas = [f"📊 **Resumo Atual**:", f"💰 Saldo Total: **{estado['total_usdt']:.2f} USDT**"]
+        for horizonte, variacao in estado["variacoes"].items():
+            linhas.append(f"📈 Valorização em {horizonte}: " + (f"{variacao:.2f}%" if variacao is not None else "N/A"))
+        resposta = "\n".join(linhas)
         await message.channel.send(resposta)
 
-   # Comando: !grafico BTCUSDT ou !grafico SOLUSDT
+    # Comando: !posicoes
+    elif message.content.lower() == "!posicoes":
+        estado = leitor_estado.ler() or {}
+        abertas = [symbol for symbol, aberta in estado.get("posicoes", {}).items() if aberta]
+        if not abertas:
+            await message.channel.send("📭 Nenhuma posição aberta.")
+            return
+        linhas = []
+        for symbol in abertas:
+            linhas.append(
+                f"🔹 **{symbol}** compra {estado['precos_compra'].get(symbol, 0):.2f} | "
+                f"stop {estado['stop_losses'].get(symbol, 0):.2f} | alvo {estado['take_profits'].get(symbol, 0):.2f}"
+            )
+        await message.channel.send("\n".join(linhas))
+
+    # Comando: !stats (latência por etapa e uso da API no último ciclo)
+    elif message.content.lower() == "!stats":
+        estado = leitor_estado.ler() or {}
+        metricas = estado.get("metricas")
+        if not metricas:
+            await message.channel.send("❌ O bot de trading ainda não publicou métricas.")
+            return
+        linhas = ["⏱️ **Latência por etapa** (p50 / p99 / máx, ms):"]
+        for etapa, h in metricas["etapas"].items():
+            linhas.append(f"`{etapa}`: {h['p50_ms']:.2f} / {h['p99_ms']:.2f} / {h['max_ms']:.2f} ({h['n']}x)")
+        chamadas = sum(metricas["chamadas_ultimo_ciclo"].values())
+        linhas.append(f"🌐 Último ciclo: {chamadas} chamadas à API, peso ~{metricas['peso_ultimo_ciclo']}")
+        await message.channel.send("\n".join(linhas)[:2000])
+
+    # Comando: !grafico BTCUSDT ou !grafico SOLUSDT
     elif message.content.lower().startswith("!grafico"):
         partes = message.content.split()
-    if len(partes) == 2:
-        symbol = partes[1].upper()
-        arquivo = os.path.join("graficos", f"grafico_{symbol}.png")  # <- ajuste aqui
-        if os.path.exists(arquivo):
-            await message.channel.send(f"📊 Gráfico mais recente de {symbol}:", file=discord.File(arquivo))
-        else:
-            await message.channel.send(f"❌ Nenhum gráfico encontrado para {symbol}.")
+        if len(partes) == 2:
+            symbol = partes[1].upper()
+            estado = leitor_estado.ler() or {}
+            arquivo = estado.get("graficos", {}).get(symbol, os.path.join("graficos", f"grafico_{symbol}.png"))
+            if os.path.exists(arquivo):
+                await message.channel.send(f"📊 Gráfico mais recente de {symbol}:", file=discord.File(arquivo))
+            else:
+                await message.channel.send(f"❌ Nenhum gráfico encontrado para {symbol}.")
 
 # Inicia o bot
 client.run(DISCORD_TOKEN)
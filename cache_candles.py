@@ -0,0 +1,139 @@
+import os
+import numpy as np
+
+# Colunas guardadas de cada kline (timestamps em ms cabem exatos em float64)
+COLUNAS = ["open_time", "open", "high", "low", "close", "volume", "close_time"]
+OPEN_TIME, OPEN, HIGH, LOW, CLOSE, VOLUME, CLOSE_TIME = range(len(COLUNAS))
+LIMITE_KLINES = 1000
+
+
+class CacheCandles:
+    """Guarda os candles por (symbol, intervalo) e busca na Binance só o que ainda não tem.
+
+    O último candle guardado pode estar em aberto, então cada atualização pede as klines
+    a partir do open_time dele: no regime normal é uma requisição de 1 ou 2 candles.
+    """
+
+    def __init__(self, cliente, pasta="cache_candles", limite_inicial=100, capacidade=1024):
+        self.cliente = cliente
+        self.pasta = pasta
+        self.limite_inicial = limite_inicial
+        self.capacidade = capacidade
+        self._series = {}
+        os.makedirs(pasta, exist_ok=True)
+
+    def _arquivo(self, symbol, intervalo):
+        return os.path.join(self.pasta, f"{symbol}_{intervalo}.bin")
+
+    def _serie(self, symbol, intervalo):
+        chave = (symbol, intervalo)
+        serie = self._series.get(chave)
+        if serie is None:
+            serie = {"dados": np.zeros((self.capacidade, len(COLUNAS))), "n": 0}
+            arquivo = self._arquivo(symbol, intervalo)
+            if os.path.exists(arquivo):
+                salvos = np.fromfile(arquivo, dtype=np.float64).reshape(-1, len(COLUNAS))
+                self._garantir_capacidade(serie, len(salvos))
+                serie["dados"][:len(salvos)] = salvos
+                serie["n"] = len(salvos)
+            self._series[chave] = serie
+        return serie
+
+    def _garantir_capacidade(self, serie, tamanho):
+        capacidade = len(serie["dados"])
+        if tamanho <= capacidade:
+            return
+        while capacidade < tamanho:
+            capacidade *= 2
+        novos = np.zeros((capacidade, len(COLUNAS)))
+        novos[:serie["n"]] = serie["dados"][:serie["n"]]
+        serie["dados"] = novos
+
+    def _gravar(self, symbol, intervalo, serie, inicio):
+        # Reescreve só a cauda do arquivo: o candle que estava em aberto e os novos
+        arquivo = self._arquivo(symbol, intervalo)
+        modo = "r+b" if os.path.exists(arquivo) else "wb"
+        with open(arquivo, modo) as f:
+            f.seek(inicio * len(COLUNAS) * 8)
+            serie["dados"][inicio:serie["n"]].tofile(f)
+            f.truncate()
+
+    def atualizar(self, symbol, intervalo, desde=None):
+        """Busca as klines novas e anexa ao cache. Retorna o índice da primeira linha alterada ou None.
+
+        Com o cache vazio, `desde` (ms) baixa todo o histórico a partir desse momento em vez
+        dos últimos `limite_inicial` candles. Um erro da Binance sobe para quem chamou: a série
+        antiga não pode passar por atualizada, ou a estratégia decide de novo sobre os mesmos candles.
+        """
+        serie = self._serie(symbol, intervalo)
+        if serie["n"] == 0 and desde is None:
+            inicio = 0
+            candles = self.cliente.get_klines(symbol=symbol, interval=intervalo, limit=self.limite_inicial)
+        else:
+            inicio = max(serie["n"] - 1, 0)
+            candles = []
+            while True:
+                if candles:
+                    desde = candles[-1][0] + 1
+                elif serie["n"]:
+                    desde = int(serie["dados"][inicio, OPEN_TIME])
+                lote = self.cliente.get_klines(symbol=symbol, interval=intervalo, startTime=desde, limit=LIMITE_KLINES)
+                candles.extend(lote)
+                if len(lote) < LIMITE_KLINES:
+                    break
+        if not candles:
+            return None
+
+        novos = np.array([c[:len(COLUNAS)] for c in candles], dtype=np.float64)
+        self._garantir_capacidade(serie, inicio + len(novos))
+        serie["dados"][inicio:inicio + len(novos)] = novos
+        serie["n"] = inicio + len(novos)
+        self._gravar(symbol, intervalo, serie, inicio)
+        return inicio
+
+    def anexar(self, symbol, intervalo, kline):
+        """Grava uma kline recebida por stream: substitui a última se tiver o mesmo open_time."""
+        serie = self._serie(symbol, intervalo)
+        n = serie["n"]
+        if n and serie["dados"][n - 1, OPEN_TIME] == kline[OPEN_TIME]:
+            inicio = n - 1
+        elif n and serie["dados"][n - 1, OPEN_TIME] > kline[OPEN_TIME]:
+            return None
+        else:
+            inicio = n
+        self._garantir_capacidade(serie, inicio + 1)
+        serie["dados"][inicio] = kline[:len(COLUNAS)]
+        serie["n"] = inicio + 1
+        self._gravar(symbol, intervalo, serie, inicio)
+        return inicio
+
+    def lacuna(self, symbol, intervalo, kline):
+        """Klines entre a última guardada e `kline`, buscadas na API REST; vazio se as duas emendam.
+
+        Serve ao modo streaming: quando o WebSocket cai, as klines perdidas vêm daqui para
+        serem anexadas em ordem antes de `kline`. Um erro da Binance sobe para quem chamou.
+        """
+        serie = self._serie(symbol, intervalo)
+        if serie["n"] == 0:
+            return []
+        desde = int(serie["dados"][serie["n"] - 1, CLOSE_TIME]) + 1
+        ate = int(kline[OPEN_TIME]) - 1
+        candles = []
+        while desde <= ate:
+            lote = self.cliente.get_klines(symbol=symbol, interval=intervalo, startTime=desde, endTime=ate,
+                                           limit=LIMITE_KLINES)
+            candles.extend(c[:len(COLUNAS)] for c in lote)
+            if len(lote) < LIMITE_KLINES:
+                break
+            desde = lote[-1][0] + 1
+        return candles
+
+    def janela(self, symbol, intervalo, n=None):
+        """Visão (sem cópia) dos últimos n candles, uma coluna por índice de COLUNAS."""
+        serie = self._serie(symbol, intervalo)
+        total = serie["n"]
+        inicio = 0 if n is None else max(0, total - n)
+        return serie["dados"][inicio:total]
+
+    def tamanho(self, symbol, intervalo):
+        return self._serie(symbol, intervalo)["n"]
@@ -0,0 +1,19 @@
+import asyncio
+import logging
+
+
+async def executar_por_moeda(moedas, funcao):
+    """Roda funcao(moeda) para todas as moedas ao mesmo tempo, cada uma numa thread.
+
+    As chamadas à Binance são bloqueantes, então cada moeda vai para o executor padrão do
+    asyncio: o tempo total fica perto do da moeda mais lenta. Uma moeda que falha é só
+    registrada no log e fica fora do resultado, sem derrubar as outras.
+    """
+    resultados = await asyncio.gather(*(asyncio.to_thread(funcao, moeda) for moeda in moedas), return_exceptions=True)
+    saida = {}
+    for moeda, resultado in zip(moedas, resultados):
+        if isinstance(resultado, Exception):
+            logging.warning(f"Erro ao processar {moeda}: {resultado}")
+        else:
+            saida[moeda] = resultado
+    return saida
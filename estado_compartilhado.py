@@ -0,0 +1,83 @@
+import json
+import mmap
+import os
+import struct
+import time
+
+# Estado do bot de trading publicado num arquivo mapeado em memória para o bot do Discord.
+# Layout: cabeçalho (versão, tamanho do JSON) + JSON. A versão funciona como um seqlock:
+# fica ímpar enquanto o escritor grava, então o leitor descarta leituras pela metade e
+# tenta de novo, sem nunca ver um estado rasgado.
+
+CABECALHO = struct.Struct("<QQ")
+
+
+class PublicadorEstado:
+    def __init__(self, arquivo="estado_bot.mmap", capacidade=256 * 1024):
+        self.arquivo = arquivo
+        self._versao = 0
+        self._abrir(capacidade)
+
+    def _abrir(self, capacidade):
+        modo = "r+b" if os.path.exists(self.arquivo) else "w+b"
+        with open(self.arquivo, modo) as f:
+            if os.path.getsize(self.arquivo) < capacidade:
+                f.truncate(capacidade)
+            self._mapa = mmap.mmap(f.fileno(), 0)
+        self._versao = max(self._versao, CABECALHO.unpack_from(self._mapa, 0)[0])
+        self._versao += self._versao % 2  # um escritor que caiu no meio deixa a versão ímpar
+
+    def publicar(self, estado):
+        conteudo = json.dumps(estado, default=float).encode()
+        if CABECALHO.size + len(conteudo) > len(self._mapa):
+            # Aumenta o arquivo; os leitores percebem a mudança de tamanho e remapeiam
+            self._mapa.close()
+            self._abrir(2 * (CABECALHO.size + len(conteudo)))
+        self._versao += 1
+        CABECALHO.pack_into(self._mapa, 0, self._versao, len(conteudo))
+        self._mapa[CABECALHO.size:CABECALHO.size + len(conteudo)] = conteudo
+        self._versao += 1
+        CABECALHO.pack_into(self._mapa, 0, self._versao, len(conteudo))
+
+
+class LeitorEstado:
+    """Lê o estado publicado; enquanto a versão não muda, devolve o mesmo dict em cache."""
+
+    def __init__(self, arquivo="estado_bot.mmap"):
+        self.arquivo = arquivo
+        self._mapa = None
+        self._versao = None
+        self._estado = None
+
+    def _mapear(self):
+        tamanho = os.path.getsize(self.arquivo) if os.path.exists(self.arquivo) else 0
+        if self._mapa is not None and len(self._mapa) == tamanho:
+            return True
+        if self._mapa is not None:
+            self._mapa.close()
+            self._mapa = None
+        if tamanho < CABECALHO.size:
+            return False
+        with open(self.arquivo, "rb") as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return True
+
+    def ler(self, tentativas=100):
+        if not self._mapear():
+            return None
+        for _ in range(tentativas):
+            versao, tamanho = CABECALHO.unpack_from(self._mapa, 0)
+            if versao == 0:
+                return None
+            if versao == self._versao:
+                return self._estado
+            if versao % 2:
+                time.sleep(0.0001)
+                continue
+            conteudo = self._mapa[CABECALHO.size:CABECALHO.size + tamanho]
+            if CABECALHO.unpack_from(self._mapa, 0)[0] != versao:
+                continue
+            self._estado = json.loads(conteudo)
+            self._versao = versao
+            return self._estado
+        return self._estado
@@ -0,0 +1,204 @@
+import logging
+from cache_candles import CLOSE
+from indicadores import SMA
+from motor import Estrategia, registrar
+from scanner import Scanner
+
+
+class EstrategiaMedias(Estrategia):
+    """Base para estratégias de cruzamento de médias: mantém as SMAs candle a candle."""
+
+    janela_curta = 7
+    janela_longa = 40
+
+    def __init__(self, motor, moedas=None, janela_curta=None, janela_longa=None):
+        super().__init__(motor, moedas)
+        self.janela_curta = janela_curta or self.janela_curta
+        self.janela_longa = janela_longa or self.janela_longa
+        self.medias = {}  # symbol -> (média curta, média longa)
+
+    def ao_dados(self, symbol, candles, inicio, tamanho_antes):
+        closes = candles[:, CLOSE]
+        if symbol not in self.medias:
+            self.medias[symbol] = (SMA(self.janela_curta), SMA(self.janela_longa))
+            for media in self.medias[symbol]:
+                media.inicializar(closes)
+            return
+        if inicio is None:
+            return
+        # A linha que já existia era o candle em aberto: substitui; as seguintes são novas
+        for i in range(inicio, len(closes)):
+            for media in self.medias[symbol]:
+                media.atualizar(closes[i], novo=i >= tamanho_antes)
+
+    def cruzamento(self, symbol):
+        """(cruzou_para_cima, cruzou_para_baixo), ou None enquanto faltam candles."""
+        if symbol not in self.medias:
+            return None
+        curta, longa = self.medias[symbol]
+        if longa.anterior is None:
+            return None
+        logging.info(f"{symbol} - Média {self.janela_curta}: {curta.atual:.2f} | Média {self.janela_longa}: {longa.atual:.2f}")
+        return (curta.anterior <= longa.anterior and curta.atual > longa.atual,
+                curta.anterior >= longa.anterior and curta.atual < longa.atual)
+
+
+@registrar("cruzamento")
+class CruzamentoMedias(EstrategiaMedias):
+    """Compra no cruzamento para cima; sai no stop-loss, no take-profit (máxima de 7 dias) ou no cruzamento para baixo.
+
+    No modo streaming o stop e o alvo também são vigiados a cada bookTicker pelo MonitorProtecao do motor;
+    com ordens OCO eles ficam só na Binance.
+    """
+
+    moedas = ("BTCUSDT", "SOLUSDT")
+
+    def __init__(self, motor, moedas=None, percentual_stop_loss=0.03, percentual_take_profit=0.04, **medias):
+        super().__init__(motor, moedas, **medias)
+        self.percentual_stop_loss = percentual_stop_loss
+        self.percentual_take_profit = percentual_take_profit
+
+    def ao_candle(self, symbol, candles, saldo_usdt):
+        motor = self.motor
+        posicao = motor.posicoes.get(symbol, False)
+        sinais = self.cruzamento(symbol)
+        if sinais is None:
+            return posicao
+        cruzou_para_cima, cruzou_para_baixo = sinais
+        preco_atual = candles[-1, CLOSE]
+
+        if not posicao and cruzou_para_cima and saldo_usdt > 10:
+            logging.info(f"Sinal de compra para {symbol} detectado!")
+            try:
+                quantidade = motor.comprar(symbol, saldo_usdt / len(self.moedas), preco_atual)
+                if quantidade:
+                    logging.info(f"Compra executada de {quantidade} {symbol} a {preco_atual:.2f} USDT")
+                    preco_alvo = motor.preco_mais_alto(symbol)
+                    motor.abrir_posicao(symbol, preco_atual, preco_atual * (1 - self.percentual_stop_loss),
+                                        preco_alvo * (1 + self.percentual_take_profit) if preco_alvo else 0)
+                    # Com OCO, abrir_posicao já sincroniza e pode fechar na hora (preço fora da proteção, sem saldo)
+                    return motor.posicoes[symbol]
+            except Exception as e:
+                logging.warning(f"Erro na compra de {symbol}: {e}")
+        elif posicao:
+            return self.verificar_saidas(symbol, preco_atual, cruzou_para_baixo)
+        return posicao
+
+    def verificar_saidas(self, symbol, preco_atual, cruzou_para_baixo=False):
+        # Vende se bateu o stop-loss, o take-profit ou se as médias cruzaram para baixo; retorna a nova posição
+        motor = self.motor
+        # Com ordens OCO, stop e alvo estão na Binance; aqui sobra a saída pelo cruzamento
+        acionou_stop = not motor.ordens_oco and preco_atual <= motor.stop_losses[symbol]
+        acionou_alvo = not motor.ordens_oco and preco_atual >= motor.take_profits[symbol]
+        if not (acionou_stop or acionou_alvo or cruzou_para_baixo):
+            return True
+        try:
+            quantidade = motor.vender_tudo(symbol, preco_atual)
+            if acionou_stop:
+                logging.info(f"Stop-loss acionado! Venda de {quantidade} {symbol} a {preco_atual:.2f} USDT")
+            else:
+                logging.info(f"Venda realizada: {quantidade} {symbol} a {preco_atual:.2f} USDT (take-profit/cruzamento)")
+            motor.fechar_posicao(symbol)
+            return False
+        except Exception as e:
+            if acionou_stop:
+                logging.warning(f"Erro no stop-loss de {symbol}: {e}")
+            else:
+                logging.warning(f"Erro na venda de {symbol}: {e}")
+        return True
+
+
+@registrar("universo")
+class CruzamentoUniverso(CruzamentoMedias):
+    """O cruzamento de médias aplicado aos melhores candidatos do scanner de pares USDT.
+
+    A cada ciclo o scanner ranqueia o universo todo; os `maximo_candidatos` primeiros, as
+    moedas fixas e as que ainda têm posição aberta viram as moedas da estratégia. No modo
+    streaming o feed não acompanha as moedas que entram depois da partida.
+    """
+
+    moedas = ()
+
+    def __init__(self, motor, moedas=None, maximo_candidatos=5, liquidez_minima=1_000_000, **config):
+        super().__init__(motor, moedas, **config)
+        self.fixas = list(self.moedas)
+        # Posições abertas em candidatos de antes de um reinício continuam acompanhadas até fechar
+        self.moedas = sorted(set(self.fixas) | set(motor.posicoes_recuperadas()))
+        self.maximo_candidatos = maximo_candidatos
+        self.liquidez_minima = liquidez_minima
+        self.scanner = Scanner(motor.cache_candles, motor.registro_filtros, motor.periodo_candle,
+                               self.janela_curta, self.janela_longa)
+
+    def ao_ciclo(self, saldo):
+        candidatos = self.scanner.candidatos(self.maximo_candidatos, self.liquidez_minima)["symbol"].tolist()
+        abertas = [moeda for moeda in self.moedas if self.motor.posicoes.get(moeda)]
+        self.moedas = sorted(set(self.fixas) | set(abertas) | set(candidatos))
+        if candidatos:
+            logging.info(f"Candidatos do scanner: {', '.join(candidatos)}")
+        self.motor.acompanhar()
+        return False
+
+
+@registrar("balanceada")
+class Balanceada(EstrategiaMedias):
+    """Divide o saldo em USDT do ciclo entre as moedas e compra cada uma no cruzamento para cima."""
+
+    moedas = ("BTCUSDT", "SOLUSDT")
+
+    def __init__(self, motor, moedas=None, saldo_minimo=20, **medias):
+        super().__init__(motor, moedas, **medias)
+        self.saldo_minimo = saldo_minimo
+        self.valor_por_moeda = 0
+
+    def ao_ciclo(self, saldo):
+        self.valor_por_moeda = saldo["USDT"] / len(self.moedas) if saldo["USDT"] > self.saldo_minimo else 0
+        return False
+
+    def ao_candle(self, symbol, candles, saldo_usdt):
+        posicao = self.motor.posicoes.get(symbol, False)
+        sinais = self.cruzamento(symbol)
+        if sinais is None or not sinais[0] or not self.valor_por_moeda:
+            return posicao
+        logging.info(f"Sinal de compra detectado para {symbol}!")
+        preco_atual = self.motor.snapshot_precos[symbol] or candles[-1, CLOSE]
+        try:
+            quantidade = self.motor.comprar(symbol, self.valor_por_moeda, preco_atual)
+        except Exception as e:
+            logging.warning(f"Erro na compra de {symbol}: {e}")
+            return posicao
+        if quantidade:
+            logging.info(f"Compra de {quantidade} {symbol} executada a {preco_atual:.2f} USDT")
+        else:
+            logging.info(f"Valor de {self.valor_por_moeda:.2f} USDT abaixo do mínimo para {symbol}")
+        return posicao
+
+
+@registrar("compra_btc_eth")
+class CompraBtcEth(Estrategia):
+    """Sem nenhuma posição aberta, divide o saldo em USDT entre BTC e ETH."""
+
+    def __init__(self, motor, moedas=None, alvos=("BTCUSDT", "ETHUSDT"), saldo_minimo=20):
+        super().__init__(motor, moedas)
+        self.alvos = list(alvos)
+        self.saldo_minimo = saldo_minimo
+        motor.snapshot_precos.acompanhar(*self.alvos)
+
+    def ao_ciclo(self, saldo):
+        if any(self.motor.posicoes.values()) or saldo["USDT"] <= self.saldo_minimo:
+            return False
+        logging.info("Sem posições abertas. Comprando BTC e ETH com o saldo disponível.")
+        valor = saldo["USDT"] / len(self.alvos)
+        # Estratégias anteriores no ciclo (ex.: o scanner) podem ter demorado além da validade do snapshot
+        self.motor.snapshot_precos.atualizar_se_vencido()
+        try:
+            for moeda in self.alvos:
+                preco = self.motor.snapshot_precos[moeda]
+                if not preco:
+                    logging.warning(f"Sem preço recente de {moeda}; compra automática adiada")
+                    continue
+                quantidade = self.motor.comprar(moeda, valor, preco)
+                if quantidade:
+                    logging.info(f"Compra automática de {quantidade} {moeda} com {valor:.2f} USDT")
+        except Exception as e:
+            logging.warning(f"Erro ao comprar BTC/ETH automaticamente: {e}")
+        return True
@@ -0,0 +1,123 @@
+import json
+import logging
+import time
+
+# Feed de mercado por WebSocket: klines (com aviso de candle fechado) e mini-ticker.
+# Os callbacks recebem:
+#   ao_candle(symbol, kline, fechado) -> kline no formato de COLUNAS do cache_candles
+#   ao_preco(symbol, preco)
+#   ao_negocio(symbol, preco) -> melhor oferta de compra (bookTicker) ou último negócio (trade)
+#   ao_conta(evento) -> outboundAccountPosition/balanceUpdate do user data stream, como vieram
+
+
+def despachar(msg, ao_candle, ao_preco, ao_conta=None, ao_negocio=None):
+    dados = msg.get("data", msg)
+    tipo = dados.get("e")
+    try:
+        # O bookTicker não tem campo "e"; é o evento mais frequente, então vem primeiro
+        if tipo is None and "b" in dados:
+            if ao_negocio:
+                ao_negocio(dados["s"], float(dados["b"]))
+            return
+        if tipo == "trade":
+            if ao_negocio:
+                ao_negocio(dados["s"], float(dados["p"]))
+            return
+        if tipo == "kline":
+            k = dados["k"]
+            kline = [k["t"], float(k["o"]), float(k["h"]), float(k["l"]), float(k["c"]), float(k["v"]), k["T"]]
+            ao_candle(dados["s"], kline, k["x"])
+        elif tipo == "24hrMiniTicker":
+            ao_preco(dados["s"], float(dados["c"]))
+        elif tipo in ("outboundAccountPosition", "balanceUpdate") and ao_conta:
+            ao_conta(dados)
+    except Exception as e:
+        # Um erro no tratamento não pode derrubar a thread do WebSocket
+        logging.warning(f"Erro ao tratar evento {tipo} de {dados.get('s')}: {e}")
+
+
+class FeedBinance:
+    def __init__(self, api_key, secret_key, moedas, intervalo, ao_candle, ao_preco, arquivo_gravacao=None, ao_conta=None,
+                 ao_negocio=None, stream_negocios="bookTicker"):
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.moedas = moedas
+        self.intervalo = intervalo
+        self.ao_candle = ao_candle
+        self.ao_preco = ao_preco
+        self.ao_conta = ao_conta
+        self.ao_negocio = ao_negocio
+        # "bookTicker" (melhor oferta, preço de saída de uma venda a mercado) ou "trade"
+        self.stream_negocios = stream_negocios
+        self.arquivo_gravacao = arquivo_gravacao
+        self._gravacao = None
+        self._twm = None
+
+    def iniciar(self):
+        from binance import ThreadedWebsocketManager
+
+        if self.arquivo_gravacao:
+            self._gravacao = open(self.arquivo_gravacao, "a")
+        streams = []
+        for moeda in self.moedas:
+            streams.append(f"{moeda.lower()}@kline_{self.intervalo}")
+            streams.append(f"{moeda.lower()}@miniTicker")
+            if self.ao_negocio:
+                streams.append(f"{moeda.lower()}@{self.stream_negocios}")
+        self._twm = ThreadedWebsocketManager(api_key=self.api_key, api_secret=self.secret_key)
+        self._twm.start()
+        self._twm.start_multiplex_socket(callback=self._ao_receber, streams=streams)
+        if self.ao_conta:
+            self._twm.start_user_socket(callback=self._ao_receber)
+        logging.info(f"Feed de mercado iniciado: {len(streams)} streams")
+
+    def parar(self):
+        if self._twm:
+            self._twm.stop()
+        if self._gravacao:
+            self._gravacao.close()
+
+    def _ao_receber(self, msg):
+        if msg.get("e") == "error":
+            logging.warning(f"Erro no WebSocket: {msg.get('m')}")
+            return
+        if self._gravacao:
+            self._gravacao.write(json.dumps(msg) + "\n")
+        despachar(msg, self.ao_candle, self.ao_preco, self.ao_conta, self.ao_negocio)
+
+
+class FeedReplay:
+    """Reproduz eventos gravados (lista ou arquivo .jsonl) pelos mesmos callbacks do feed real.
+
+    Com velocidade=None os eventos são entregues sem espera; com velocidade=60, um minuto
+    de mercado dura um segundo.
+    """
+
+    def __init__(self, eventos, ao_candle, ao_preco, velocidade=None, ao_conta=None, ao_negocio=None):
+        self.eventos = eventos
+        self.ao_candle = ao_candle
+        self.ao_preco = ao_preco
+        self.ao_conta = ao_conta
+        self.ao_negocio = ao_negocio
+        self.velocidade = velocidade
+
+    def _ler(self):
+        if isinstance(self.eventos, str):
+            with open(self.eventos) as f:
+                for linha in f:
+                    if linha.strip():
+                        yield json.loads(linha)
+        else:
+            yield from self.eventos
+
+    def executar(self):
+        ultimo_evento = None
+        total = 0
+        for msg in self._ler():
+            momento = msg.get("data", msg).get("E")
+            if self.velocidade and momento and ultimo_evento:
+                time.sleep(max(0, momento - ultimo_evento) / 1000 / self.velocidade)
+            ultimo_evento = momento or ultimo_evento
+            despachar(msg, self.ao_candle, self.ao_preco, self.ao_conta, self.ao_negocio)
+            total += 1
+        return total
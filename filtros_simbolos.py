@@ -0,0 +1,104 @@
+import json
+import logging
+import os
+import time
+
+# Tabela local dos filtros de negociação (LOT_SIZE, NOTIONAL, PRICE_FILTER...) de todos os símbolos.
+# Carrega uma vez do get_exchange_info, salva em disco e só volta à API quando o TTL vence, pelo
+# atualizar() do ciclo do motor: o dimensionamento de uma ordem nunca espera o exchangeInfo (peso 20).
+
+
+def _interpretar_simbolo(info):
+    filtros = {f["filterType"]: f for f in info.get("filters", [])}
+    lot = filtros.get("LOT_SIZE", {})
+    lot_mercado = filtros.get("MARKET_LOT_SIZE", {})
+    notional = filtros.get("NOTIONAL") or filtros.get("MIN_NOTIONAL") or {}
+    preco = filtros.get("PRICE_FILTER", {})
+    return {
+        "status": info.get("status"),
+        "base": info.get("baseAsset"),
+        "quote": info.get("quoteAsset"),
+        "min_qty": float(lot.get("minQty", 0)),
+        "max_qty": float(lot.get("maxQty", 0)),
+        "step": float(lot.get("stepSize", 0)),
+        "max_qty_mercado": float(lot_mercado.get("maxQty", 0)),
+        "min_notional": float(notional.get("minNotional", 0)),
+        "tick": float(preco.get("tickSize", 0)),
+        "min_preco": float(preco.get("minPrice", 0)),
+        "max_preco": float(preco.get("maxPrice", 0)),
+        "oco": info.get("ocoAllowed", False),
+    }
+
+
+class RegistroFiltros:
+    def __init__(self, cliente, arquivo="filtros_binance.json", ttl=6 * 60 * 60, espera_erro=60):
+        self.cliente = cliente
+        self.arquivo = arquivo
+        self.ttl = ttl
+        # Depois de uma falha, a próxima tentativa só sai `espera_erro` segundos depois
+        self.espera_erro = espera_erro
+        self.atualizado_em = 0
+        self.tentar_em = 0
+        self.simbolos = {}
+        self._carregar_disco()
+
+    def _carregar_disco(self):
+        try:
+            with open(self.arquivo, "r") as f:
+                salvo = json.load(f)
+            self.simbolos = salvo["simbolos"]
+            self.atualizado_em = salvo["atualizado_em"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+
+    def _salvar_disco(self):
+        temporario = self.arquivo + ".tmp"
+        with open(temporario, "w") as f:
+            json.dump({"atualizado_em": self.atualizado_em, "simbolos": self.simbolos}, f)
+        os.replace(temporario, self.arquivo)
+
+    def carregar(self):
+        """Baixa a tabela inteira da Binance; devolve False se a consulta falhou."""
+        try:
+            info = self.cliente.get_exchange_info()
+        except Exception as e:
+            # Sem rede, segue com a tabela antiga (se houver) até a próxima tentativa
+            self.tentar_em = time.time() + self.espera_erro
+            logging.warning(f"Erro ao atualizar filtros da exchange: {e}")
+            return False
+        self.simbolos = {s["symbol"]: _interpretar_simbolo(s) for s in info["symbols"]}
+        self.atualizado_em = time.time()
+        self._salvar_disco()
+        logging.info(f"Filtros de {len(self.simbolos)} símbolos carregados da Binance")
+        return True
+
+    def atualizar(self, forcar=False):
+        """Recarrega quando o TTL vence (respeitando a espera depois de uma falha) ou se forçado."""
+        agora = time.time()
+        if forcar or (agora - self.atualizado_em > self.ttl and agora >= self.tentar_em):
+            return self.carregar()
+        return False
+
+    def _garantir_atualizado(self):
+        # Só sem tabela nenhuma (primeira partida, sem o arquivo) a consulta sai aqui; vencida, a
+        # tabela antiga continua valendo até o próximo atualizar()
+        if not self.simbolos and time.time() >= self.tentar_em:
+            self.carregar()
+
+    def filtros(self, symbol):
+        self._garantir_atualizado()
+        return self.simbolos.get(symbol)
+
+    def lot_size(self, symbol):
+        filtros = self.filtros(symbol)
+        if not filtros:
+            return 0, 0, 0
+        return filtros["min_qty"], filtros["step"], filtros["min_notional"]
+
+    def todos(self):
+        self._garantir_atualizado()
+        return self.simbolos
+
+    def listar(self, quote="USDT", status="TRADING"):
+        self._garantir_atualizado()
+        return [s for s, f in self.simbolos.items() if f["quote"] == quote and f["status"] == status]
@@ -0,0 +1,206 @@
+import logging
+import queue
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+import requests
+from requests.adapters import HTTPAdapter
+from binance.exceptions import BinanceAPIException, BinanceRequestException
+from metricas import metricas
+
+# Limites da API spot da Binance (GET /api/v3/exchangeInfo -> rateLimits)
+LIMITE_PESO_1M = 6000
+LIMITE_ORDENS_10S = 100
+# Códigos de erro que valem nova tentativa: excesso de requisições, timeout interno, fila cheia
+CODIGOS_TRANSITORIOS = {-1003, -1007, -1008, -1015}
+# Rejeições por limite: a Binance recusou a requisição, então a ordem com certeza não entrou
+CODIGOS_LIMITE = {-1003, -1015}
+ORDEM_INEXISTENTE = -2013
+
+
+def _espera(tentativa):
+    return min(30.0, 0.5 * 2 ** tentativa) * (1 + random.random())
+
+
+def _rejeitada_por_limite(erro):
+    return isinstance(erro, BinanceAPIException) and (erro.status_code in (418, 429) or erro.code in CODIGOS_LIMITE)
+
+
+class Balde:
+    """Token bucket: `capacidade` fichas, repostas continuamente ao longo de `periodo` segundos."""
+
+    def __init__(self, capacidade, periodo):
+        self.capacidade = capacidade
+        self.taxa = capacidade / periodo
+        self.fichas = float(capacidade)
+        self._ultimo = time.monotonic()
+
+    def _repor(self):
+        agora = time.monotonic()
+        self.fichas = min(self.capacidade, self.fichas + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    def espera(self, custo=1):
+        """Segundos até haver `custo` fichas (0 se já há)."""
+        self._repor()
+        return max(0.0, (custo - self.fichas) / self.taxa)
+
+    def consumir(self, custo=1):
+        self._repor()
+        self.fichas -= custo
+
+    def sincronizar(self, usado):
+        # O contador do servidor manda: nunca ter mais fichas do que ele ainda permite
+        self._repor()
+        self.fichas = min(self.fichas, self.capacidade - usado)
+
+
+class GatewayOrdens:
+    """Fila de ordens com controle de taxa, novas tentativas e sessão HTTP com pool de conexões.
+
+    enviar() devolve um Future; executar() espera o resultado. executar_oco() e cancelar()
+    passam pela mesma fila para OCOs e cancelamentos. Os trabalhadores só mandam uma
+    requisição quando há fichas nos baldes de peso (1 min) e de ordens (10 s). Os baldes são
+    acertados pelos cabeçalhos x-mbx-used-weight-1m / x-mbx-order-count-10s de toda resposta
+    do cliente, inclusive klines e saldos. Um 429/418 pausa o envio pelo Retry-After.
+    """
+
+    def __init__(self, cliente, trabalhadores=4, limite_peso=LIMITE_PESO_1M, limite_ordens=LIMITE_ORDENS_10S,
+                 margem=0.9, tentativas=5, conexoes=10):
+        self.cliente = cliente
+        self.tentativas = tentativas
+        self._peso = Balde(int(limite_peso * margem), 60)
+        self._ordens = Balde(int(limite_ordens * margem), 10)
+        self._pausa_ate = 0.0
+        self._trava = threading.Lock()
+        self._fila = queue.Queue()
+
+        adaptador = HTTPAdapter(pool_connections=conexoes, pool_maxsize=conexoes)
+        cliente.session.mount("https://", adaptador)
+        cliente.session.hooks["response"].append(self._ao_responder)
+
+        for i in range(trabalhadores):
+            threading.Thread(target=self._trabalhar, name=f"ordens-{i}", daemon=True).start()
+
+    def _enfileirar(self, chamada, consulta, ordens, parametros):
+        futuro = Future()
+        self._fila.put((chamada, consulta, ordens, parametros, futuro))
+        return futuro
+
+    def enviar(self, **parametros):
+        # Id próprio da ordem: numa falha de rede dá para saber se ela chegou antes de repetir
+        parametros.setdefault("newClientOrderId", f"bot-{uuid.uuid4().hex[:24]}")
+        return self._enfileirar("create_order", self._consultar, 1, parametros)
+
+    def executar(self, timeout=None, **parametros):
+        # "ordem" inclui a espera na fila; "ordem_api" só a chamada à Binance
+        with metricas.medir("ordem", parametros.get("symbol")):
+            return self.enviar(**parametros).result(timeout)
+
+    def executar_oco(self, timeout=None, **parametros):
+        # As duas pernas contam como duas ordens; o id da perna de baixo serve para a consulta
+        parametros.setdefault("belowClientOrderId", f"bot-{uuid.uuid4().hex[:24]}")
+        with metricas.medir("ordem_oco", parametros.get("symbol")):
+            return self._enfileirar("create_oco_order", self._consultar_oco, 2, parametros).result(timeout)
+
+    def cancelar(self, timeout=None, **parametros):
+        # Cancelamento não conta no limite de ordens, só no de peso
+        with metricas.medir("cancelamento", parametros.get("symbol")):
+            return self._enfileirar("cancel_order", self._consultar_cancelamento, 0, parametros).result(timeout)
+
+    def _ao_responder(self, resposta, *args, **kwargs):
+        cabecalhos = resposta.headers
+        with self._trava:
+            usado = cabecalhos.get("x-mbx-used-weight-1m")
+            if usado is not None:
+                self._peso.sincronizar(int(usado))
+            ordens = cabecalhos.get("x-mbx-order-count-10s")
+            if ordens is not None:
+                self._ordens.sincronizar(int(ordens))
+            if resposta.status_code in (418, 429):
+                pausa = float(cabecalhos.get("Retry-After", 60))
+                self._pausa_ate = max(self._pausa_ate, time.monotonic() + pausa)
+                logging.warning(f"Limite da Binance atingido ({resposta.status_code}); pausando envios por {pausa:.0f}s")
+
+    def _aguardar_vez(self, ordens=1):
+        while True:
+            with self._trava:
+                espera = max(self._pausa_ate - time.monotonic(), self._peso.espera(), self._ordens.espera(ordens))
+                if espera <= 0:
+                    self._peso.consumir()
+                    self._ordens.consumir(ordens)
+                    return
+            time.sleep(espera)
+
+    def _trabalhar(self):
+        while True:
+            chamada, consulta, ordens, parametros, futuro = self._fila.get()
+            if not futuro.set_running_or_notify_cancel():
+                continue
+            try:
+                futuro.set_result(self._enviar_com_tentativas(chamada, consulta, ordens, parametros))
+            except Exception as e:
+                futuro.set_exception(e)
+
+    def _enviar_com_tentativas(self, chamada, consulta, ordens, parametros):
+        for tentativa in range(self.tentativas):
+            self._aguardar_vez(ordens)
+            try:
+                with metricas.medir("ordem_api"):
+                    return getattr(self.cliente, chamada)(**parametros)
+            except BinanceAPIException as e:
+                if e.status_code not in (418, 429) and e.status_code < 500 and e.code not in CODIGOS_TRANSITORIOS:
+                    raise
+                erro = e
+            except (BinanceRequestException, requests.ConnectionError, requests.Timeout) as e:
+                erro = e
+            if tentativa == self.tentativas - 1:
+                raise erro
+            # Sem resposta não dá para saber se a requisição chegou: consulta pelo id antes de repetir.
+            # Uma rejeição por limite não executou nada, e consultar na hora só agravaria o bloqueio.
+            if not _rejeitada_por_limite(erro):
+                existente = self._confirmar(consulta, parametros)
+                if existente:
+                    return existente
+            espera = _espera(tentativa)
+            logging.warning(f"{chamada} {parametros['symbol']} falhou ({erro}); nova tentativa em {espera:.1f}s")
+            time.sleep(espera)
+
+    def _confirmar(self, consulta, parametros):
+        """Resultado da consulta pelo id; None só se a Binance responde que a ordem não existe (-2013).
+
+        A consulta passa pelos mesmos baldes e pausas dos envios. Enquanto a situação da ordem
+        é desconhecida ela se repete com espera crescente; esgotadas as tentativas o erro sobe,
+        porque reenviar uma ordem que talvez já tenha sido executada pode executá-la duas vezes.
+        """
+        for tentativa in range(self.tentativas):
+            self._aguardar_vez(0)
+            try:
+                return consulta(parametros)
+            except BinanceAPIException as e:
+                if e.code == ORDEM_INEXISTENTE:
+                    return None
+                erro = e
+            except (BinanceRequestException, requests.ConnectionError, requests.Timeout) as e:
+                erro = e
+            if tentativa == self.tentativas - 1:
+                raise erro
+            espera = _espera(tentativa)
+            logging.warning(f"Consulta da ordem {parametros['symbol']} falhou ({erro}); nova consulta em {espera:.1f}s")
+            time.sleep(espera)
+
+    def _consultar(self, parametros):
+        return self.cliente.get_order(symbol=parametros["symbol"], origClientOrderId=parametros["newClientOrderId"])
+
+    def _consultar_oco(self, parametros):
+        # Se a perna de baixo existe, a lista inteira entrou
+        perna = self.cliente.get_order(symbol=parametros["symbol"], origClientOrderId=parametros["belowClientOrderId"])
+        return {"orderListId": perna.get("orderListId"), "listClientOrderId": parametros.get("listClientOrderId"),
+                "symbol": perna["symbol"], "transactionTime": perna.get("time", 0), "orderReports": [perna]}
+
+    def _consultar_cancelamento(self, parametros):
+        ids = {chave: parametros[chave] for chave in ("orderId", "origClientOrderId") if chave in parametros}
+        ordem = self.cliente.get_order(symbol=parametros["symbol"], **ids)
+        return ordem if ordem.get("status") in ("CANCELED", "EXPIRED") else None
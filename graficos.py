@@ -0,0 +1,88 @@
+import logging
+import os
+import queue
+import threading
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from indicadores import sma_vetorizada
+from metricas import metricas
+
+
+class RenderizadorGraficos:
+    """Gera os PNGs de preço + médias numa thread separada, fora do caminho das ordens.
+
+    enviar() só copia os dados e enfileira; se o mesmo símbolo for enviado de novo antes de
+    ser desenhado, vale o pedido mais recente. Cada símbolo tem uma figura persistente: a
+    cada atualização só os dados das linhas mudam. Candles iguais aos do último PNG não
+    geram um novo desenho.
+    """
+
+    def __init__(self, pasta=".", janela_curta=7, janela_longa=40):
+        self.pasta = pasta
+        self.janela_curta = janela_curta
+        self.janela_longa = janela_longa
+        os.makedirs(pasta, exist_ok=True)
+        self._fila = queue.Queue()
+        self._trava = threading.Lock()
+        self._pendentes = {}
+        self._assinaturas = {}
+        self._figuras = {}
+        threading.Thread(target=self._trabalhar, name="graficos", daemon=True).start()
+
+    def arquivo(self, symbol):
+        return os.path.join(self.pasta, f"grafico_{symbol}.png")
+
+    def enviar(self, symbol, tempos, closes):
+        if len(closes) == 0:
+            return
+        assinatura = (tempos[-1], closes[-1], len(closes))
+        with self._trava:
+            if self._assinaturas.get(symbol) == assinatura:
+                return
+            self._assinaturas[symbol] = assinatura
+            novo = symbol not in self._pendentes
+            self._pendentes[symbol] = (np.array(tempos), np.array(closes, dtype=np.float64))
+        if novo:
+            self._fila.put(symbol)
+
+    def _trabalhar(self):
+        while True:
+            symbol = self._fila.get()
+            with self._trava:
+                tempos, closes = self._pendentes.pop(symbol)
+            try:
+                with metricas.medir("grafico_render"):
+                    self._desenhar(symbol, tempos, closes)
+            except Exception as e:
+                logging.warning(f"Erro ao gerar gráfico de {symbol}: {e}")
+
+    def _figura(self, symbol, tempos, closes):
+        # Usa Figure + canvas Agg direto: o pyplot tem estado global e não é seguro fora da thread principal
+        figura = Figure(figsize=(12, 6))
+        canvas = FigureCanvasAgg(figura)
+        eixo = figura.add_subplot()
+        linhas = [
+            eixo.plot(tempos, closes, label='Preço')[0],
+            eixo.plot(tempos, closes, label=f'Média {self.janela_curta}', linestyle='--')[0],
+            eixo.plot(tempos, closes, label=f'Média {self.janela_longa}', linestyle='--')[0],
+        ]
+        eixo.set_title(f'{symbol} - Gráfico com Médias Móveis')
+        eixo.set_xlabel('Tempo')
+        eixo.set_ylabel('Preço')
+        eixo.legend()
+        eixo.grid()
+        figura.tight_layout()
+        self._figuras[symbol] = (canvas, eixo, linhas)
+        return self._figuras[symbol]
+
+    def _desenhar(self, symbol, tempos, closes):
+        canvas, eixo, linhas = self._figuras.get(symbol) or self._figura(symbol, tempos, closes)
+        series = (closes, sma_vetorizada(closes, self.janela_curta), sma_vetorizada(closes, self.janela_longa))
+        for linha, serie in zip(linhas, series):
+            linha.set_data(tempos, serie)
+        eixo.relim()
+        eixo.autoscale_view()
+        nome_arquivo = self.arquivo(symbol)
+        canvas.print_png(nome_arquivo)
+        logging.info(f"Gráfico salvo como {nome_arquivo}")
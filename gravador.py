@@ -0,0 +1,267 @@
+import argparse
+import glob
+import logging
+import os
+import threading
+import time
+import zlib
+from collections import defaultdict
+import numpy as np
+
+# Gravador de mercado: klines em vários intervalos e aggTrades de cada moeda, em arquivos
+# por coluna particionados por símbolo e dia (UTC):
+#   dados_mercado/BTCUSDT/2025-04-15/aggtrades/preco.bin
+#   dados_mercado/BTCUSDT/2025-04-15/klines_1h/close.bin
+# Cada coluna é um array binário puro, então os dias recentes abrem com np.memmap sem cópia.
+# Dias mais antigos que `dias_brutos` são compactados com zlib (coluna.bin.z) e descompactados
+# na leitura. Um evento atrasado depois disso volta a criar o coluna.bin, que a compactação
+# seguinte guarda como outro lote (coluna.bin.1.z, .2.z, ...); a leitura junta tudo em ordem.
+
+PASTA = "dados_mercado"
+ESQUEMAS = {
+    "aggtrades": [("id", "<i8"), ("preco", "<f8"), ("quantidade", "<f8"), ("tempo", "<i8"), ("comprador_maker", "u1")],
+    "klines": [("open_time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+               ("volume", "<f8"), ("close_time", "<i8"), ("trades", "<i8"), ("taker_buy_volume", "<f8")],
+}
+
+
+def _esquema(tabela):
+    return ESQUEMAS[tabela.split("_")[0]]
+
+
+def _dia(momento_ms):
+    return time.strftime("%Y-%m-%d", time.gmtime(momento_ms / 1000))
+
+
+class GravadorColunas:
+    def __init__(self, pasta=PASTA, max_buffer=10000):
+        self.pasta = pasta
+        self.max_buffer = max_buffer
+        self._buffers = defaultdict(list)
+        self._trava = threading.Lock()
+        self._alinhadas = set()  # tabelas já conferidas por este processo
+
+    def adicionar(self, symbol, tabela, momento_ms, linha):
+        chave = (symbol, tabela, _dia(momento_ms))
+        with self._trava:
+            buffer = self._buffers[chave]
+            buffer.append(linha)
+            cheio = len(buffer) >= self.max_buffer
+            if cheio:
+                linhas = self._buffers.pop(chave)
+        if cheio:
+            self._gravar(chave, linhas)
+
+    def descarregar(self):
+        with self._trava:
+            buffers, self._buffers = self._buffers, defaultdict(list)
+        for chave, linhas in buffers.items():
+            self._gravar(chave, linhas)
+
+    def _gravar(self, chave, linhas):
+        symbol, tabela, dia = chave
+        pasta = os.path.join(self.pasta, symbol, dia, tabela)
+        os.makedirs(pasta, exist_ok=True)
+        registros = np.array(linhas, dtype=_esquema(tabela))
+        # Só o primeiro anexo de cada tabela precisa conferir: depois, as colunas são todas escritas aqui
+        if chave not in self._alinhadas:
+            _alinhar(pasta, tabela)
+        self._alinhadas.discard(chave)
+        for coluna, _ in _esquema(tabela):
+            with open(os.path.join(pasta, coluna + ".bin"), "ab") as f:
+                f.write(registros[coluna].tobytes())
+        self._alinhadas.add(chave)
+
+
+def _lote(arquivo, k, compactado=True):
+    # Lote k de uma coluna: "coluna.bin.z" (o primeiro) ou "coluna.bin.<k>.z"; ".lote" enquanto não compactado
+    return (arquivo if k == 0 else f"{arquivo}.{k}") + (".z" if compactado else ".lote")
+
+
+def _lotes(arquivo):
+    """Lotes da coluna em ordem, cada um como (.z, .lote); o .z, se existir, vale pelos dois."""
+    k = 0
+    while os.path.exists(_lote(arquivo, k)) or os.path.exists(_lote(arquivo, k, False)):
+        yield _lote(arquivo, k), _lote(arquivo, k, False)
+        k += 1
+
+
+def _linhas(arquivo, tamanho):
+    """(linhas nos lotes, linhas no .bin) de uma coluna."""
+    lotes = 0
+    for compactado, bruto in _lotes(arquivo):
+        if os.path.exists(compactado):
+            with open(compactado, "rb") as f:
+                lotes += len(zlib.decompress(f.read())) // tamanho
+        else:
+            lotes += os.path.getsize(bruto) // tamanho
+    return lotes, os.path.getsize(arquivo) // tamanho if os.path.exists(arquivo) else 0
+
+
+def _alinhar(pasta, tabela):
+    """Corta o .bin das colunas de uma tabela para todas terem o mesmo número de linhas.
+
+    Um crash entre as colunas de uma gravação deixa umas mais compridas (ou com uma linha
+    pela metade); sem o corte, tudo o que fosse anexado depois ficaria desalinhado.
+    """
+    tamanhos = {os.path.join(pasta, coluna + ".bin"): np.dtype(tipo).itemsize for coluna, tipo in _esquema(tabela)}
+    linhas = {arquivo: _linhas(arquivo, tamanho) for arquivo, tamanho in tamanhos.items()}
+    total = min(lotes + bruto for lotes, bruto in linhas.values())
+    for arquivo, (lotes, bruto) in linhas.items():
+        if os.path.exists(arquivo) and os.path.getsize(arquivo) != max(total - lotes, 0) * tamanhos[arquivo]:
+            logging.warning(f"Coluna {arquivo} com {lotes + bruto} linhas; cortada em {total}")
+            os.truncate(arquivo, max(total - lotes, 0) * tamanhos[arquivo])
+
+
+def ler_coluna(symbol, dia, tabela, coluna, pasta=PASTA):
+    tipo = dict(_esquema(tabela))[coluna]
+    arquivo = os.path.join(pasta, symbol, dia, tabela, coluna + ".bin")
+    partes = []
+    for compactado, bruto in _lotes(arquivo):
+        if os.path.exists(compactado):
+            with open(compactado, "rb") as f:
+                partes.append(np.frombuffer(zlib.decompress(f.read()), dtype=tipo))
+        else:
+            partes.append(np.fromfile(bruto, dtype=tipo))
+    if os.path.exists(arquivo) and os.path.getsize(arquivo):
+        memmap = np.memmap(arquivo, dtype=tipo, mode="r")
+        if not partes:
+            return memmap
+        partes.append(memmap)
+    if not partes:
+        return np.zeros(0, dtype=tipo)
+    return partes[0] if len(partes) == 1 else np.concatenate(partes)
+
+
+def ler_tabela(symbol, tabela, dias, pasta=PASTA):
+    """Colunas de uma tabela para uma lista de dias; com um dia só, os arrays são visões do memmap."""
+    colunas = {}
+    for coluna, _ in _esquema(tabela):
+        partes = [ler_coluna(symbol, dia, tabela, coluna, pasta) for dia in dias]
+        colunas[coluna] = partes[0] if len(partes) == 1 else np.concatenate(partes)
+    # Um crash no meio de uma gravação pode deixar colunas com tamanhos diferentes
+    tamanho = min(len(v) for v in colunas.values())
+    return {coluna: valores[:tamanho] for coluna, valores in colunas.items()}
+
+
+def klines_gravadas(symbol, intervalo, dias, pasta=PASTA):
+    """Klines gravadas no formato (n, 7) do cache_candles, prontas para o backtest."""
+    tabela = ler_tabela(symbol, f"klines_{intervalo}", dias, pasta)
+    colunas = ["open_time", "open", "high", "low", "close", "volume", "close_time"]
+    return np.column_stack([tabela[c].astype(np.float64) for c in colunas])
+
+
+def _compactar_lote(bruto, compactado):
+    with open(bruto, "rb") as f:
+        conteudo = zlib.compress(f.read(), 6)
+    with open(compactado + ".tmp", "wb") as f:
+        f.write(conteudo)
+    os.replace(compactado + ".tmp", compactado)
+    os.remove(bruto)
+
+
+def compactar(pasta=PASTA, dias_brutos=2):
+    limite = _dia((time.time() - dias_brutos * 86400) * 1000)
+    compactados = 0
+    arquivos = glob.glob(os.path.join(pasta, "*", "*", "*", "*.bin"))
+    # Lotes que uma compactação interrompida deixou sem o .z (ou com o .z já pronto)
+    arquivos += [nome.split(".bin.")[0] + ".bin" for nome in glob.glob(os.path.join(pasta, "*", "*", "*", "*.bin*.lote"))]
+    arquivos = sorted(set(arquivos))
+    # Colunas desalinhadas por um crash viram lotes desalinhados se forem compactadas assim
+    for pasta_tabela in sorted({os.path.dirname(arquivo) for arquivo in arquivos}):
+        if pasta_tabela.split(os.sep)[-2] < limite:
+            _alinhar(pasta_tabela, os.path.basename(pasta_tabela))
+    for arquivo in arquivos:
+        dia = arquivo.split(os.sep)[-3]
+        if dia >= limite:
+            continue
+        k = 0
+        for compactado, bruto in _lotes(arquivo):
+            if os.path.exists(bruto):
+                if os.path.exists(compactado):
+                    os.remove(bruto)
+                else:
+                    _compactar_lote(bruto, compactado)
+            k += 1
+        if os.path.exists(arquivo):
+            # Renomear primeiro: assim os dados estão sempre em exatamente um lote, mesmo com um crash no meio
+            os.replace(arquivo, _lote(arquivo, k, False))
+            _compactar_lote(_lote(arquivo, k, False), _lote(arquivo, k))
+            compactados += 1
+    if compactados:
+        logging.info(f"{compactados} colunas compactadas (dias anteriores a {limite})")
+
+
+class Gravador:
+    def __init__(self, moedas, intervalos, pasta=PASTA, dias_brutos=2):
+        self.moedas = moedas
+        self.intervalos = intervalos
+        self.pasta = pasta
+        self.dias_brutos = dias_brutos
+        self.colunas = GravadorColunas(pasta)
+        self.eventos = 0
+
+    def ao_receber(self, msg):
+        dados = msg.get("data", msg)
+        tipo = dados.get("e")
+        try:
+            if tipo == "aggTrade":
+                self.colunas.adicionar(dados["s"], "aggtrades", dados["T"],
+                                       (dados["a"], float(dados["p"]), float(dados["q"]), dados["T"], dados["m"]))
+            elif tipo == "kline" and dados["k"]["x"]:
+                k = dados["k"]
+                self.colunas.adicionar(dados["s"], f"klines_{k['i']}", k["t"],
+                                       (k["t"], float(k["o"]), float(k["h"]), float(k["l"]), float(k["c"]),
+                                        float(k["v"]), k["T"], k["n"], float(k["V"])))
+            elif tipo == "error":
+                logging.warning(f"Erro no WebSocket: {dados.get('m')}")
+                return
+            self.eventos += 1
+        except Exception as e:
+            logging.warning(f"Erro ao gravar evento {tipo}: {e}")
+
+    def executar(self, intervalo_flush=1.0):
+        from binance import ThreadedWebsocketManager
+
+        compactar(self.pasta, self.dias_brutos)
+        streams = []
+        for moeda in self.moedas:
+            streams.append(f"{moeda.lower()}@aggTrade")
+            streams += [f"{moeda.lower()}@kline_{intervalo}" for intervalo in self.intervalos]
+        twm = ThreadedWebsocketManager()
+        twm.start()
+        # Cada conexão combinada da Binance aceita no máximo 1024 streams
+        for i in range(0, len(streams), 1024):
+            twm.start_multiplex_socket(callback=self.ao_receber, streams=streams[i:i + 1024])
+        logging.info(f"Gravando {len(streams)} streams em {self.pasta}")
+        ultima_compactacao = time.time()
+        eventos_antes = 0
+        try:
+            while True:
+                time.sleep(intervalo_flush)
+                self.colunas.descarregar()
+                if time.time() - ultima_compactacao > 60 * 60:
+                    compactar(self.pasta, self.dias_brutos)
+                    ultima_compactacao = time.time()
+                    logging.info(f"{(self.eventos - eventos_antes) / 3600:.0f} eventos/s na última hora")
+                    eventos_antes = self.eventos
+        except KeyboardInterrupt:
+            pass
+        finally:
+            twm.stop()
+            self.colunas.descarregar()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Grava klines e aggTrades da Binance em colunas por símbolo e dia")
+    parser.add_argument("--moedas", default="BTCUSDT,SOLUSDT")
+    parser.add_argument("--intervalos", default="1m,1h")
+    parser.add_argument("--pasta", default=PASTA)
+    parser.add_argument("--dias-brutos", type=int, default=2, help="dias mantidos sem compactação (memmap)")
+    args = parser.parse_args()
+    Gravador(args.moedas.split(","), args.intervalos.split(","), args.pasta, args.dias_brutos).executar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import struct
+import time
+from datetime import datetime
+import numpy as np
+
+# Histórico de patrimônio em arquivo binário só de anexação: cada ponto é um registro fixo
+# de 16 bytes (epoch em segundos, saldo total em USDT), gravado em ordem de tempo. Como o
+# arquivo já sai ordenado, ele mesmo serve de índice: consultas por período são busca binária.
+# A composição por ativo de cada ponto (tamanho variável) vai para um .jsonl ao lado.
+
+REGISTRO = struct.Struct("<dd")
+HORA = 60 * 60
+# Horizontes padrão das consultas de valorização; "ytd" é calculado na hora (desde 1º de janeiro)
+HORIZONTES = {"1h": HORA, "24h": 24 * HORA, "7d": 7 * 24 * HORA, "30d": 30 * 24 * HORA, "ytd": None}
+
+
+class ArmazemPatrimonio:
+    def __init__(self, arquivo="patrimonio.bin", arquivo_composicao="patrimonio_ativos.jsonl"):
+        self.arquivo = arquivo
+        self.arquivo_composicao = arquivo_composicao
+        self._dados = np.zeros((1024, 2))
+        self._n = 0
+        self._bytes_lidos = 0
+        self._sincronizar()
+
+    @property
+    def tempos(self):
+        return self._dados[:self._n, 0]
+
+    @property
+    def valores(self):
+        return self._dados[:self._n, 1]
+
+    def __len__(self):
+        self._sincronizar()
+        return self._n
+
+    def _anexar(self, novos):
+        if self._n + len(novos) > len(self._dados):
+            capacidade = len(self._dados)
+            while capacidade < self._n + len(novos):
+                capacidade *= 2
+            dados = np.zeros((capacidade, 2))
+            dados[:self._n] = self._dados[:self._n]
+            self._dados = dados
+        self._dados[self._n:self._n + len(novos)] = novos
+        self._n += len(novos)
+
+    def _sincronizar(self):
+        # Lê só os registros que outro processo (ou este) anexou desde a última leitura
+        try:
+            tamanho = os.path.getsize(self.arquivo)
+        except FileNotFoundError:
+            return
+        tamanho -= tamanho % REGISTRO.size  # ignora um registro incompleto no fim
+        if tamanho <= self._bytes_lidos:
+            return
+        with open(self.arquivo, "rb") as f:
+            f.seek(self._bytes_lidos)
+            novos = np.frombuffer(f.read(tamanho - self._bytes_lidos), dtype="<f8").reshape(-1, 2)
+        self._anexar(novos)
+        self._bytes_lidos = tamanho
+
+    def adicionar(self, valor, momento=None, composicao=None):
+        self._sincronizar()
+        momento = time.time() if momento is None else momento
+        if self._n and momento < self._dados[self._n - 1, 0]:
+            momento = self._dados[self._n - 1, 0]
+        with open(self.arquivo, "ab") as f:
+            # Uma gravação interrompida deixa lixo no fim; corta antes de anexar para não desalinhar
+            if f.tell() != self._bytes_lidos:
+                f.truncate(self._bytes_lidos)
+            f.write(REGISTRO.pack(momento, valor))
+        self._anexar(np.array([[momento, valor]]))
+        self._bytes_lidos += REGISTRO.size
+        if composicao:
+            with open(self.arquivo_composicao, "a") as f:
+                f.write(json.dumps({"momento": momento, "ativos": composicao}) + "\n")
+
+    def importar_json(self, historico):
+        """Migra o antigo historico_patrimonio do dados_bot.json (só se o armazém estiver vazio)."""
+        if len(self) or not historico:
+            return 0
+        pontos = []
+        for item in historico:
+            try:
+                momento = datetime.strptime(item["timestamp"], "%Y-%m-%d %H:%M:%S").timestamp()
+                pontos.append((momento, float(item["saldo_total_usdt"])))
+            except (KeyError, ValueError):
+                continue
+        pontos.sort()
+        with open(self.arquivo, "ab") as f:
+            for momento, valor in pontos:
+                f.write(REGISTRO.pack(momento, valor))
+        self._sincronizar()
+        logging.info(f"{len(pontos)} pontos do histórico de patrimônio migrados para {self.arquivo}")
+        return len(pontos)
+
+    def atual(self):
+        self._sincronizar()
+        return float(self._dados[self._n - 1, 1]) if self._n else None
+
+    def variacoes(self, horizontes=None, agora=None):
+        """Variação percentual para vários horizontes de uma vez (uma busca binária vetorizada)."""
+        horizontes = HORIZONTES if horizontes is None else horizontes
+        agora = time.time() if agora is None else agora
+        atual = self.atual()
+        inicio_ano = datetime(datetime.fromtimestamp(agora).year, 1, 1).timestamp()
+        alvos = np.array([inicio_ano if s is None else agora - s for s in horizontes.values()])
+        indices = np.searchsorted(self.tempos, alvos, side="right") - 1
+        resultado = {}
+        for nome, i in zip(horizontes, indices):
+            antigo = float(self._dados[i, 1]) if i >= 0 else 0
+            resultado[nome] = (atual - antigo) / antigo * 100 if atual is not None and antigo else None
+        return resultado
@@ -0,0 +1,182 @@
+from abc import ABC, abstractmethod
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# Indicadores incrementais: cada candle custa O(1), independente do período.
+# atualizar(..., novo=False) substitui o último candle (o que ainda está em aberto)
+# em vez de anexar um novo. "atual" e "anterior" ficam None até haver dados suficientes.
+
+
+def sma_vetorizada(valores, periodo):
+    valores = np.asarray(valores, dtype=np.float64)
+    resultado = np.full(len(valores), np.nan)
+    if len(valores) >= periodo:
+        soma = np.cumsum(np.insert(valores, 0, 0.0))
+        resultado[periodo - 1:] = (soma[periodo:] - soma[:-periodo]) / periodo
+    return resultado
+
+
+class SMA:
+    def __init__(self, periodo):
+        self.periodo = periodo
+        self._janela = deque(maxlen=periodo)
+        self._soma = 0.0
+        self._contador = 0
+        self.atual = None
+        self.anterior = None
+
+    def inicializar(self, valores):
+        valores = np.asarray(valores, dtype=np.float64)
+        self._janela = deque(valores[-self.periodo:].tolist(), maxlen=self.periodo)
+        self._soma = float(sum(self._janela))
+        medias = sma_vetorizada(valores[-(self.periodo + 1):], self.periodo)
+        self.atual = None if len(medias) < 1 or np.isnan(medias[-1]) else float(medias[-1])
+        self.anterior = None if len(medias) < 2 or np.isnan(medias[-2]) else float(medias[-2])
+        return self.atual
+
+    def atualizar(self, valor, novo=True):
+        valor = float(valor)
+        if novo or not self._janela:
+            self.anterior = self.atual
+            if len(self._janela) == self.periodo:
+                self._soma -= self._janela[0]
+            self._janela.append(valor)
+            self._soma += valor
+            self._contador += 1
+            # Recalcula a soma de tempos em tempos para não acumular erro de ponto flutuante
+            if self._contador % 1000 == 0:
+                self._soma = float(sum(self._janela))
+        else:
+            self._soma += valor - self._janela[-1]
+            self._janela[-1] = valor
+        self.atual = self._soma / self.periodo if len(self._janela) == self.periodo else None
+        return self.atual
+
+
+class _IndicadorRecursivo(ABC):
+    # Guarda o estado antes e depois do último candle, assim substituir o candle
+    # em aberto é só reaplicar a entrada sobre o estado anterior.
+
+    def __init__(self, periodo):
+        self.periodo = periodo
+        self._estado_anterior = None
+        self._estado = None
+
+    @abstractmethod
+    def _aplicar(self, estado, entrada):
+        """Novo estado a partir do anterior (None no primeiro candle) e da tupla de entrada."""
+
+    @abstractmethod
+    def _valor(self, estado):
+        """Valor do indicador num estado, ou None enquanto faltam candles."""
+
+    @property
+    def atual(self):
+        return self._valor(self._estado) if self._estado is not None else None
+
+    @property
+    def anterior(self):
+        return self._valor(self._estado_anterior) if self._estado_anterior is not None else None
+
+    def atualizar(self, *entrada, novo=True):
+        if novo or self._estado is None:
+            self._estado_anterior = self._estado
+        self._estado = self._aplicar(self._estado_anterior, entrada)
+        return self.atual
+
+
+class EMA(_IndicadorRecursivo):
+    # Estado: (ema, quantidade de candles)
+
+    def _aplicar(self, estado, entrada):
+        valor = float(entrada[0])
+        if estado is None:
+            return (valor, 1)
+        alpha = 2 / (self.periodo + 1)
+        return (estado[0] + alpha * (valor - estado[0]), estado[1] + 1)
+
+    def _valor(self, estado):
+        return estado[0] if estado[1] >= self.periodo else None
+
+    def inicializar(self, valores):
+        valores = np.asarray(valores, dtype=np.float64)
+        if len(valores) == 0:
+            return None
+        emas = pd.Series(valores).ewm(span=self.periodo, adjust=False).mean().to_numpy()
+        n = len(valores)
+        self._estado = (float(emas[-1]), n)
+        self._estado_anterior = (float(emas[-2]), n - 1) if n > 1 else None
+        return self.atual
+
+
+class RSI(_IndicadorRecursivo):
+    # Suavização de Wilder. Estado: (último close, média de ganho, média de perda, quantidade de variações)
+
+    def _aplicar(self, estado, entrada):
+        close = float(entrada[0])
+        if estado is None:
+            return (close, 0.0, 0.0, 0)
+        ultimo, ganho, perda, n = estado
+        variacao = close - ultimo
+        if n == 0:
+            return (close, max(variacao, 0.0), max(-variacao, 0.0), 1)
+        ganho += (max(variacao, 0.0) - ganho) / self.periodo
+        perda += (max(-variacao, 0.0) - perda) / self.periodo
+        return (close, ganho, perda, n + 1)
+
+    def _valor(self, estado):
+        _, ganho, perda, n = estado
+        if n < self.periodo:
+            return None
+        if perda == 0:
+            return 100.0
+        return 100 - 100 / (1 + ganho / perda)
+
+    def inicializar(self, closes):
+        closes = np.asarray(closes, dtype=np.float64)
+        if len(closes) == 0:
+            return None
+        if len(closes) == 1:
+            self._estado_anterior, self._estado = None, (float(closes[0]), 0.0, 0.0, 0)
+            return self.atual
+        variacoes = np.diff(closes)
+        alpha = 1 / self.periodo
+        ganhos = pd.Series(np.clip(variacoes, 0, None)).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+        perdas = pd.Series(np.clip(-variacoes, 0, None)).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+        n = len(variacoes)
+        self._estado = (float(closes[-1]), float(ganhos[-1]), float(perdas[-1]), n)
+        if n > 1:
+            self._estado_anterior = (float(closes[-2]), float(ganhos[-2]), float(perdas[-2]), n - 1)
+        else:
+            self._estado_anterior = (float(closes[-2]), 0.0, 0.0, 0)
+        return self.atual
+
+
+class ATR(_IndicadorRecursivo):
+    # atualizar(high, low, close). Estado: (close anterior, atr, quantidade de candles)
+
+    def _aplicar(self, estado, entrada):
+        high, low, close = (float(v) for v in entrada)
+        if estado is None:
+            return (close, high - low, 1)
+        close_anterior, atr, n = estado
+        tr = max(high - low, abs(high - close_anterior), abs(low - close_anterior))
+        return (close, atr + (tr - atr) / self.periodo, n + 1)
+
+    def _valor(self, estado):
+        return estado[1] if estado[2] >= self.periodo else None
+
+    def inicializar(self, highs, lows, closes):
+        highs, lows, closes = (np.asarray(v, dtype=np.float64) for v in (highs, lows, closes))
+        n = len(closes)
+        if n == 0:
+            return None
+        tr = highs - lows
+        if n > 1:
+            close_anterior = closes[:-1]
+            tr[1:] = np.maximum.reduce([tr[1:], np.abs(highs[1:] - close_anterior), np.abs(lows[1:] - close_anterior)])
+        atrs = pd.Series(tr).ewm(alpha=1 / self.periodo, adjust=False).mean().to_numpy()
+        self._estado = (float(closes[-1]), float(atrs[-1]), n)
+        self._estado_anterior = (float(closes[-2]), float(atrs[-2]), n - 1) if n > 1 else None
+        return self.atual
@@ -0,0 +1,77 @@
+import time
+from collections import deque
+import numpy as np
+from cache_candles import OPEN_TIME, HIGH, LOW
+
+HORIZONTES = {"24h": 24 * 60 * 60 * 1000, "7d": 7 * 24 * 60 * 60 * 1000}
+
+
+class ExtremoRolante:
+    """Máxima (ou mínima) dos valores com tempo dentro do horizonte, por fila monotônica.
+
+    A fila guarda só os candidatos a extremo, em ordem decrescente (ou crescente): cada valor
+    entra e sai uma vez, então adicionar e consultar custam O(1) amortizado. Os tempos
+    precisam chegar em ordem; repetir o tempo do último valor (candle em aberto) é permitido.
+    """
+
+    def __init__(self, horizonte, maximo=True):
+        self.horizonte = horizonte
+        self.maximo = maximo
+        self._fila = deque()
+
+    def adicionar(self, tempo, valor):
+        fila = self._fila
+        if self.maximo:
+            while fila and fila[-1][1] <= valor:
+                fila.pop()
+        else:
+            while fila and fila[-1][1] >= valor:
+                fila.pop()
+        fila.append((tempo, valor))
+
+    def valor(self, agora):
+        limite = agora - self.horizonte
+        fila = self._fila
+        while fila and fila[0][0] < limite:
+            fila.popleft()
+        return fila[0][1] if fila else None
+
+
+class JanelasRolantes:
+    """Máximas e mínimas rolantes por símbolo e horizonte, alimentadas pelos candles do cache."""
+
+    def __init__(self, horizontes=None):
+        self.horizontes = horizontes or HORIZONTES
+        self._extremos = {}
+        self._ultimo = {}
+
+    def _do_simbolo(self, symbol):
+        if symbol not in self._extremos:
+            self._extremos[symbol] = {
+                nome: (ExtremoRolante(horizonte, True), ExtremoRolante(horizonte, False))
+                for nome, horizonte in self.horizontes.items()
+            }
+        return self._extremos[symbol]
+
+    def adicionar(self, symbol, tempo, high, low):
+        for maximo, minimo in self._do_simbolo(symbol).values():
+            maximo.adicionar(tempo, high)
+            minimo.adicionar(tempo, low)
+        self._ultimo[symbol] = tempo
+
+    def sincronizar(self, symbol, candles):
+        """Adiciona só os candles a partir do último já visto (que pode ter sido atualizado)."""
+        if len(candles) == 0:
+            return
+        ultimo = self._ultimo.get(symbol)
+        inicio = 0 if ultimo is None else np.searchsorted(candles[:, OPEN_TIME], ultimo)
+        for candle in candles[inicio:]:
+            self.adicionar(symbol, candle[OPEN_TIME], float(candle[HIGH]), float(candle[LOW]))
+
+    def maximo(self, symbol, horizonte="7d", agora=None):
+        agora = time.time() * 1000 if agora is None else agora
+        return self._do_simbolo(symbol)[horizonte][0].valor(agora)
+
+    def minimo(self, symbol, horizonte="7d", agora=None):
+        agora = time.time() * 1000 if agora is None else agora
+        return self._do_simbolo(symbol)[horizonte][1].valor(agora)
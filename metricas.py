@@ -0,0 +1,172 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# Histogramas de latência no estilo HDR: baldes log-lineares com 2^PRECISAO baldes lineares
+# e, acima disso, 2^(PRECISAO-1) sub-baldes por potência de 2 (erro relativo < 1/128).
+# Registrar é O(1), sem alocação: um bit_length, um shift e um incremento numa lista.
+PRECISAO = 8
+_LINEAR = 1 << PRECISAO
+_SUB = 1 << (PRECISAO - 1)
+_BALDES = _LINEAR + 64 * _SUB
+
+
+def _indice(valor):
+    if valor < _LINEAR:
+        return valor
+    deslocamento = valor.bit_length() - PRECISAO
+    return _LINEAR + (deslocamento - 1) * _SUB + ((valor >> deslocamento) - _SUB)
+
+
+def _valor(indice):
+    if indice < _LINEAR:
+        return indice
+    k = indice - _LINEAR
+    return (_SUB + k % _SUB) << (k // _SUB + 1)
+
+
+class Histograma:
+    """Distribuição de durações em ns. Sem trava: um incremento perdido numa corrida rara é aceitável."""
+
+    __slots__ = ("contagens", "n", "soma", "maximo")
+
+    def __init__(self):
+        self.contagens = [0] * _BALDES
+        self.n = 0
+        self.soma = 0
+        self.maximo = 0
+
+    def registrar(self, valor):
+        self.contagens[_indice(valor)] += 1
+        self.n += 1
+        self.soma += valor
+        if valor > self.maximo:
+            self.maximo = valor
+
+    def percentil(self, p):
+        if not self.n:
+            return 0
+        alvo = max(1, int(self.n * p / 100 + 0.5))
+        acumulado = 0
+        for indice, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return min(_valor(indice), self.maximo)
+        return self.maximo
+
+    def resumo(self):
+        ms = 1e6
+        return {
+            "n": self.n,
+            "media_ms": self.soma / self.n / ms if self.n else 0,
+            "p50_ms": self.percentil(50) / ms,
+            "p99_ms": self.percentil(99) / ms,
+            "max_ms": self.maximo / ms,
+        }
+
+
+class _Trecho:
+    __slots__ = ("metricas", "chave", "inicio")
+
+    def __init__(self, metricas, chave):
+        self.metricas = metricas
+        self.chave = chave
+
+    def __enter__(self):
+        self.inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *erro):
+        self.metricas.registrar(self.chave, time.perf_counter_ns() - self.inicio)
+
+
+class Metricas:
+    """Latência por etapa (e por símbolo), chamadas à API e peso usado por ciclo.
+
+    Uso: `with metricas.medir("dados", symbol): ...` custa ~1 µs. observar_cliente() conta
+    cada resposta HTTP do cliente da Binance por endpoint e estima o peso gasto no ciclo
+    a partir do x-mbx-used-weight-1m.
+    """
+
+    def __init__(self):
+        self.histogramas = {}
+        self.chamadas = Counter()
+        self.chamadas_ciclo = Counter()
+        self.peso_1m = 0
+        self.peso_ciclo = 0
+        self.peso_ultimo_ciclo = 0
+        self.chamadas_ultimo_ciclo = {}
+        self._trava = threading.Lock()
+
+    def medir(self, etapa, symbol=None):
+        return _Trecho(self, etapa if symbol is None else f"{etapa}:{symbol}")
+
+    def registrar(self, chave, nanossegundos):
+        histograma = self.histogramas.get(chave)
+        if histograma is None:
+            histograma = self.histogramas.setdefault(chave, Histograma())
+        histograma.registrar(nanossegundos)
+
+    def observar_cliente(self, cliente):
+        cliente.session.hooks["response"].append(self._ao_responder)
+
+    def _ao_responder(self, resposta, *args, **kwargs):
+        endpoint = urlparse(resposta.url).path
+        usado = resposta.headers.get("x-mbx-used-weight-1m")
+        with self._trava:
+            self.chamadas[endpoint] += 1
+            self.chamadas_ciclo[endpoint] += 1
+            if usado is not None:
+                usado = int(usado)
+                # O contador zera a cada minuto: uma queda indica janela nova
+                self.peso_ciclo += usado - self.peso_1m if usado >= self.peso_1m else usado
+                self.peso_1m = usado
+
+    def novo_ciclo(self):
+        with self._trava:
+            self.peso_ultimo_ciclo = self.peso_ciclo
+            self.chamadas_ultimo_ciclo = dict(self.chamadas_ciclo)
+            self.peso_ciclo = 0
+            self.chamadas_ciclo.clear()
+
+    def resumo(self):
+        with self._trava:
+            return {
+                "etapas": {chave: h.resumo() for chave, h in sorted(self.histogramas.items())},
+                "chamadas": dict(self.chamadas),
+                "chamadas_ultimo_ciclo": self.chamadas_ultimo_ciclo,
+                "peso_ultimo_ciclo": self.peso_ultimo_ciclo,
+                "peso_1m": self.peso_1m,
+            }
+
+    def servir(self, porta=9100, endereco="127.0.0.1"):
+        """Sobe GET /metricas (JSON) numa thread, só na interface local por padrão."""
+        metricas = self
+
+        class Tratador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metricas"):
+                    self.send_error(404)
+                    return
+                corpo = json.dumps(metricas.resumo(), indent=2).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        servidor = ThreadingHTTPServer((endereco, porta), Tratador)
+        threading.Thread(target=servidor.serve_forever, name="metricas", daemon=True).start()
+        logging.info(f"Métricas em http://{endereco}:{porta}/metricas")
+        return servidor
+
+
+# Instância única do processo, compartilhada por motor, gateway e gráficos
+metricas = Metricas()
@@ -0,0 +1,91 @@
+import bisect
+import threading
+from operator import itemgetter
+
+# Saídas de proteção (stop-loss e take-profit) avaliadas a cada negócio ou melhor oferta do feed,
+# em vez de no fechamento do candle. Os níveis de cada símbolo ficam em listas ordenadas por preço;
+# o caso comum (preço entre o maior stop e o menor alvo) é resolvido com duas comparações.
+
+SEM_LIMITE = (float("-inf"), float("inf"))
+_nivel = itemgetter(0)
+
+
+class MonitorProtecao:
+    """Níveis de stop/alvo por símbolo, acionados pelo preço de cada evento do feed.
+
+    definir(symbol, stop, alvo) arma (ou rearma) os níveis de uma posição; um nível 0 fica de
+    fora. Quando o preço cruza um nível, a posição é desarmada e ao_acionar(symbol, chave,
+    tipo, nivel, preco) é chamado fora da trava, com tipo "stop" ou "alvo". Quem trata o
+    acionamento rearma com definir() se a saída falhar.
+    """
+
+    def __init__(self, ao_acionar):
+        self.ao_acionar = ao_acionar
+        self._stops = {}  # symbol -> [(nivel, chave)] em ordem crescente
+        self._alvos = {}
+        self._niveis = {}  # chave -> (symbol, stop, alvo)
+        self._limites = {}  # symbol -> (maior stop, menor alvo)
+        self._trava = threading.Lock()
+
+    def _recalcular_limites(self, symbol):
+        stops, alvos = self._stops.get(symbol), self._alvos.get(symbol)
+        if not stops and not alvos:
+            self._limites.pop(symbol, None)
+            return
+        self._limites[symbol] = (stops[-1][0] if stops else SEM_LIMITE[0], alvos[0][0] if alvos else SEM_LIMITE[1])
+
+    def _tirar(self, chave):
+        symbol, stop, alvo = self._niveis.pop(chave)
+        if stop:
+            self._stops[symbol].remove((stop, chave))
+        if alvo:
+            self._alvos[symbol].remove((alvo, chave))
+        return symbol
+
+    def definir(self, symbol, stop, alvo, chave=None):
+        chave = symbol if chave is None else chave
+        with self._trava:
+            if chave in self._niveis:
+                self._recalcular_limites(self._tirar(chave))
+            if not stop and not alvo:
+                return
+            self._niveis[chave] = (symbol, stop, alvo)
+            if stop:
+                bisect.insort(self._stops.setdefault(symbol, []), (stop, chave))
+            if alvo:
+                bisect.insort(self._alvos.setdefault(symbol, []), (alvo, chave))
+            self._recalcular_limites(symbol)
+
+    def remover(self, chave):
+        with self._trava:
+            if chave in self._niveis:
+                self._recalcular_limites(self._tirar(chave))
+
+    def niveis(self, chave):
+        """(symbol, stop, alvo) armados para `chave`, ou None."""
+        return self._niveis.get(chave)
+
+    def ao_preco(self, symbol, preco):
+        # Caminho quente: sem trava e sem alocação enquanto nenhum nível foi cruzado
+        maior_stop, menor_alvo = self._limites.get(symbol, SEM_LIMITE)
+        if maior_stop < preco < menor_alvo:
+            return
+        acionados = []
+        with self._trava:
+            stops, alvos = self._stops.get(symbol, []), self._alvos.get(symbol, [])
+            # Stops em nivel >= preco ficam do índice bisect em diante; alvos em nivel <= preco, antes dele
+            for nivel, chave in stops[bisect.bisect_left(stops, preco, key=_nivel):]:
+                acionados.append((chave, "stop", nivel))
+            for nivel, chave in alvos[:bisect.bisect_right(alvos, preco, key=_nivel)]:
+                acionados.append((chave, "alvo", nivel))
+            for chave, _, _ in acionados:
+                if chave in self._niveis:
+                    self._tirar(chave)
+            if acionados:
+                self._recalcular_limites(symbol)
+        vistos = set()
+        for chave, tipo, nivel in acionados:
+            # Stop e alvo da mesma posição no mesmo preço: a saída é uma só
+            if chave not in vistos:
+                vistos.add(chave)
+                self.ao_acionar(symbol, chave, tipo, nivel, preco)
@@ -0,0 +1,453 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from binance.client import Client
+from binance.enums import *
+from dotenv import load_dotenv
+from avaliacao import Avaliador
+from cache_candles import CacheCandles, CLOSE, CLOSE_TIME
+from ciclo_async import executar_por_moeda
+from estado_compartilhado import PublicadorEstado
+from feed_mercado import FeedBinance
+from filtros_simbolos import RegistroFiltros
+from gateway_ordens import GatewayOrdens
+from graficos import RenderizadorGraficos
+from historico_patrimonio import ArmazemPatrimonio
+from janela_rolante import JanelasRolantes
+from metricas import metricas
+from monitor_protecao import MonitorProtecao
+from ordens_oco import SincronizadorOCO
+from persistencia import EstadoPersistente
+from precos import SnapshotPrecos
+from reamostragem import Reamostrador
+from saldos import Saldos
+
+# Registro dos plugins de estratégia: nome -> classe
+ESTRATEGIAS = {}
+# Saída de proteção que falha: o monitor é rearmado depois de 5, 10, 20 e 40 s; na 5ª falha o motor desiste
+ESPERA_PROTECAO = 5
+TENTATIVAS_PROTECAO = 5
+
+
+def registrar(nome):
+    """Decorador que registra uma classe de estratégia com o nome usado pelos lançadores."""
+    def decorador(classe):
+        classe.nome = nome
+        ESTRATEGIAS[nome] = classe
+        return classe
+    return decorador
+
+
+class Estrategia:
+    """Base dos plugins. O motor chama, para cada moeda em `moedas`:
+
+    ao_dados(symbol, candles, inicio, tamanho_antes) a cada atualização da série (linhas a
+        partir de `inicio` mudaram; as a partir de `tamanho_antes` são novas);
+    ao_candle(symbol, candles, saldo_usdt) para decidir: a cada ciclo no polling, ou quando
+        fecha um candle de periodo_candle no modo streaming; devolve a nova posição;
+    ao_preco(symbol, preco) a cada mini-ticker (só no modo streaming); devolve a nova posição;
+    e ao_ciclo(saldo) uma vez por verificação, que devolve True se mexeu no saldo.
+    """
+
+    nome = None
+    moedas = ()
+
+    def __init__(self, motor, moedas=None):
+        self.motor = motor
+        self.moedas = list(moedas or self.moedas)
+
+    def ao_ciclo(self, saldo):
+        return False
+
+    def ao_dados(self, symbol, candles, inicio, tamanho_antes):
+        pass
+
+    def ao_candle(self, symbol, candles, saldo_usdt):
+        return self.motor.posicoes.get(symbol, False)
+
+    def ao_preco(self, symbol, preco):
+        return self.motor.posicoes.get(symbol, False)
+
+
+class Motor:
+    """Runtime único dos bots: feed, cache, ordens, persistência e publicação de estado.
+
+    Várias estratégias rodam no mesmo processo sobre um só cache de candles e um só feed;
+    cada uma recebe só os eventos das suas moedas. Posições, stops e alvos ficam no motor,
+    indexados por símbolo.
+    """
+
+    def __init__(self, estrategias, periodo_candle=Client.KLINE_INTERVAL_1HOUR, intervalo_verificacao=60 * 60,
+                 streaming=None, pasta_graficos=".", arquivo_dados="dados_bot.json",
+                 ativos=("USDT", "BTC", "SOL", "ETH"), dias_historico_base=8, cliente=None, porta_metricas=None,
+                 ordens_oco=None):
+        load_dotenv()
+        self.api_key = os.getenv("KEY_BINANCE")
+        self.secret_key = os.getenv("SECRET_BINANCE")
+        # `cliente` permite trocar a Binance por um substituto, ex.: simulador.ClienteSimulado
+        self.cliente = cliente or Client(self.api_key, self.secret_key)
+        metricas.observar_cliente(self.cliente)
+        # METRICAS_PORTA=9100 expõe p50/p99 por etapa em http://127.0.0.1:9100/metricas
+        self.porta_metricas = porta_metricas or int(os.getenv("METRICAS_PORTA", "0")) or None
+        self.registro_filtros = RegistroFiltros(self.cliente)
+        # Todas as ordens passam pela fila com controle de peso/ordens da Binance
+        self.gateway_ordens = GatewayOrdens(self.cliente)
+        # Saldos locais: get_account só na partida e na reconciliação; ordens e stream aplicam deltas
+        self.saldos = Saldos(self.cliente, self.registro_filtros)
+        self.cache_candles = CacheCandles(self.cliente)
+        # Só a série de 1m vem da Binance; periodo_candle e os outros intervalos são montados localmente
+        self.periodo_base = Client.KLINE_INTERVAL_1MINUTE
+        self.periodo_candle = periodo_candle
+        self.dias_historico_base = dias_historico_base
+        self.reamostrador = Reamostrador(self.cache_candles, self.periodo_base)
+        # Máximas/mínimas de 24h e 7d por símbolo para alvos e stops, sem ir à rede na hora da compra
+        self.janelas_rolantes = JanelasRolantes()
+        self.intervalo_verificacao = intervalo_verificacao
+        # MODO_STREAMING=1 troca o polling por hora pelo feed de WebSocket
+        self.streaming = os.getenv("MODO_STREAMING") == "1" if streaming is None else streaming
+        self.arquivo_dados = arquivo_dados
+        self.ativos = list(ativos)
+        self.armazem_patrimonio = ArmazemPatrimonio()
+        self.publicador_estado = PublicadorEstado()
+        # pasta_graficos=None desliga os gráficos (ex.: no simulador)
+        self.renderizador_graficos = RenderizadorGraficos(pasta_graficos) if pasta_graficos else None
+        self.trava = threading.Lock()
+        self.snapshot_precos = SnapshotPrecos(self.cliente, [f"{a}USDT" for a in self.ativos if a != "USDT"])
+        # Patrimônio de qualquer ativo em USDT, com rotas por pares intermediários quando preciso
+        self.avaliador = Avaliador(self.registro_filtros)
+
+        # Restaura posições, preços de compra, stops e alvos do último snapshot + diário de mudanças;
+        # antes das estratégias, que podem precisar saber quais posições estavam abertas
+        self.estado_persistente = EstadoPersistente(arquivo_dados)
+        self.recuperado = self.estado_persistente.recuperar()
+        self.estrategias = [ESTRATEGIAS[nome](self, **config) for nome, config in estrategias]
+
+        # ORDENS_OCO=1 deixa stop e alvo em ordens OCO na própria Binance, protegendo a posição
+        # mesmo com o bot parado; sem isso, o monitor os aciona a cada bookTicker no modo streaming
+        usar_oco = os.getenv("ORDENS_OCO") == "1" if ordens_oco is None else ordens_oco
+        self.ordens_oco = SincronizadorOCO(self) if usar_oco else None
+        self.monitor_protecao = MonitorProtecao(self._acionar_protecao)
+        self.falhas_protecao = {}  # symbol -> saídas de proteção que falharam seguidas
+        self.posicoes = {}
+        self.precos_compra = {}
+        self.stop_losses = {}
+        self.take_profits = {}
+        self.acompanhar()
+
+    def acompanhar(self):
+        """Recalcula as moedas a partir das estratégias; chamar depois que uma delas mudar `moedas`."""
+        self.moedas = sorted({moeda for estrategia in self.estrategias for moeda in estrategia.moedas})
+        self.snapshot_precos.acompanhar(*self.moedas)
+        for moeda in self.moedas:
+            if moeda in self.posicoes:
+                continue
+            for campo, padrao in zip(EstadoPersistente.CAMPOS, (False, 0, 0, 0)):
+                getattr(self, campo)[moeda] = self.recuperado[campo].get(moeda, padrao)
+            if self.posicoes[moeda] and not self.ordens_oco:
+                self.monitor_protecao.definir(moeda, self.stop_losses[moeda], self.take_profits[moeda])
+
+    # Serviços para as estratégias
+
+    def pegar_saldo(self):
+        self.saldos.atualizar()
+        return self.saldos.resumo(self.ativos)
+
+    def ajustar_quantidade(self, symbol, quantidade, saldo_disponivel, preco):
+        min_qty, step, min_notional = self.registro_filtros.lot_size(symbol)
+        if min_qty == 0:
+            return "0"
+        quantidade = float(quantidade)
+        quantidade = max(min_qty, round(quantidade // step * step, 8))
+        quantidade = min(quantidade, saldo_disponivel)
+        if quantidade * preco < min_notional:
+            return "0"
+        return f"{quantidade:.8f}".rstrip('0').rstrip('.')
+
+    def comprar(self, symbol, valor_usdt, preco):
+        """Compra a mercado ~valor_usdt de symbol. Retorna a quantidade enviada ou None se ficou abaixo do mínimo."""
+        quantidade = self.ajustar_quantidade(symbol, valor_usdt / preco, valor_usdt, preco)
+        if float(quantidade) <= 0:
+            return None
+        ordem = self.gateway_ordens.executar(symbol=symbol, side=SIDE_BUY, type=ORDER_TYPE_MARKET, quantity=quantidade)
+        self.saldos.aplicar_ordem(ordem)
+        return quantidade
+
+    def vender_tudo(self, symbol, preco):
+        ativo = symbol.replace("USDT", "")
+        # O saldo protegido fica travado na OCO; cancela antes de vender. Se ela já executou, não sobra nada
+        if self.ordens_oco and self.ordens_oco.cancelar(symbol):
+            return "0"
+        saldo_ativo = self.saldos[ativo]
+        quantidade = self.ajustar_quantidade(symbol, saldo_ativo, saldo_ativo, preco)
+        ordem = self.gateway_ordens.executar(symbol=symbol, side=SIDE_SELL, type=ORDER_TYPE_MARKET, quantity=quantidade)
+        self.saldos.aplicar_ordem(ordem)
+        return quantidade
+
+    def abrir_posicao(self, symbol, preco_compra, stop_loss, take_profit):
+        self.posicoes[symbol] = True
+        self.precos_compra[symbol] = preco_compra
+        self.stop_losses[symbol] = stop_loss
+        self.take_profits[symbol] = take_profit
+        self.estado_persistente.registrar(symbol, posicoes=True, precos_compra=preco_compra,
+                                          stop_losses=stop_loss, take_profits=take_profit)
+        if self.ordens_oco:
+            self.ordens_oco.sincronizar([symbol])
+        else:
+            self.monitor_protecao.definir(symbol, stop_loss, take_profit)
+
+    def fechar_posicao(self, symbol):
+        self.posicoes[symbol] = False
+        self.monitor_protecao.remover(symbol)
+        self.falhas_protecao.pop(symbol, None)
+        self.estado_persistente.registrar(symbol, posicoes=False)
+
+    def preco_mais_alto(self, symbol, horizonte="7d"):
+        return self.janelas_rolantes.maximo(symbol, horizonte) or 0
+
+    # Dados de mercado
+
+    def _estrategias_de(self, symbol):
+        return [estrategia for estrategia in self.estrategias if symbol in estrategia.moedas]
+
+    def _atualizar_series(self, symbol):
+        with metricas.medir("series", symbol):
+            self.janelas_rolantes.sincronizar(symbol, self.cache_candles.janela(symbol, self.periodo_base))
+            tamanho_antes = self.reamostrador.tamanho(symbol, self.periodo_candle)
+            inicio = self.reamostrador.atualizar(symbol, self.periodo_candle)
+            candles = self.reamostrador.janela(symbol, self.periodo_candle)
+        with metricas.medir("medias", symbol):
+            for estrategia in self._estrategias_de(symbol):
+                estrategia.ao_dados(symbol, candles, inicio, tamanho_antes)
+        return candles
+
+    def pegar_dados(self, symbol):
+        # Busca só os candles de 1m novos; periodo_candle é reagregado a partir deles. Se a busca falha,
+        # o erro sobe e o ciclo deixa a moeda de fora em vez de decidir de novo sobre os candles antigos
+        desde = int((time.time() - self.dias_historico_base * 24 * 60 * 60) * 1000)
+        with metricas.medir("dados", symbol):
+            self.cache_candles.atualizar(symbol, self.periodo_base, desde=desde)
+        return self._atualizar_series(symbol)
+
+    def mostrar_grafico(self, symbol, candles):
+        # Só enfileira: o PNG é gerado na thread do renderizador, sem segurar a estratégia
+        if self.renderizador_graficos is None:
+            return
+        janela = candles[-100:]
+        with metricas.medir("grafico", symbol):
+            self.renderizador_graficos.enviar(symbol, janela[:, CLOSE_TIME].astype("datetime64[ms]"), janela[:, CLOSE])
+
+    def _decidir(self, symbol, candles, saldo_usdt):
+        if len(candles) == 0:
+            return
+        self.mostrar_grafico(symbol, candles)
+        for estrategia in self._estrategias_de(symbol):
+            with metricas.medir("estrategia", symbol):
+                self.posicoes[symbol] = estrategia.ao_candle(symbol, candles, saldo_usdt)
+
+    # Modo streaming: estratégia a cada candle fechado, ao_preco a cada mini-ticker e stop/alvo a cada bookTicker
+    def ao_candle(self, symbol, kline, fechado):
+        if not fechado or symbol not in self.posicoes:
+            return
+        with self.trava:
+            # Se o WebSocket caiu, as klines perdidas vêm pela API REST e passam pelo mesmo caminho, em
+            # ordem: um candle de periodo_candle que fechou na lacuna ainda tem a sua decisão
+            for perdida in self.cache_candles.lacuna(symbol, self.periodo_base, kline):
+                self._fechar_kline(symbol, perdida)
+            self._fechar_kline(symbol, kline)
+
+    def _fechar_kline(self, symbol, kline):
+        self.cache_candles.anexar(symbol, self.periodo_base, kline)
+        candles = self._atualizar_series(symbol)
+        # O feed é de 1m; a estratégia só roda quando fecha um candle de periodo_candle
+        if self.reamostrador.fechou(self.periodo_candle, kline):
+            self._decidir(symbol, candles, self.pegar_saldo()['USDT'])
+
+    def ao_preco(self, symbol, preco):
+        if not self.posicoes.get(symbol):
+            return
+        with self.trava:
+            for estrategia in self._estrategias_de(symbol):
+                if self.posicoes.get(symbol):
+                    self.posicoes[symbol] = estrategia.ao_preco(symbol, preco)
+
+    def _acionar_protecao(self, symbol, chave, tipo, nivel, preco):
+        # Chamado na thread do WebSocket: a venda vai para outra thread para o feed não parar
+        threading.Thread(target=self._sair_por_protecao, args=(symbol, tipo, nivel, preco),
+                         name=f"protecao-{symbol}", daemon=True).start()
+
+    def _sair_por_protecao(self, symbol, tipo, nivel, preco):
+        with self.trava:
+            if not self.posicoes.get(symbol):
+                return
+            try:
+                with metricas.medir("protecao", symbol):
+                    quantidade = self.vender_tudo(symbol, preco)
+            except Exception as e:
+                self._falha_protecao(symbol, tipo, preco, e)
+                return
+            nome = "Stop-loss" if tipo == "stop" else "Take-profit"
+            logging.info(f"{nome} ({nivel:.2f}) acionado no intrabar! Venda de {quantidade} {symbol} a {preco:.2f} USDT")
+            self.fechar_posicao(symbol)
+
+    def _falha_protecao(self, symbol, tipo, preco, erro):
+        # Chamado com a trava. Rearma com espera crescente, para não repetir a ordem a cada evento do feed
+        if not self.posicoes.get(symbol):
+            return  # a venda que falhou ainda assim encerrou a posição (ex.: OCO já executada)
+        falhas = self.falhas_protecao.get(symbol, 0) + 1
+        self.falhas_protecao[symbol] = falhas
+        if falhas < TENTATIVAS_PROTECAO:
+            espera = ESPERA_PROTECAO * 2 ** (falhas - 1)
+            logging.warning(f"Erro na saída por {tipo} de {symbol} ({falhas}ª falha): {erro}; rearmando em {espera}s")
+            timer = threading.Timer(espera, self._rearmar_protecao, args=(symbol,))
+            timer.daemon = True
+            timer.start()
+            return
+        # Esgotou as tentativas: sem saldo para vender, a posição já foi encerrada fora do bot
+        self.saldos.carregar()
+        ativo = symbol.replace("USDT", "")
+        if float(self.ajustar_quantidade(symbol, self.saldos[ativo], self.saldos[ativo], preco)) <= 0:
+            logging.warning(f"Saída por {tipo} de {symbol} falhou {falhas} vezes e não há saldo de {ativo}; posição fechada")
+            self.fechar_posicao(symbol)
+        else:
+            logging.error(f"Saída por {tipo} de {symbol} falhou {falhas} vezes ({erro}); monitor desarmado, "
+                          f"a saída fica para o fechamento do candle")
+
+    def _rearmar_protecao(self, symbol):
+        with self.trava:
+            # A posição pode ter sido fechada (pela estratégia, por exemplo) durante a espera
+            if self.posicoes.get(symbol):
+                self.monitor_protecao.definir(symbol, self.stop_losses[symbol], self.take_profits[symbol])
+
+    # Ciclo por polling: busca os candles de todas as moedas em paralelo e depois roda as estratégias
+    # (com as ordens) de cada moeda em paralelo; a falha de uma moeda não afeta as outras
+    async def ciclo_moedas(self, saldo_usdt):
+        dados = await executar_por_moeda(self.moedas, self.pegar_dados)
+        await executar_por_moeda(list(dados), lambda moeda: self._decidir(moeda, dados[moeda], saldo_usdt))
+
+    # Patrimônio e estado
+
+    def avaliar(self, saldo):
+        """(total em USDT, valor em USDT por ativo) com os preços do snapshot do ciclo."""
+        with metricas.medir("avaliacao"):
+            return self.avaliador.avaliar(saldo, self.snapshot_precos.precos)
+
+    def total_usdt(self, saldo):
+        return self.avaliar(saldo)[0]
+
+    def carteira(self):
+        # O que está travado em ordens abertas (ex.: a quantidade protegida pela OCO) também é patrimônio
+        return self.saldos.resumo(self.ativos, incluir_travados=True)
+
+    def patrimonio(self):
+        return self.avaliar(self.carteira())
+
+    def mostrar_saldo(self, saldo, total_usdt, composicao):
+        logging.info("Resumo do saldo:")
+        for ativo, quantidade in saldo.items():
+            if ativo == "USDT":
+                logging.info(f"USDT: {quantidade:.2f}")
+            else:
+                logging.info(f"{ativo}: {quantidade} (≈ {composicao.get(ativo, 0):.2f} USDT)")
+        logging.info(f"Total estimado em USDT: {total_usdt:.2f}")
+
+    def mostrar_valorizacao(self):
+        # Todos os horizontes numa consulta por busca binária ao patrimonio.bin
+        for horizonte, variacao in self.armazem_patrimonio.variacoes().items():
+            if variacao is not None:
+                logging.info(f"Valorização em {horizonte}: {variacao:.2f}%")
+
+    def posicoes_recuperadas(self):
+        """Símbolos com posição aberta no estado recuperado na partida."""
+        return sorted(symbol for symbol, aberta in self.recuperado["posicoes"].items() if aberta)
+
+    def dados(self):
+        # Símbolos que nenhuma estratégia acompanha mais continuam no snapshot como foram recuperados
+        return {campo: {**self.recuperado[campo], **getattr(self, campo)} for campo in EstadoPersistente.CAMPOS}
+
+    def publicar_estado(self, saldo, total_usdt, composicao, dados):
+        # Estado lido pelo bot do Discord direto da memória, sem reabrir o dados_bot.json
+        self.publicador_estado.publicar({
+            "atualizado_em": time.time(),
+            "saldo": saldo,
+            "total_usdt": total_usdt,
+            "composicao": composicao,
+            "variacoes": self.armazem_patrimonio.variacoes(),
+            **dados,
+            "metricas": metricas.resumo(),
+            "graficos": {moeda: self.renderizador_graficos.arquivo(moeda) for moeda in self.moedas}
+                        if self.renderizador_graficos else {},
+        })
+
+    def _migrar_historico(self):
+        # Na primeira execução, migra o histórico antigo do dados_bot.json para o patrimonio.bin
+        try:
+            with open(self.arquivo_dados, "r") as f:
+                historico = json.load(f).get("historico_patrimonio", [])
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self.armazem_patrimonio.importar_json(historico)
+
+    def executar(self, ciclos=None):
+        """Loop principal; `ciclos` limita o número de verificações (None = para sempre)."""
+        self._migrar_historico()
+        logging.info(f"Estratégias: {', '.join(e.nome for e in self.estrategias)} | Moedas: {', '.join(self.moedas)}")
+        if self.streaming:
+            for moeda in self.moedas:
+                try:
+                    self.pegar_dados(moeda)
+                except Exception as e:
+                    logging.warning(f"Erro ao buscar o histórico de {moeda}: {e}")
+            feed = FeedBinance(self.api_key, self.secret_key, self.moedas, self.periodo_base, self.ao_candle, self.ao_preco,
+                               ao_conta=self.saldos.ao_evento, ao_negocio=self.monitor_protecao.ao_preco)
+            feed.iniciar()
+        if self.porta_metricas:
+            metricas.servir(self.porta_metricas)
+
+        ciclo = 0
+        while ciclos is None or ciclo < ciclos:
+            ciclo += 1
+            with metricas.medir("ciclo"):
+                self.ciclo()
+            metricas.novo_ciclo()
+            logging.info("Aguardando próxima verificação...")
+            time.sleep(self.intervalo_verificacao)
+
+    def ciclo(self):
+        # Filtros vencidos são recarregados aqui, nunca no meio do dimensionamento de uma ordem
+        with metricas.medir("filtros"):
+            self.registro_filtros.atualizar()
+        saldo = self.pegar_saldo()
+        # Um só GET de preços cobre as moedas e as pernas de avaliação de todo ativo com saldo
+        self.snapshot_precos.acompanhar(*self.avaliador.pares(self.carteira()))
+        with metricas.medir("precos"):
+            self.snapshot_precos.atualizar()
+        if self.ordens_oco:
+            # Recoloca o que mudou e fecha as posições cuja proteção executou desde o último ciclo
+            self.ordens_oco.sincronizar()
+            saldo = self.pegar_saldo()
+        carteira = self.carteira()
+        total_usdt, composicao = self.avaliar(carteira)
+        self.mostrar_saldo(carteira, total_usdt, composicao)
+        # Anexa só o ponto novo ao patrimonio.bin (e a composição por ativo ao .jsonl)
+        self.armazem_patrimonio.adicionar(total_usdt, composicao=composicao)
+        self.mostrar_valorizacao()
+
+        mexeu_no_saldo = False
+        for estrategia in self.estrategias:
+            mexeu_no_saldo = estrategia.ao_ciclo(saldo) or mexeu_no_saldo
+        if mexeu_no_saldo:
+            saldo = self.pegar_saldo()
+
+        # No modo streaming as estratégias rodam pelos eventos do feed
+        if not self.streaming:
+            asyncio.run(self.ciclo_moedas(saldo['USDT']))
+
+        with self.trava:
+            dados = self.dados()
+            with metricas.medir("persistencia"):
+                # Snapshot atômico; também zera o diário de mudanças
+                self.estado_persistente.snapshot(dados)
+            self.publicar_estado(saldo, total_usdt, composicao, dados)
@@ -0,0 +1,198 @@
+import hashlib
+import logging
+import math
+from binance.enums import *
+from metricas import metricas
+
+# Proteção na corretora: cada posição aberta ganha uma OCO de venda (LIMIT_MAKER no take-profit +
+# STOP_LOSS_LIMIT no stop-loss) espelhando stop_losses/take_profits do motor; sem alvo, só a
+# ordem de stop. O id de cliente é derivado dos níveis, então comparar a intenção local com as
+# ordens abertas é comparar ids: só o que mudou é cancelado e recolocado.
+
+PREFIXO = "oco-"
+
+
+def _arredondar(valor, passo, para_cima=False):
+    if not passo:
+        return f"{valor:.8f}".rstrip("0").rstrip(".")
+    passos = math.ceil(valor / passo - 1e-9) if para_cima else math.floor(valor / passo + 1e-9)
+    casas = max(0, -math.floor(math.log10(passo)))
+    return f"{passos * passo:.{casas}f}"
+
+
+class SincronizadorOCO:
+    """Mantém na Binance as ordens de proteção que as posições do motor pedem.
+
+    sincronizar() busca as ordens abertas numa requisição, cancela as nossas (prefixo "oco-")
+    que não correspondem mais a uma posição ou cujos níveis mudaram e coloca as que faltam.
+    Uma proteção que sumiu sem ser cancelada por nós foi executada (a posição é fechada) ou
+    cancelada por fora (é recolocada). Sem saldo para proteger, a posição já foi encerrada
+    na corretora, por exemplo enquanto o bot estava parado.
+    """
+
+    def __init__(self, motor, folga_stop=0.005):
+        self.motor = motor
+        self.cliente = motor.cliente
+        # O stop é STOP_LOSS_LIMIT: o limite fica `folga_stop` abaixo do gatilho para a ordem ser executada
+        self.folga_stop = folga_stop
+        self.colocadas = {}  # symbol -> id da proteção colocada por este processo
+
+    def _intencao(self, symbol):
+        """(id, níveis) da proteção que a posição de `symbol` pede, ou None."""
+        motor = self.motor
+        stop = motor.stop_losses.get(symbol)
+        if not motor.posicoes.get(symbol) or not stop:
+            return None
+        filtros = motor.registro_filtros.filtros(symbol) or {}
+        tick = filtros.get("tick", 0)
+        alvo = motor.take_profits.get(symbol)
+        niveis = {
+            "stop": _arredondar(stop, tick),
+            "limite": _arredondar(stop * (1 - self.folga_stop), tick),
+            "alvo": _arredondar(alvo, tick, para_cima=True) if alvo else None,
+        }
+        assinatura = f"{symbol}:{niveis['stop']}:{niveis['limite']}:{niveis['alvo']}"
+        return PREFIXO + hashlib.blake2s(assinatura.encode(), digest_size=8).hexdigest(), niveis
+
+    def _abertas(self, symbol=None):
+        """symbol -> {id: [pernas]} das ordens abertas colocadas por este sincronizador."""
+        with metricas.medir("oco_consulta"):
+            ordens = self.cliente.get_open_orders(symbol=symbol) if symbol else self.cliente.get_open_orders()
+        abertas = {}
+        for ordem in ordens:
+            id_cliente = ordem.get("clientOrderId", "")
+            if id_cliente.startswith(PREFIXO):
+                # Pernas: "<id>-s" (stop) e "<id>-a" (alvo)
+                abertas.setdefault(ordem["symbol"], {}).setdefault(id_cliente.rsplit("-", 1)[0], []).append(ordem)
+        return abertas
+
+    def _base(self, symbol):
+        filtros = self.motor.registro_filtros.filtros(symbol)
+        return filtros["base"] if filtros else symbol.replace("USDT", "")
+
+    def _cancelar(self, symbol, id_protecao, pernas):
+        try:
+            # Cancelar uma perna cancela a lista inteira
+            resposta = self.motor.gateway_ordens.cancelar(symbol=symbol, orderId=pernas[0]["orderId"])
+        except Exception as e:
+            logging.warning(f"Erro ao cancelar a proteção {id_protecao} de {symbol}: {e}")
+            return False
+        self.motor.saldos.reservar(self._base(symbol), -float(pernas[0]["origQty"]), resposta.get("transactTime", 0))
+        if self.colocadas.get(symbol) == id_protecao:
+            del self.colocadas[symbol]
+        logging.info(f"Proteção {id_protecao} de {symbol} cancelada")
+        return True
+
+    def _executada(self, symbol, id_protecao):
+        for perna in ("s", "a"):
+            try:
+                if self.cliente.get_order(symbol=symbol, origClientOrderId=f"{id_protecao}-{perna}")["status"] == "FILLED":
+                    return True
+            except Exception:
+                continue
+        return False
+
+    def _fechar(self, symbol, motivo):
+        logging.info(f"{symbol}: {motivo}; posição fechada")
+        self.motor.fechar_posicao(symbol)
+
+    def _colocar(self, symbol, id_protecao, niveis):
+        motor = self.motor
+        base = self._base(symbol)
+        # No modo streaming a proteção sai logo depois da compra, longe do snapshot do ciclo
+        motor.snapshot_precos.atualizar_se_vencido()
+        preco = motor.snapshot_precos[symbol]
+        stop, alvo = float(niveis["stop"]), float(niveis["alvo"] or "inf")
+        saldo = motor.saldos[base]
+        quantidade = motor.ajustar_quantidade(symbol, saldo, saldo, float(niveis["limite"]))
+        if float(quantidade) <= 0:
+            # Vem antes do preço: sem saldo, vender a mercado só falharia de novo a cada ciclo
+            self._fechar(symbol, f"sem saldo de {base} para proteger (já encerrada na corretora?)")
+            return False
+        if preco and not stop < preco < alvo:
+            # A Binance recusa uma proteção que já dispararia; o nível foi cruzado, então sai a mercado
+            try:
+                quantidade = motor.vender_tudo(symbol, preco)
+            except Exception as e:
+                logging.warning(f"Erro na venda de {symbol} com o preço fora da proteção: {e}")
+                return False
+            self._fechar(symbol, f"preço {preco:.2f} fora da proteção ({stop}..{alvo}), venda de {quantidade}")
+            return True
+        try:
+            if niveis["alvo"]:
+                # POST /api/v3/orderList/oco: na venda, a perna de cima é o alvo e a de baixo o stop
+                resposta = motor.gateway_ordens.executar_oco(
+                    symbol=symbol, side=SIDE_SELL, quantity=quantidade, listClientOrderId=id_protecao,
+                    aboveType=ORDER_TYPE_LIMIT_MAKER, abovePrice=niveis["alvo"], aboveClientOrderId=f"{id_protecao}-a",
+                    belowType=ORDER_TYPE_STOP_LOSS_LIMIT, belowStopPrice=niveis["stop"], belowPrice=niveis["limite"],
+                    belowTimeInForce=TIME_IN_FORCE_GTC, belowClientOrderId=f"{id_protecao}-s")
+                momento = resposta.get("transactionTime", 0)
+            else:
+                resposta = motor.gateway_ordens.executar(
+                    symbol=symbol, side=SIDE_SELL, type=ORDER_TYPE_STOP_LOSS_LIMIT, timeInForce=TIME_IN_FORCE_GTC,
+                    quantity=quantidade, price=niveis["limite"], stopPrice=niveis["stop"],
+                    newClientOrderId=f"{id_protecao}-s")
+                momento = resposta.get("transactTime", 0)
+        except Exception as e:
+            logging.warning(f"Erro ao colocar a proteção de {symbol}: {e}")
+            return False
+        motor.saldos.reservar(base, float(quantidade), momento)
+        self.colocadas[symbol] = id_protecao
+        logging.info(f"Proteção de {quantidade} {symbol} na Binance: stop {niveis['stop']} (limite {niveis['limite']})"
+                     + (f", alvo {niveis['alvo']}" if niveis["alvo"] else ""))
+        return True
+
+    def sincronizar(self, simbolos=None):
+        """Acerta as ordens na corretora com as posições de `simbolos` (todas, se None)."""
+        motor = self.motor
+        with metricas.medir("oco"):
+            try:
+                abertas = self._abertas(simbolos[0] if simbolos and len(simbolos) == 1 else None)
+            except Exception as e:
+                logging.warning(f"Erro ao consultar ordens abertas: {e}")
+                return
+            if simbolos is None:
+                simbolos = sorted({s for s, posicao in motor.posicoes.items() if posicao} | set(abertas) | set(self.colocadas))
+            for symbol in simbolos:
+                intencao = self._intencao(symbol)
+                desejado = intencao[0] if intencao else None
+                existentes = abertas.get(symbol, {})
+                for id_protecao, pernas in existentes.items():
+                    if id_protecao != desejado:
+                        self._cancelar(symbol, id_protecao, pernas)
+                if desejado is None:
+                    self.colocadas.pop(symbol, None)
+                    continue
+                if desejado in existentes:
+                    self.colocadas[symbol] = desejado
+                    continue
+                anterior = self.colocadas.pop(symbol, None)
+                if anterior:
+                    # Sumiu sem ser cancelada por nós: executou ou foi cancelada por fora; o saldo local não sabe
+                    motor.saldos.carregar()
+                    if self._executada(symbol, anterior):
+                        self._fechar(symbol, f"proteção {anterior} executada na Binance")
+                        continue
+                self._colocar(symbol, *intencao)
+
+    def cancelar(self, symbol):
+        """Tira a proteção de `symbol` da corretora, liberando o saldo para uma venda da estratégia.
+
+        Devolve True se a proteção já tinha sido executada: a posição é fechada e não há o que vender.
+        """
+        try:
+            existentes = self._abertas(symbol).get(symbol, {})
+        except Exception as e:
+            logging.warning(f"Erro ao consultar ordens abertas de {symbol}: {e}")
+            return False
+        anterior = self.colocadas.get(symbol)
+        for id_protecao, pernas in existentes.items():
+            self._cancelar(symbol, id_protecao, pernas)
+        if anterior and anterior not in existentes:
+            # Sumiu antes da venda da estratégia: acerta o saldo e, se executou, fecha aqui mesmo
+            self.colocadas.pop(symbol, None)
+            self.motor.saldos.carregar()
+            if self._executada(symbol, anterior):
+                self._fechar(symbol, f"proteção {anterior} executada na Binance")
+                return True
+        return False
@@ -0,0 +1,129 @@
+import argparse
+import itertools
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from backtest import backtest, carregar_klines
+from filtros_simbolos import RegistroFiltros
+
+# Otimização dos parâmetros do cruzamento (médias, stop e take-profit) em vários processos.
+# Os candles de cada símbolo ficam em memória compartilhada: os processos só recebem o nome
+# do bloco e montam um array em cima dele, sem copiar nem serializar os dados.
+
+_klines = {}
+_blocos = []
+_filtros = {}
+
+
+def _iniciar_processo(descritores, filtros):
+    for simbolo, (nome, formato) in descritores.items():
+        bloco = shared_memory.SharedMemory(name=nome)
+        _blocos.append(bloco)  # mantém o bloco aberto enquanto o processo existir
+        _klines[simbolo] = np.ndarray(formato, dtype=np.float64, buffer=bloco.buf)
+    _filtros.update(filtros)
+
+
+def _avaliar(tarefa):
+    simbolo, curta, longa, stop, take, taxa = tarefa
+    min_qty, step, min_notional = _filtros.get(simbolo, (0, 0, 0))
+    resultado = backtest(_klines[simbolo], curta, longa, stop, take, taxa,
+                         min_qty=min_qty, step=step, min_notional=min_notional)
+    return {
+        "simbolo": simbolo,
+        "media_curta": curta,
+        "media_longa": longa,
+        "percentual_stop_loss": stop,
+        "percentual_take_profit": take,
+        "retorno_total": resultado["retorno_total"],
+        "max_drawdown": resultado["max_drawdown"],
+        "num_operacoes": resultado["num_operacoes"],
+        "taxa_acerto": resultado["taxa_acerto"],
+    }
+
+
+def montar_combinacoes(curtas, longas, stops, takes, amostras=None, semente=None):
+    combinacoes = [c for c in itertools.product(curtas, longas, stops, takes) if c[0] < c[1]]
+    if amostras and amostras < len(combinacoes):
+        combinacoes = random.Random(semente).sample(combinacoes, amostras)
+    return combinacoes
+
+
+def otimizar(klines_por_simbolo, combinacoes, taxa=0.001, processos=None, filtros=None):
+    blocos = []
+    descritores = {}
+    try:
+        for simbolo, klines in klines_por_simbolo.items():
+            bloco = shared_memory.SharedMemory(create=True, size=max(klines.nbytes, 1))
+            np.ndarray(klines.shape, dtype=np.float64, buffer=bloco.buf)[:] = klines
+            blocos.append(bloco)
+            descritores[simbolo] = (bloco.name, klines.shape)
+
+        tarefas = [(s, *c, taxa) for s in klines_por_simbolo for c in combinacoes]
+        processos = processos or os.cpu_count()
+        lote = max(1, len(tarefas) // (processos * 8))
+        with ProcessPoolExecutor(processos, initializer=_iniciar_processo, initargs=(descritores, filtros or {})) as executor:
+            resultados = list(executor.map(_avaliar, tarefas, chunksize=lote))
+    finally:
+        for bloco in blocos:
+            bloco.close()
+            bloco.unlink()
+
+    tabela = pd.DataFrame(resultados)
+    if tabela.empty:
+        return tabela
+    return tabela.sort_values(["retorno_total", "max_drawdown"], ascending=[False, True]).reset_index(drop=True)
+
+
+def _lista(texto, tipo):
+    return [tipo(v) for v in texto.split(",")]
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Busca de parâmetros do cruzamento de médias")
+    parser.add_argument("--simbolo", action="append", required=True, metavar="SIMBOLO=ARQUIVOS",
+                        help="ex.: BTCUSDT=dados/BTCUSDT-1h-*.csv ou "
+                             "BTCUSDT=dados_mercado/BTCUSDT/*/klines_1h do gravador (pode repetir)")
+    parser.add_argument("--curtas", default="5,7,9,12,15")
+    parser.add_argument("--longas", default="20,30,40,50,60,80")
+    parser.add_argument("--stops", default="0.02,0.03,0.04,0.05")
+    parser.add_argument("--takes", default="0.02,0.04,0.06,0.08")
+    parser.add_argument("--aleatorio", type=int, help="avalia só N combinações sorteadas da grade")
+    parser.add_argument("--semente", type=int)
+    parser.add_argument("--taxa", type=float, default=0.001)
+    parser.add_argument("--processos", type=int)
+    parser.add_argument("--saida", default="resultados_otimizacao.csv")
+    args = parser.parse_args()
+
+    klines_por_simbolo = {}
+    for item in args.simbolo:
+        simbolo, arquivos = item.split("=", 1)
+        klines_por_simbolo[simbolo] = carregar_klines(*arquivos.split(","))
+        logging.info(f"{simbolo}: {len(klines_por_simbolo[simbolo])} candles carregados")
+
+    # Usa a tabela de filtros salva em disco, se houver, para arredondar as quantidades
+    filtros = {}
+    if os.path.exists("filtros_binance.json"):
+        registro = RegistroFiltros(None, ttl=float("inf"))
+        filtros = {s: registro.lot_size(s) for s in klines_por_simbolo}
+
+    combinacoes = montar_combinacoes(_lista(args.curtas, int), _lista(args.longas, int),
+                                     _lista(args.stops, float), _lista(args.takes, float),
+                                     args.aleatorio, args.semente)
+    inicio = time.perf_counter()
+    tabela = otimizar(klines_por_simbolo, combinacoes, args.taxa, args.processos, filtros)
+    duracao = time.perf_counter() - inicio
+
+    tabela.to_csv(args.saida, index=False)
+    logging.info(f"{len(tabela)} backtests em {duracao:.1f}s; resultados em {args.saida}")
+    if not tabela.empty:
+        logging.info("\n" + tabela.head(10).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import json
+import logging
+import os
+import threading
+
+
+def salvar_atomico(caminho, dados):
+    """Grava o JSON num temporário, faz fsync e troca pelo arquivo final com os.replace.
+
+    Um crash no meio deixa o arquivo antigo inteiro, nunca um JSON pela metade.
+    """
+    temporario = caminho + ".tmp"
+    with open(temporario, "w") as f:
+        json.dump(dados, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+    try:
+        pasta = os.open(os.path.dirname(os.path.abspath(caminho)), os.O_RDONLY)
+        try:
+            os.fsync(pasta)
+        finally:
+            os.close(pasta)
+    except OSError:
+        pass  # alguns sistemas (Windows) não permitem fsync em pasta
+
+
+class EstadoPersistente:
+    """Snapshot atômico + diário só de anexação para posições, preços de compra, stops e alvos.
+
+    Cada mudança vira uma linha JSON no diário (uma gravação pequena com fsync), em vez de
+    reescrever o dados_bot.json inteiro. recuperar() lê o snapshot e reaplica o diário;
+    snapshot() grava o estado completo e zera o diário.
+    """
+
+    CAMPOS = ("posicoes", "precos_compra", "stop_losses", "take_profits")
+
+    def __init__(self, arquivo="dados_bot.json", diario="dados_bot.diario", max_registros=500):
+        self.arquivo = arquivo
+        self.diario = diario
+        self.max_registros = max_registros
+        self.dados = {campo: {} for campo in self.CAMPOS}
+        self._registros = 0
+        self._trava = threading.Lock()
+
+    def recuperar(self):
+        try:
+            with open(self.arquivo, "r") as f:
+                self.dados = json.load(f)
+        except FileNotFoundError:
+            self.dados = {}
+        except json.JSONDecodeError as e:
+            logging.warning(f"Snapshot de estado ilegível ({e}); recuperando só pelo diário")
+            self.dados = {}
+        for campo in self.CAMPOS:
+            self.dados.setdefault(campo, {})
+
+        self._registros = 0
+        try:
+            with open(self.diario, "r") as f:
+                for linha in f:
+                    try:
+                        registro = json.loads(linha)
+                    except json.JSONDecodeError:
+                        break  # última linha cortada por um crash durante a gravação
+                    self.dados.setdefault(registro["campo"], {})[registro["symbol"]] = registro["valor"]
+                    self._registros += 1
+        except FileNotFoundError:
+            pass
+        if self._registros:
+            logging.info(f"{self._registros} mudanças de estado recuperadas do diário")
+        return self.dados
+
+    def registrar(self, symbol, **mudancas):
+        """Anexa as mudanças de um símbolo ao diário, ex.: registrar("BTCUSDT", posicoes=True, stop_losses=95000)."""
+        linhas = "".join(json.dumps({"campo": campo, "symbol": symbol, "valor": valor}) + "\n" for campo, valor in mudancas.items())
+        with self._trava:
+            with open(self.diario, "a") as f:
+                f.write(linhas)
+                f.flush()
+                os.fsync(f.fileno())
+            for campo, valor in mudancas.items():
+                self.dados.setdefault(campo, {})[symbol] = valor
+            self._registros += len(mudancas)
+            compactar = self._registros >= self.max_registros
+        if compactar:
+            self.snapshot()
+
+    def snapshot(self, dados=None):
+        with self._trava:
+            if dados is not None:
+                self.dados = dados
+            salvar_atomico(self.arquivo, self.dados)
+            # Só depois do snapshot seguro o diário pode ser zerado; reaplicar linhas antigas é inofensivo
+            with open(self.diario, "w") as f:
+                f.flush()
+                os.fsync(f.fileno())
+            self._registros = 0
@@ -0,0 +1,75 @@
+import json
+import logging
+import time
+
+
+# Erro da Binance para símbolo inexistente; na consulta em lote, um só derruba a lista inteira
+SIMBOLO_INVALIDO = -1121
+
+
+class SnapshotPrecos:
+    """Preços de todos os símbolos acompanhados, buscados numa única requisição por ciclo.
+
+    Valorização, histórico e estratégia leem o mesmo snapshot, então o patrimônio fica
+    consistente dentro do ciclo. "timestamp" diz quando ele foi tirado; passados `validade`
+    segundos, preco() devolve 0 e quem chama usa o próprio fallback ou atualizar_se_vencido().
+    """
+
+    def __init__(self, cliente, simbolos=None, validade=120):
+        self.cliente = cliente
+        self.simbolos = sorted(set(simbolos or []))
+        self.validade = validade
+        self.invalidos = set()
+        self.precos = {}
+        self.timestamp = 0
+
+    def acompanhar(self, *simbolos):
+        self.simbolos = sorted((set(self.simbolos) | set(simbolos)) - self.invalidos)
+
+    def _descartar_invalidos(self, tickers):
+        # O get_all_tickers diz quais símbolos a Binance conhece; os outros saem da lista de vez
+        conhecidos = {t["symbol"] for t in tickers}
+        invalidos = [s for s in self.simbolos if s not in conhecidos]
+        if invalidos:
+            self.invalidos.update(invalidos)
+            self.simbolos = [s for s in self.simbolos if s in conhecidos]
+            logging.warning(f"Símbolos inexistentes na Binance, fora do snapshot de preços: {', '.join(invalidos)}")
+
+    def atualizar(self):
+        try:
+            if self.simbolos:
+                # Um único GET /ticker/price com a lista inteira em vez de um por símbolo
+                try:
+                    tickers = self.cliente.get_symbol_ticker(symbols=json.dumps(self.simbolos, separators=(",", ":")))
+                except Exception as e:
+                    if getattr(e, "code", None) != SIMBOLO_INVALIDO:
+                        raise
+                    # Mesmo peso que a consulta em lote; de quebra mostra qual símbolo é o problema
+                    tickers = self.cliente.get_all_tickers()
+                    self._descartar_invalidos(tickers)
+            else:
+                tickers = self.cliente.get_all_tickers()
+        except Exception as e:
+            logging.warning(f"Erro ao atualizar preços: {e}")
+            return False
+        self.precos.update({t["symbol"]: float(t["price"]) for t in tickers})
+        self.timestamp = time.time()
+        return True
+
+    def atualizar_se_vencido(self):
+        if self.vencido():
+            self.atualizar()
+
+    def idade(self):
+        """Segundos desde o último snapshot."""
+        return time.time() - self.timestamp if self.timestamp else float("inf")
+
+    def vencido(self):
+        return self.idade() > self.validade
+
+    def preco(self, symbol):
+        # Snapshot vencido vale como "sem preço", ex.: no modo streaming, horas depois do último ciclo
+        return 0 if self.vencido() else self.precos.get(symbol, 0)
+
+    def __getitem__(self, symbol):
+        return self.preco(symbol)
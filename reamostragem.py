@@ -0,0 +1,95 @@
+import numpy as np
+from cache_candles import COLUNAS, OPEN_TIME, OPEN, HIGH, LOW, CLOSE, VOLUME, CLOSE_TIME
+
+# Duração de cada intervalo em ms; todos alinhados em UTC como os da Binance
+DURACOES = {
+    "1m": 60_000,
+    "3m": 3 * 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1h": 60 * 60_000,
+    "2h": 2 * 60 * 60_000,
+    "4h": 4 * 60 * 60_000,
+    "6h": 6 * 60 * 60_000,
+    "8h": 8 * 60 * 60_000,
+    "12h": 12 * 60 * 60_000,
+    "1d": 24 * 60 * 60_000,
+}
+
+
+class Reamostrador:
+    """Monta candles de 5m/15m/1h/4h/1d a partir de uma única série base (1m) do CacheCandles.
+
+    Cada atualização só reagrega os candles base a partir do último candle montado (que
+    pode estar em aberto), então pedir outro intervalo não custa nenhuma chamada à rede.
+    Mesma interface de leitura do cache: atualizar(), janela() e tamanho().
+    """
+
+    def __init__(self, cache, base="1m", capacidade=1024):
+        self.cache = cache
+        self.base = base
+        self.capacidade = capacidade
+        self._series = {}
+
+    def _serie(self, symbol, intervalo):
+        chave = (symbol, intervalo)
+        if chave not in self._series:
+            self._series[chave] = {"dados": np.zeros((self.capacidade, len(COLUNAS))), "n": 0}
+        return self._series[chave]
+
+    def atualizar(self, symbol, intervalo):
+        """Reagrega a cauda da série base. Retorna o índice do primeiro candle alterado ou None."""
+        if intervalo == self.base:
+            return None
+        base = self.cache.janela(symbol, self.base)
+        if len(base) == 0:
+            return None
+        duracao = DURACOES[intervalo]
+        serie = self._serie(symbol, intervalo)
+        n = serie["n"]
+        inicio = max(n - 1, 0)
+        desde = serie["dados"][inicio, OPEN_TIME] if n else 0
+        trecho = base[np.searchsorted(base[:, OPEN_TIME], desde):]
+        if len(trecho) == 0:
+            return None
+
+        baldes = trecho[:, OPEN_TIME] // duracao * duracao
+        primeiros = np.flatnonzero(np.r_[True, baldes[1:] != baldes[:-1]])
+        ultimos = np.r_[primeiros[1:], len(trecho)] - 1
+        barras = np.empty((len(primeiros), len(COLUNAS)))
+        barras[:, OPEN_TIME] = baldes[primeiros]
+        barras[:, OPEN] = trecho[primeiros, OPEN]
+        barras[:, HIGH] = np.maximum.reduceat(trecho[:, HIGH], primeiros)
+        barras[:, LOW] = np.minimum.reduceat(trecho[:, LOW], primeiros)
+        barras[:, CLOSE] = trecho[ultimos, CLOSE]
+        barras[:, VOLUME] = np.add.reduceat(trecho[:, VOLUME], primeiros)
+        barras[:, CLOSE_TIME] = baldes[primeiros] + duracao - 1
+
+        if n and len(barras) == 1 and np.array_equal(serie["dados"][n - 1], barras[0]):
+            return None
+        if inicio + len(barras) > len(serie["dados"]):
+            capacidade = len(serie["dados"])
+            while capacidade < inicio + len(barras):
+                capacidade *= 2
+            novos = np.zeros((capacidade, len(COLUNAS)))
+            novos[:n] = serie["dados"][:n]
+            serie["dados"] = novos
+        serie["dados"][inicio:inicio + len(barras)] = barras
+        serie["n"] = inicio + len(barras)
+        return inicio
+
+    def janela(self, symbol, intervalo, n=None):
+        if intervalo == self.base:
+            return self.cache.janela(symbol, intervalo, n)
+        serie = self._serie(symbol, intervalo)
+        total = serie["n"]
+        inicio = 0 if n is None else max(0, total - n)
+        return serie["dados"][inicio:total]
+
+    def tamanho(self, symbol, intervalo):
+        return len(self.janela(symbol, intervalo))
+
+    def fechou(self, intervalo, kline):
+        """True se a kline base fechada também fecha um candle do intervalo pedido."""
+        return (int(kline[CLOSE_TIME]) + 1) % DURACOES[intervalo] == 0
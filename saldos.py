@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+from collections import Counter
+from metricas import metricas
+
+# Saldos da conta mantidos em memória: um get_account na partida, deltas das nossas ordens
+# (pelos fills da resposta) e dos eventos do user data stream, e um snapshot completo a cada
+# `reconciliar_a_cada` segundos para corrigir o que escapou (ordens manuais, depósitos sem stream).
+
+
+class Saldos:
+    """Visão local de todos os saldos da conta, de qualquer ativo.
+
+    saldos["XYZ"] é uma consulta a um dict. Cada ativo guarda o momento (ms) da última
+    informação completa dele (snapshot ou outboundAccountPosition); um fill ou balanceUpdate
+    anterior a isso já está contido no valor e é ignorado, então a ordem de chegada entre
+    a resposta REST e o stream não importa.
+    """
+
+    def __init__(self, cliente, registro_filtros, reconciliar_a_cada=6 * 60 * 60):
+        self.cliente = cliente
+        self.registro_filtros = registro_filtros
+        self.reconciliar_a_cada = reconciliar_a_cada
+        self.livres = {}
+        self.travados = {}
+        self.carregado_em = 0
+        self._versoes = {}
+        self._trava = threading.Lock()
+
+    def carregar(self):
+        """Snapshot completo (get_account); devolve False se a consulta falhou."""
+        try:
+            with metricas.medir("saldo"):
+                conta = self.cliente.get_account()
+        except Exception as e:
+            logging.warning(f"Erro ao consultar saldo: {e}")
+            return False
+        livres = {b["asset"]: float(b["free"]) for b in conta["balances"]}
+        travados = {b["asset"]: float(b["locked"]) for b in conta["balances"]}
+        momento = conta.get("updateTime", 0)
+        with self._trava:
+            if self.carregado_em:
+                # Diferenças na 8ª casa são arredondamento dos valores em texto, não divergência
+                divergentes = sorted(a for a in set(livres) | set(self.livres)
+                                     if abs(livres.get(a, 0.0) - self.livres.get(a, 0.0)) > 1e-7)
+                if divergentes:
+                    logging.info(f"Reconciliação de saldos corrigiu: {', '.join(divergentes)}")
+            self.livres = livres
+            self.travados = travados
+            self._versoes = dict.fromkeys(livres, momento)
+            self.carregado_em = time.time()
+        return True
+
+    def atualizar(self, forcar=False):
+        """Recarrega da Binance só na primeira vez, quando vence o prazo de reconciliação ou se forçado."""
+        if forcar or not self.carregado_em or time.time() - self.carregado_em >= self.reconciliar_a_cada:
+            return self.carregar()
+        return False
+
+    def _aplicar(self, deltas, momento):
+        with self._trava:
+            for ativo, delta in deltas.items():
+                if momento and momento <= self._versoes.get(ativo, 0):
+                    continue
+                self.livres[ativo] = self.livres.get(ativo, 0.0) + delta
+
+    def aplicar_ordem(self, ordem):
+        """Desconta uma ordem executada pela resposta do create_order (executedQty, cummulativeQuoteQty, fills)."""
+        filtros = self.registro_filtros.filtros(ordem["symbol"])
+        if not filtros:
+            self.carregar()
+            return
+        sinal = 1 if ordem["side"] == "BUY" else -1
+        deltas = Counter()
+        deltas[filtros["base"]] += sinal * float(ordem.get("executedQty", 0))
+        deltas[filtros["quote"]] -= sinal * float(ordem.get("cummulativeQuoteQty", 0))
+        for fill in ordem.get("fills", []):
+            deltas[fill["commissionAsset"]] -= float(fill["commission"])
+        self._aplicar(deltas, ordem.get("transactTime", 0))
+
+    def reservar(self, ativo, quantidade, momento=0):
+        """Passa `quantidade` do livre para o travado ao colocar uma ordem aberta; negativa devolve ao cancelar."""
+        with self._trava:
+            if momento and momento <= self._versoes.get(ativo, 0):
+                return
+            self.livres[ativo] = self.livres.get(ativo, 0.0) - quantidade
+            self.travados[ativo] = self.travados.get(ativo, 0.0) + quantidade
+
+    def ao_evento(self, dados):
+        """Eventos do user data stream: outboundAccountPosition (saldos absolutos) e balanceUpdate (delta)."""
+        tipo = dados.get("e")
+        if tipo == "outboundAccountPosition":
+            momento = dados["u"]
+            with self._trava:
+                for saldo in dados["B"]:
+                    ativo = saldo["a"]
+                    if momento >= self._versoes.get(ativo, 0):
+                        self.livres[ativo] = float(saldo["f"])
+                        self.travados[ativo] = float(saldo["l"])
+                        self._versoes[ativo] = momento
+        elif tipo == "balanceUpdate":
+            self._aplicar({dados["a"]: float(dados["d"])}, dados["T"])
+
+    def livre(self, ativo):
+        return self.livres.get(ativo, 0.0)
+
+    def __getitem__(self, ativo):
+        return self.livre(ativo)
+
+    def resumo(self, ativos=(), incluir_travados=False):
+        """Saldo livre (ou livre + travado) dos `ativos`, mesmo zerados, e de qualquer outro ativo com saldo."""
+        with self._trava:
+            saldos = dict(self.livres)
+            if incluir_travados:
+                for ativo, travado in self.travados.items():
+                    saldos[ativo] = saldos.get(ativo, 0.0) + travado
+        saldo = {ativo: saldos.get(ativo, 0.0) for ativo in ativos}
+        saldo.update({ativo: valor for ativo, valor in saldos.items() if valor > 0 and ativo not in saldo})
+        return saldo
@@ -0,0 +1,127 @@
+import argparse
+import asyncio
+import logging
+import time
+import numpy as np
+import pandas as pd
+from cache_candles import CLOSE, VOLUME
+from ciclo_async import executar_por_moeda
+
+
+def cruzamentos(closes, janela_curta=7, janela_longa=40):
+    """Cruzamento das médias para uma matriz (símbolos × candles) de uma vez.
+
+    Só as duas últimas médias de cada linha importam, então bastam as últimas
+    janela_longa + 1 colunas. Devolve (curta, longa, cruzou_para_cima, cruzou_para_baixo),
+    cada um com um valor por símbolo.
+    """
+    closes = np.asarray(closes, dtype=np.float64)[:, -(janela_longa + 1):]
+    soma = np.zeros((closes.shape[0], closes.shape[1] + 1))
+    np.cumsum(closes, axis=1, out=soma[:, 1:])
+    fim = closes.shape[1]
+
+    def media(janela, atras):
+        return (soma[:, fim - atras] - soma[:, fim - atras - janela]) / janela
+
+    curta, curta_anterior = media(janela_curta, 0), media(janela_curta, 1)
+    longa, longa_anterior = media(janela_longa, 0), media(janela_longa, 1)
+    cima = (curta_anterior <= longa_anterior) & (curta > longa)
+    baixo = (curta_anterior >= longa_anterior) & (curta < longa)
+    return curta, longa, cima, baixo
+
+
+class Scanner:
+    """Varre todos os pares USDT em negociação e ranqueia os que cruzaram as médias para cima.
+
+    Os candles de cada par vêm do CacheCandles (uma requisição curta por par por ciclo
+    depois da primeira carga); a avaliação é uma única conta vetorizada sobre a matriz
+    símbolos × candles. Os candidatos vêm ordenados pela liquidez (volume × preço) das
+    últimas 24 barras.
+    """
+
+    def __init__(self, cache, registro_filtros, intervalo="1h", janela_curta=7, janela_longa=40,
+                 quote="USDT", excluir=("USDCUSDT", "FDUSDUSDT", "TUSDUSDT", "USDPUSDT")):
+        self.cache = cache
+        self.registro_filtros = registro_filtros
+        self.intervalo = intervalo
+        self.janela_curta = janela_curta
+        self.janela_longa = janela_longa
+        self.quote = quote
+        self.excluir = set(excluir)
+
+    def universo(self):
+        return sorted(s for s in self.registro_filtros.listar(self.quote) if s not in self.excluir)
+
+    def atualizar(self, simbolos):
+        """Atualiza o cache dos `simbolos` em paralelo; devolve os que foram atualizados."""
+        atualizados = asyncio.run(executar_por_moeda(simbolos, lambda s: self.cache.atualizar(s, self.intervalo)))
+        return [symbol for symbol in simbolos if symbol in atualizados]
+
+    def avaliar(self, simbolos):
+        """Ranking a partir do que já está em cache, sem rede."""
+        barras = self.janela_longa + 1
+        linhas, validos = [], []
+        for symbol in simbolos:
+            janela = self.cache.janela(symbol, self.intervalo, max(barras, 24))
+            if len(janela) >= barras:
+                linhas.append(janela)
+                validos.append(symbol)
+        if not linhas:
+            return pd.DataFrame(columns=["symbol", "close", "media_curta", "media_longa", "distancia",
+                                         "liquidez", "cruzou_para_cima", "cruzou_para_baixo"])
+        tamanho = min(len(linha) for linha in linhas)
+        matriz = np.stack([linha[-tamanho:] for linha in linhas])  # símbolos × candles × colunas
+        curta, longa, cima, baixo = cruzamentos(matriz[:, :, CLOSE], self.janela_curta, self.janela_longa)
+        liquidez = (matriz[:, -24:, CLOSE] * matriz[:, -24:, VOLUME]).sum(axis=1)
+        tabela = pd.DataFrame({
+            "symbol": validos,
+            "close": matriz[:, -1, CLOSE],
+            "media_curta": curta,
+            "media_longa": longa,
+            "distancia": curta / longa - 1,
+            "liquidez": liquidez,
+            "cruzou_para_cima": cima,
+            "cruzou_para_baixo": baixo,
+        })
+        return tabela.sort_values(["cruzou_para_cima", "liquidez"], ascending=False, ignore_index=True)
+
+    def escanear(self, simbolos=None):
+        simbolos = simbolos or self.universo()
+        inicio = time.perf_counter()
+        # Quem falhou fica fora do ranking: candles antigos repetiriam o cruzamento de ciclos anteriores
+        simbolos = self.atualizar(simbolos)
+        meio = time.perf_counter()
+        tabela = self.avaliar(simbolos)
+        logging.info(f"Scanner: {len(tabela)} pares, {int(tabela['cruzou_para_cima'].sum())} cruzamentos para cima "
+                     f"(dados {meio - inicio:.1f}s, avaliação {(time.perf_counter() - meio) * 1000:.1f}ms)")
+        return tabela
+
+    def candidatos(self, n=5, liquidez_minima=0.0, simbolos=None):
+        tabela = self.escanear(simbolos)
+        tabela = tabela[tabela["cruzou_para_cima"] & (tabela["liquidez"] >= liquidez_minima)]
+        return tabela.head(n)
+
+
+def main():
+    from binance.client import Client
+    from cache_candles import CacheCandles
+    from filtros_simbolos import RegistroFiltros
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Ranqueia os pares USDT pelo cruzamento das médias")
+    parser.add_argument("--intervalo", default="1h")
+    parser.add_argument("--curta", type=int, default=7)
+    parser.add_argument("--longa", type=int, default=40)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    cliente = Client()
+    registro = RegistroFiltros(cliente)
+    registro.atualizar()
+    scanner = Scanner(CacheCandles(cliente), registro, args.intervalo, args.curta, args.longa)
+    tabela = scanner.escanear()
+    print(tabela.head(args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+import argparse
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import numpy as np
+import requests
+from backtest import carregar_klines
+from cache_candles import OPEN_TIME, HIGH, LOW, CLOSE, CLOSE_TIME
+from reamostragem import DURACOES
+
+# Paper trading: um substituto local da Binance com o subconjunto do Client que os bots usam,
+# preenchendo ordens a mercado no fechamento do último candle gravado, com taxa e filtros de lote.
+# Com o Relogio instalado, time.time()/time.sleep() da thread principal passam a andar no tempo
+# simulado: uma hora de espera do motor vira 3,6 s com velocidade=1000, ou nada sem velocidade.
+
+_time_real = time.time
+_sleep_real = time.sleep
+
+
+def _numero(valor):
+    # A Binance devolve preços e quantidades como texto decimal
+    return f"{float(valor):.8f}"
+
+
+class ErroSimulado(Exception):
+    """Ordem rejeitada pelo simulador, com o mesmo `code` que a Binance devolveria."""
+
+    def __init__(self, code, mensagem):
+        super().__init__(f"APIError(code={code}): {mensagem}")
+        self.code = code
+        self.message = mensagem
+
+
+class Relogio:
+    def __init__(self, inicio, velocidade=None):
+        self.agora = float(inicio)
+        self.velocidade = velocidade
+
+    def time(self):
+        return self.agora
+
+    def sleep(self, segundos):
+        # Threads auxiliares (ordens, gráficos) esperam de verdade; só o loop principal avança o relógio
+        if threading.current_thread() is not threading.main_thread():
+            _sleep_real(segundos)
+            return
+        self.agora += segundos
+        if self.velocidade:
+            _sleep_real(segundos / self.velocidade)
+
+    def instalar(self):
+        time.time = self.time
+        time.sleep = self.sleep
+
+    def desinstalar(self):
+        time.time = _time_real
+        time.sleep = _sleep_real
+
+
+class ClienteSimulado:
+    """Subconjunto do binance.Client sobre klines gravadas (n, 7) por símbolo.
+
+    Só os candles já fechados no instante simulado são visíveis, então não há olhar para
+    o futuro. filtros: symbol -> (min_qty, step, min_notional). Ordens de venda STOP_LOSS_LIMIT
+    e OCO ficam abertas, com a quantidade travada, até um candle posterior tocar o nível:
+    o stop executa no preço limite e o alvo no próprio preço (stop primeiro se ambos no candle).
+    """
+
+    def __init__(self, klines_por_simbolo, saldos=None, taxa=0.001, filtros=None, relogio=None):
+        self.klines = {symbol: np.asarray(k, dtype=np.float64) for symbol, k in klines_por_simbolo.items()}
+        self.saldos = {"USDT": 1000.0, **(saldos or {})}
+        self.taxa = taxa
+        self.filtros = filtros or {}
+        self.relogio = relogio
+        self.ordens = {}
+        self.abertas = {}  # orderListId (ou -orderId da ordem avulsa) -> pernas
+        self.travados = {}
+        self._ids = itertools.count(1)
+        self._trava = threading.Lock()
+        # O gateway de ordens monta o pool de conexões e o hook de cabeçalhos aqui
+        self.session = requests.Session()
+
+    def _agora_ms(self):
+        return (self.relogio.time() if self.relogio else time.time()) * 1000
+
+    def _fechados(self, symbol):
+        klines = self.klines[symbol]
+        return klines[:np.searchsorted(klines[:, CLOSE_TIME], self._agora_ms())]
+
+    def _preco(self, symbol):
+        fechados = self._fechados(symbol)
+        if len(fechados) == 0:
+            raise ErroSimulado(-1121, f"Sem dados para {symbol} neste instante")
+        return float(fechados[-1, CLOSE])
+
+    def get_klines(self, symbol, interval, startTime=None, endTime=None, limit=500):
+        fechados = self._fechados(symbol)
+        if len(fechados) > 1:
+            duracao = fechados[1, OPEN_TIME] - fechados[0, OPEN_TIME]
+            if DURACOES.get(interval) != duracao:
+                raise ErroSimulado(-1120, f"Intervalo {interval} diferente do gravado para {symbol}")
+        if startTime is not None:
+            fechados = fechados[np.searchsorted(fechados[:, OPEN_TIME], startTime):]
+        if endTime is not None:
+            fechados = fechados[:np.searchsorted(fechados[:, OPEN_TIME], endTime, side="right")]
+        fechados = fechados[:limit] if startTime is not None else fechados[-limit:]
+        return [[int(k[0]), _numero(k[1]), _numero(k[2]), _numero(k[3]), _numero(k[4]), _numero(k[5]), int(k[6]),
+                 "0", 0, "0", "0", "0"] for k in fechados]
+
+    def get_symbol_ticker(self, symbol=None, symbols=None):
+        if symbol:
+            return {"symbol": symbol, "price": _numero(self._preco(symbol))}
+        simbolos = json.loads(symbols)
+        if any(s not in self.klines for s in simbolos):
+            raise ErroSimulado(-1121, "Invalid symbol.")
+        return [{"symbol": s, "price": _numero(self._preco(s))} for s in simbolos]
+
+    def get_all_tickers(self):
+        return [{"symbol": s, "price": _numero(self._preco(s))} for s in self.klines if len(self._fechados(s))]
+
+    def get_account(self):
+        with self._trava:
+            self._processar_abertas()
+            return {"balances": [{"asset": a, "free": _numero(v), "locked": _numero(self.travados.get(a, 0.0))}
+                                 for a, v in self.saldos.items()]}
+
+    def get_asset_balance(self, asset):
+        with self._trava:
+            self._processar_abertas()
+            return {"asset": asset, "free": _numero(self.saldos.get(asset, 0.0)),
+                    "locked": _numero(self.travados.get(asset, 0.0))}
+
+    def get_symbol_info(self, symbol):
+        min_qty, step, min_notional = self.filtros.get(symbol, (0.00001, 0.00001, 5.0))
+        return {
+            "symbol": symbol, "status": "TRADING", "baseAsset": symbol[:-4], "quoteAsset": "USDT",
+            "ocoAllowed": True,
+            "filters": [
+                {"filterType": "LOT_SIZE", "minQty": _numero(min_qty), "maxQty": "9000000", "stepSize": _numero(step)},
+                {"filterType": "NOTIONAL", "minNotional": _numero(min_notional)},
+                {"filterType": "PRICE_FILTER", "tickSize": "0.01", "minPrice": "0.01", "maxPrice": "1000000"},
+            ],
+        }
+
+    def get_exchange_info(self):
+        return {"symbols": [self.get_symbol_info(symbol) for symbol in self.klines]}
+
+    def create_order(self, symbol, side, type, quantity, newClientOrderId=None, price=None, stopPrice=None, **_):
+        if type == "STOP_LOSS_LIMIT" and side == "SELL":
+            with self._trava:
+                perna = self._abrir(symbol, quantity, [(type, newClientOrderId, price, stopPrice)], -1)[0]
+            return {**perna, "transactTime": perna["time"]}
+        if type != "MARKET":
+            raise ErroSimulado(-1116, f"Tipo de ordem {type} não suportado pelo simulador")
+        preco = self._preco(symbol)
+        quantidade = float(quantity)
+        min_qty, step, min_notional = self.filtros.get(symbol, (0.00001, 0.00001, 5.0))
+        if quantidade < min_qty or abs(round(quantidade / step) * step - quantidade) > 1e-9:
+            raise ErroSimulado(-1013, "Filter failure: LOT_SIZE")
+        if quantidade * preco < min_notional:
+            raise ErroSimulado(-1013, "Filter failure: NOTIONAL")
+        base, quote = symbol[:-4], "USDT"
+        valor = quantidade * preco
+        with self._trava:
+            if side == "BUY":
+                if self.saldos.get(quote, 0.0) < valor:
+                    raise ErroSimulado(-2010, "Account has insufficient balance for requested action.")
+                self.saldos[quote] -= valor
+                comissao, ativo_comissao = quantidade * self.taxa, base
+                self.saldos[base] = self.saldos.get(base, 0.0) + quantidade - comissao
+            else:
+                if self.saldos.get(base, 0.0) < quantidade - 1e-12:
+                    raise ErroSimulado(-2010, "Account has insufficient balance for requested action.")
+                self.saldos[base] -= quantidade
+                comissao, ativo_comissao = valor * self.taxa, quote
+                self.saldos[quote] = self.saldos.get(quote, 0.0) + valor - comissao
+            ordem = {
+                "symbol": symbol, "orderId": next(self._ids), "clientOrderId": newClientOrderId or "",
+                "transactTime": int(self._agora_ms()), "status": "FILLED", "type": type, "side": side,
+                "origQty": quantity, "executedQty": quantity, "cummulativeQuoteQty": _numero(valor),
+                "fills": [{"price": _numero(preco), "qty": quantity, "commission": _numero(comissao), "commissionAsset": ativo_comissao}],
+            }
+            self.ordens[ordem["clientOrderId"]] = ordem
+        return ordem
+
+    def create_oco_order(self, symbol, side, quantity, aboveType, belowType, abovePrice=None, aboveClientOrderId=None,
+                         belowPrice=None, belowStopPrice=None, belowClientOrderId=None, listClientOrderId=None, **_):
+        # Formato do POST /api/v3/orderList/oco; só a venda LIMIT_MAKER acima + STOP_LOSS_LIMIT abaixo
+        if side != "SELL" or aboveType != "LIMIT_MAKER" or belowType != "STOP_LOSS_LIMIT":
+            raise ErroSimulado(-1116, "O simulador só aceita OCO de venda LIMIT_MAKER + STOP_LOSS_LIMIT")
+        with self._trava:
+            lista = next(self._ids)
+            pernas = self._abrir(symbol, quantity, [("STOP_LOSS_LIMIT", belowClientOrderId, belowPrice, belowStopPrice),
+                                                    ("LIMIT_MAKER", aboveClientOrderId, abovePrice, None)], lista)
+        return {"orderListId": lista, "listClientOrderId": listClientOrderId or "", "symbol": symbol,
+                "transactionTime": pernas[0]["time"], "orderReports": pernas}
+
+    def _abrir(self, symbol, quantity, pernas, lista):
+        # Chamado com a trava: confere preço e saldo, trava a quantidade e registra as pernas abertas
+        preco = self._preco(symbol)
+        quantidade = float(quantity)
+        base = symbol[:-4]
+        for type, _, price, stopPrice in pernas:
+            if (type == "STOP_LOSS_LIMIT" and float(stopPrice) >= preco) or (type == "LIMIT_MAKER" and float(price) <= preco):
+                raise ErroSimulado(-2010, "Order would immediately trigger.")
+        if self.saldos.get(base, 0.0) < quantidade - 1e-12:
+            raise ErroSimulado(-2010, "Account has insufficient balance for requested action.")
+        self.saldos[base] -= quantidade
+        self.travados[base] = self.travados.get(base, 0.0) + quantidade
+        abertas = []
+        for type, id_cliente, price, stopPrice in pernas:
+            id_ordem = next(self._ids)
+            ordem = {
+                "symbol": symbol, "orderId": id_ordem, "orderListId": lista,
+                "clientOrderId": id_cliente or f"sim-{id_ordem}", "time": int(self._agora_ms()),
+                "status": "NEW", "type": type, "side": "SELL", "price": _numero(price),
+                "stopPrice": _numero(stopPrice or 0), "origQty": quantity, "executedQty": "0",
+            }
+            self.ordens[ordem["clientOrderId"]] = ordem
+            abertas.append(ordem)
+        self.abertas[lista if lista != -1 else -abertas[0]["orderId"]] = abertas
+        return abertas
+
+    def _processar_abertas(self):
+        # Chamado com a trava: executa as pernas que algum candle fechado depois da abertura tocou
+        for chave, pernas in list(self.abertas.items()):
+            symbol = pernas[0]["symbol"]
+            klines = self._fechados(symbol)
+            klines = klines[np.searchsorted(klines[:, OPEN_TIME], pernas[0]["time"], side="right"):]
+            if len(klines) == 0:
+                continue
+            toques = []
+            for perna in pernas:
+                if perna["type"] == "STOP_LOSS_LIMIT":
+                    tocou = klines[:, LOW] <= float(perna["stopPrice"])
+                else:
+                    tocou = klines[:, HIGH] >= float(perna["price"])
+                if tocou.any():
+                    toques.append((int(tocou.argmax()), perna["type"] != "STOP_LOSS_LIMIT", perna))
+            if not toques:
+                continue
+            _, _, executada = min(toques, key=lambda toque: toque[:2])
+            del self.abertas[chave]
+            base = symbol[:-4]
+            quantidade, preco = float(executada["origQty"]), float(executada["price"])
+            self.travados[base] -= quantidade
+            self.saldos["USDT"] = self.saldos.get("USDT", 0.0) + quantidade * preco * (1 - self.taxa)
+            for perna in pernas:
+                perna["status"] = "FILLED" if perna is executada else "EXPIRED"
+            executada.update(executedQty=executada["origQty"], cummulativeQuoteQty=_numero(quantidade * preco))
+
+    def get_open_orders(self, symbol=None):
+        with self._trava:
+            self._processar_abertas()
+            return [dict(perna) for pernas in self.abertas.values() for perna in pernas
+                    if symbol is None or perna["symbol"] == symbol]
+
+    def cancel_order(self, symbol, orderId=None, origClientOrderId=None):
+        with self._trava:
+            self._processar_abertas()
+            for chave, pernas in self.abertas.items():
+                if any(perna["orderId"] == orderId or perna["clientOrderId"] == origClientOrderId for perna in pernas):
+                    # Como na Binance, cancelar uma perna cancela a lista inteira
+                    del self.abertas[chave]
+                    self.travados[symbol[:-4]] -= float(pernas[0]["origQty"])
+                    self.saldos[symbol[:-4]] += float(pernas[0]["origQty"])
+                    for perna in pernas:
+                        perna["status"] = "CANCELED"
+                    return {**pernas[0], "transactTime": int(self._agora_ms())}
+        raise ErroSimulado(-2011, "Unknown order sent.")
+
+    def get_order(self, symbol, origClientOrderId=None, orderId=None):
+        with self._trava:
+            self._processar_abertas()
+            for ordem in self.ordens.values():
+                if ordem["clientOrderId"] == origClientOrderId or ordem["orderId"] == orderId:
+                    return ordem
+        raise ErroSimulado(-2013, "Order does not exist.")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Roda o motor com estratégias contra uma Binance simulada")
+    parser.add_argument("--simbolo", action="append", required=True, metavar="SIMBOLO=ARQUIVOS",
+                        help="klines de 1m por símbolo (csv/.bin/.npy, pasta ou glob), ex.: BTCUSDT=dados/BTC*.csv")
+    parser.add_argument("--estrategia", action="append", default=None, metavar="NOME[:JSON]",
+                        help='ex.: balanceada:{"moedas": ["BTCUSDT"]} (padrão: cruzamento nos símbolos dados)')
+    parser.add_argument("--saldo", type=float, default=1000.0)
+    parser.add_argument("--taxa", type=float, default=0.001)
+    parser.add_argument("--velocidade", type=float, default=None, help="ex.: 1000 (padrão: o mais rápido possível)")
+    parser.add_argument("--intervalo", type=int, default=60 * 60, help="segundos simulados entre verificações")
+    parser.add_argument("--dias-aquecimento", type=float, default=8, help="dias de dados antes do primeiro ciclo")
+    parser.add_argument("--pasta", default="simulacao", help="onde o motor grava cache, estado e gráficos")
+    parser.add_argument("--graficos", action="store_true", help="gera os PNGs a cada ciclo (mais lento)")
+    parser.add_argument("--oco", action="store_true", help="stop e alvo em ordens OCO no simulador em vez do polling")
+    args = parser.parse_args()
+
+    from motor import Motor
+    import estrategias  # registra os plugins de estratégia
+
+    klines = {}
+    for item in args.simbolo:
+        symbol, caminhos = item.split("=", 1)
+        klines[symbol] = carregar_klines(*[os.path.abspath(c) for c in caminhos.split(",")])
+    config = []
+    for item in args.estrategia or ["cruzamento:" + json.dumps({"moedas": list(klines)})]:
+        nome, _, parametros = item.partition(":")
+        config.append((nome, json.loads(parametros) if parametros else {}))
+
+    inicio = max(k[0, OPEN_TIME] for k in klines.values()) / 1000 + args.dias_aquecimento * 24 * 60 * 60
+    fim = min(k[-1, CLOSE_TIME] for k in klines.values()) / 1000
+    ciclos = int((fim - inicio) // args.intervalo)
+    if ciclos <= 0:
+        parser.error("dados insuficientes para o aquecimento pedido")
+
+    os.makedirs(args.pasta, exist_ok=True)
+    os.chdir(args.pasta)  # o motor grava cache, estado e patrimônio no diretório atual
+    relogio = Relogio(inicio, args.velocidade)
+    cliente = ClienteSimulado(klines, {"USDT": args.saldo}, args.taxa, relogio=relogio)
+    ativos = sorted({"USDT"} | {symbol[:-4] for symbol in klines})
+    relogio.instalar()
+    try:
+        motor = Motor(config, intervalo_verificacao=args.intervalo, streaming=False, cliente=cliente, ativos=ativos,
+                      dias_historico_base=args.dias_aquecimento, pasta_graficos="." if args.graficos else None,
+                      ordens_oco=args.oco)
+        comeco = _time_real()
+        motor.executar(ciclos)
+        duracao = _time_real() - comeco
+        total = motor.patrimonio()[0]
+    finally:
+        relogio.desinstalar()
+
+    logging.info(f"{ciclos} ciclos ({ciclos * args.intervalo / 86400:.1f} dias simulados) em {duracao:.1f}s "
+                 f"({ciclos * args.intervalo / max(duracao, 1e-9):.0f}x o tempo real)")
+    logging.info(f"Ordens: {len(cliente.ordens)} | Patrimônio: {args.saldo:.2f} -> {total:.2f} USDT "
+                 f"({(total / args.saldo - 1) * 100:+.2f}%)")
+
+
+if __name__ == "__main__":
+    main()
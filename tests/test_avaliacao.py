@@ -0,0 +1,50 @@
+import pytest
+from avaliacao import Avaliador
+
+
+class RegistroFixo:
+    def __init__(self, pares):
+        self.pares = pares
+        self.atualizado_em = 1
+
+    def todos(self):
+        return {base + quote: {"base": base, "quote": quote, "status": status} for base, quote, status in self.pares}
+
+
+@pytest.fixture
+def registro():
+    return RegistroFixo([("BTC", "USDT", "TRADING"), ("ETH", "BTC", "TRADING"), ("XYZ", "ETH", "TRADING"),
+                         ("ABC", "BTC", "TRADING"), ("USDT", "BRL", "TRADING"), ("OLD", "USDT", "BREAK")])
+
+
+def test_rotas_diretas_invertidas_e_por_ponte(registro):
+    avaliador = Avaliador(registro)
+    assert avaliador.pares(["USDT", "BTC", "ABC", "BRL"]) == ["ABCBTC", "BTCUSDT", "USDTBRL"]
+    assert avaliador.rota("USDT") == []
+    assert avaliador.rota("BTC") == [("BTCUSDT", False)]
+    assert avaliador.rota("BRL") == [("USDTBRL", True)]
+    # ETH não tem par com USDT: passa pela ponte BTC
+    assert avaliador.rota("ETH") == [("ETHBTC", False), ("BTCUSDT", False)]
+    # XYZ precisaria de duas pontes; par fora de negociação não conta
+    assert avaliador.rota("XYZ") is None
+    assert avaliador.rota("OLD") is None
+
+
+def test_avaliacao_pelas_pernas_de_um_snapshot(registro):
+    avaliador = Avaliador(registro)
+    precos = {"BTCUSDT": 50_000.0, "ETHBTC": 0.05, "USDTBRL": 5.0}
+    saldo = {"USDT": 100.0, "BTC": 0.01, "ETH": 2.0, "BRL": 50.0, "XYZ": 7.0, "ABC": 0.0}
+    total, composicao = avaliador.avaliar(saldo, precos)
+    assert composicao == pytest.approx({"USDT": 100.0, "BTC": 500.0, "ETH": 5000.0, "BRL": 10.0, "XYZ": 0.0})
+    assert total == pytest.approx(5610.0)
+    # Sem preço para uma perna o ativo vale 0, sem derrubar os outros
+    total, composicao = avaliador.avaliar({"ETH": 2.0, "USDT": 1.0}, {"ETHBTC": 0.05})
+    assert total == 1.0 and composicao["ETH"] == 0.0
+
+
+def test_rotas_refeitas_quando_a_tabela_muda(registro):
+    avaliador = Avaliador(registro)
+    assert avaliador.pares(["XYZ"]) == []
+    registro.pares.append(("XYZ", "USDT", "TRADING"))
+    registro.atualizado_em = 2
+    assert avaliador.pares(["XYZ"]) == ["XYZUSDT"]
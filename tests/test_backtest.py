@@ -0,0 +1,11 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtest import maximo_rolante
+
+
+@pytest.mark.parametrize("janela", [1, 2, 3, 7, 64, 100, 168, 1000])
+def test_maximo_rolante_igual_ao_rolling_do_pandas(janela):
+    valores = np.random.default_rng(janela).normal(0, 1, 700).cumsum()
+    esperado = pd.Series(valores).rolling(janela, min_periods=1).max().to_numpy()
+    np.testing.assert_array_equal(maximo_rolante(valores, janela), esperado)
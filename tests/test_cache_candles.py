@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+import cache_candles
+from cache_candles import CacheCandles, COLUNAS, OPEN_TIME, CLOSE, CLOSE_TIME, LIMITE_KLINES
+from simulador import ClienteSimulado, ErroSimulado, Relogio
+
+MINUTO = 60_000
+
+
+class ClienteContado(ClienteSimulado):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pedidos = []
+        self.falhar = False
+
+    def get_klines(self, symbol, interval, startTime=None, endTime=None, limit=500):
+        self.pedidos.append(startTime)
+        if self.falhar:
+            raise ErroSimulado(-1003, "Too many requests")
+        return super().get_klines(symbol, interval, startTime, endTime, limit)
+
+
+@pytest.fixture
+def cliente():
+    n = 3000
+    dados = np.zeros((n, len(COLUNAS)))
+    dados[:, OPEN_TIME] = np.arange(n) * MINUTO
+    dados[:, CLOSE] = np.arange(n)
+    dados[:, CLOSE_TIME] = dados[:, OPEN_TIME] + MINUTO - 1
+    return ClienteContado({"BTCUSDT": dados}, relogio=Relogio(2500 * 60))
+
+
+def test_atualizacao_incremental_e_persistente(tmp_path, cliente):
+    cache = CacheCandles(cliente, str(tmp_path))
+    # Cache vazio com `desde`: pagina em lotes de LIMITE_KLINES até o fim
+    assert cache.atualizar("BTCUSDT", "1m", desde=0) == 0
+    assert cache.tamanho("BTCUSDT", "1m") == 2500
+    assert len(cliente.pedidos) == 3 and LIMITE_KLINES == 1000
+    cliente.relogio.agora += 5 * 60
+    # Depois, só a partir do último candle guardado (que podia estar em aberto)
+    assert cache.atualizar("BTCUSDT", "1m") == 2499
+    assert cliente.pedidos[-1] == 2499 * MINUTO
+    np.testing.assert_array_equal(cache.janela("BTCUSDT", "1m", 3)[:, CLOSE], [2502, 2503, 2504])
+    # Outro processo lê o mesmo arquivo
+    reaberto = CacheCandles(cliente, str(tmp_path))
+    np.testing.assert_array_equal(reaberto.janela("BTCUSDT", "1m"), cache.janela("BTCUSDT", "1m"))
+
+
+def test_falha_na_binance_sobe_sem_mexer_no_cache(tmp_path, cliente):
+    cache = CacheCandles(cliente, str(tmp_path))
+    cache.atualizar("BTCUSDT", "1m", desde=0)
+    antes = cache.janela("BTCUSDT", "1m").copy()
+    cliente.falhar = True
+    cliente.relogio.agora += 5 * 60
+    with pytest.raises(ErroSimulado):
+        cache.atualizar("BTCUSDT", "1m")
+    np.testing.assert_array_equal(cache.janela("BTCUSDT", "1m"), antes)
+
+
+def test_anexar_substitui_o_candle_em_aberto(tmp_path, cliente):
+    cache = CacheCandles(cliente, str(tmp_path))
+    cache.atualizar("BTCUSDT", "1m", desde=0)
+    ultimo = cache.janela("BTCUSDT", "1m", 1)[0].copy()
+    ultimo[CLOSE] = -1
+    assert cache.anexar("BTCUSDT", "1m", ultimo) == 2499
+    novo = ultimo.copy()
+    novo[OPEN_TIME] += MINUTO
+    assert cache.anexar("BTCUSDT", "1m", novo) == 2500
+    assert cache.anexar("BTCUSDT", "1m", ultimo) is None  # mais antigo que o último: ignorado
+    assert CacheCandles(cliente, str(tmp_path)).janela("BTCUSDT", "1m", 2)[0, CLOSE] == -1
+
+
+def test_lacuna_busca_as_klines_perdidas(tmp_path, cliente, monkeypatch):
+    cache = CacheCandles(cliente, str(tmp_path))
+    cache.atualizar("BTCUSDT", "1m", desde=0)
+    cliente.relogio.agora += 500 * 60
+    proxima = cache.janela("BTCUSDT", "1m", 1)[0].copy()
+    proxima[OPEN_TIME] += MINUTO
+    assert cache.lacuna("BTCUSDT", "1m", proxima) == []
+    # O stream pulou 400 klines: vêm em lotes, só as que faltam, na ordem
+    monkeypatch.setattr(cache_candles, "LIMITE_KLINES", 300)
+    depois = proxima.copy()
+    depois[OPEN_TIME] += 400 * MINUTO
+    perdidas = cache.lacuna("BTCUSDT", "1m", depois)
+    assert [k[OPEN_TIME] for k in perdidas] == list(np.arange(2500, 2900) * MINUTO)
+    assert cliente.pedidos[-2:] == [2500 * MINUTO, 2799 * MINUTO + 1]
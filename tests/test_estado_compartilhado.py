@@ -0,0 +1,49 @@
+import threading
+from estado_compartilhado import PublicadorEstado, LeitorEstado
+
+
+def test_leitura_com_escrita_concorrente(tmp_path):
+    arquivo = str(tmp_path / "estado_bot.mmap")
+    publicador = PublicadorEstado(arquivo, capacidade=4096)
+    leitor = LeitorEstado(arquivo)
+    assert leitor.ler() is None
+    parar = threading.Event()
+
+    def escrever():
+        # Tamanhos variados, passando da capacidade inicial para forçar o remapeamento
+        i = 0
+        while not parar.is_set():
+            i += 1
+            publicador.publicar({"versao": i, "itens": [i] * (i % 700)})
+
+    escritor = threading.Thread(target=escrever)
+    escritor.start()
+    try:
+        ultima = 0
+        lidas = 0
+        while lidas < 2000:
+            estado = leitor.ler()
+            if estado is None:
+                continue
+            # Nunca um estado rasgado: os itens batem com a versão, que não volta
+            assert estado["itens"] == [estado["versao"]] * (estado["versao"] % 700)
+            assert estado["versao"] >= ultima
+            ultima = estado["versao"]
+            lidas += 1
+    finally:
+        parar.set()
+        escritor.join()
+    assert ultima > 0
+
+
+def test_mesma_versao_devolve_o_cache(tmp_path):
+    arquivo = str(tmp_path / "estado_bot.mmap")
+    publicador = PublicadorEstado(arquivo)
+    leitor = LeitorEstado(arquivo)
+    publicador.publicar({"saldo": {"USDT": 10.0}})
+    primeiro = leitor.ler()
+    assert leitor.ler() is primeiro
+    publicador.publicar({"saldo": {"USDT": 11.0}})
+    assert leitor.ler() == {"saldo": {"USDT": 11.0}}
+    # Um escritor que caiu com a versão ímpar não trava o próximo
+    assert PublicadorEstado(arquivo)._versao % 2 == 0
@@ -0,0 +1,60 @@
+import pytest
+from filtros_simbolos import RegistroFiltros
+from simulador import ClienteSimulado
+
+
+class ClienteContado(ClienteSimulado):
+    def __init__(self):
+        super().__init__({"BTCUSDT": []})
+        self.chamadas = 0
+        self.falhar = False
+
+    def get_exchange_info(self):
+        self.chamadas += 1
+        if self.falhar:
+            raise ConnectionError("sem rede")
+        return super().get_exchange_info()
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    agora = [1_000_000.0]
+    monkeypatch.setattr("filtros_simbolos.time.time", lambda: agora[0])
+    return agora
+
+
+def test_ttl_vencido_nao_consulta_no_dimensionamento(tmp_path, relogio):
+    cliente = ClienteContado()
+    registro = RegistroFiltros(cliente, str(tmp_path / "filtros.json"), ttl=100)
+    assert registro.lot_size("BTCUSDT") == (0.00001, 0.00001, 5.0)  # tabela vazia: carrega na hora
+    relogio[0] += 1000
+    registro.filtros("BTCUSDT")
+    assert cliente.chamadas == 1
+    assert registro.atualizar() and cliente.chamadas == 2
+    assert not registro.atualizar() and cliente.chamadas == 2
+
+
+def test_falha_usa_a_tabela_antiga_com_espera(tmp_path, relogio):
+    cliente = ClienteContado()
+    registro = RegistroFiltros(cliente, str(tmp_path / "filtros.json"), ttl=100, espera_erro=60)
+    registro.atualizar()
+    cliente.falhar = True
+    relogio[0] += 1000
+    assert not registro.atualizar()
+    assert registro.filtros("BTCUSDT")["step"] == 0.00001
+    relogio[0] += 30
+    assert not registro.atualizar() and cliente.chamadas == 2
+    cliente.falhar = False
+    relogio[0] += 30
+    assert registro.atualizar() and cliente.chamadas == 3
+    # A tabela salva em disco vale para um novo processo sem consultar a Binance
+    assert RegistroFiltros(None, registro.arquivo).filtros("BTCUSDT")["base"] == "BTC"
+
+
+def test_sem_tabela_e_sem_rede_espera_entre_tentativas(tmp_path, relogio):
+    cliente = ClienteContado()
+    cliente.falhar = True
+    registro = RegistroFiltros(cliente, str(tmp_path / "filtros.json"), espera_erro=60)
+    for _ in range(5):
+        assert registro.lot_size("BTCUSDT") == (0, 0, 0)
+    assert cliente.chamadas == 1
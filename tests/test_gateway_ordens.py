@@ -0,0 +1,124 @@
+import json
+import time
+import pytest
+import requests
+from binance.exceptions import BinanceAPIException
+import gateway_ordens
+from gateway_ordens import Balde, GatewayOrdens
+
+
+def erro_api(status, code, msg="erro"):
+    return BinanceAPIException(None, status, json.dumps({"code": code, "msg": msg}))
+
+
+class ClienteRoteirizado:
+    """Cliente falso: cada chamada consome a próxima resposta (ou exceção) do seu roteiro."""
+
+    def __init__(self, envios, consultas=()):
+        self.session = requests.Session()
+        self.envios = list(envios)
+        self.consultas = list(consultas)
+        self.chamadas = []
+
+    def _proxima(self, roteiro, nome, parametros):
+        self.chamadas.append((nome, time.monotonic(), parametros))
+        resposta = roteiro.pop(0)
+        if callable(resposta):
+            resposta = resposta()
+        if isinstance(resposta, Exception):
+            raise resposta
+        return resposta
+
+    def create_order(self, **parametros):
+        return self._proxima(self.envios, "create_order", parametros)
+
+    def get_order(self, **parametros):
+        return self._proxima(self.consultas, "get_order", parametros)
+
+    def nomes(self):
+        return [nome for nome, _, _ in self.chamadas]
+
+
+@pytest.fixture(autouse=True)
+def sem_espera(monkeypatch):
+    monkeypatch.setattr(gateway_ordens, "_espera", lambda tentativa: 0.0)
+
+
+def executar(cliente):
+    gateway = GatewayOrdens(cliente, trabalhadores=1, tentativas=3)
+    return gateway, gateway.executar(timeout=5, symbol="BTCUSDT", side="BUY", type="MARKET", quantity=1)
+
+
+def test_timeout_com_ordem_executada_nao_reenvia():
+    executada = {"symbol": "BTCUSDT", "status": "FILLED"}
+    cliente = ClienteRoteirizado([requests.Timeout()], [executada])
+    _, ordem = executar(cliente)
+    assert ordem == executada
+    assert cliente.nomes() == ["create_order", "get_order"]
+    # A consulta usa o mesmo id que foi enviado
+    assert cliente.chamadas[1][2]["origClientOrderId"] == cliente.chamadas[0][2]["newClientOrderId"]
+
+
+def test_consulta_incerta_repete_em_vez_de_reenviar():
+    # A ordem entrou, mas as primeiras consultas falham: reenviar compraria duas vezes
+    executada = {"symbol": "BTCUSDT", "status": "FILLED"}
+    cliente = ClienteRoteirizado([requests.ConnectionError()],
+                                 [requests.Timeout(), erro_api(503, -1007, "timeout"), executada])
+    _, ordem = executar(cliente)
+    assert ordem == executada
+    assert cliente.nomes().count("create_order") == 1
+
+
+def test_consulta_sem_resposta_desiste_sem_reenviar():
+    cliente = ClienteRoteirizado([requests.Timeout()], [requests.Timeout()] * 3)
+    with pytest.raises(requests.Timeout):
+        executar(cliente)
+    assert cliente.nomes() == ["create_order"] + ["get_order"] * 3
+
+
+def test_ordem_inexistente_e_reenviada():
+    executada = {"symbol": "BTCUSDT", "status": "FILLED"}
+    cliente = ClienteRoteirizado([requests.Timeout(), executada], [erro_api(400, -2013, "Order does not exist.")])
+    _, ordem = executar(cliente)
+    assert ordem == executada
+    assert cliente.nomes() == ["create_order", "get_order", "create_order"]
+
+
+def test_rejeicao_por_limite_nao_consulta():
+    executada = {"symbol": "BTCUSDT", "status": "FILLED"}
+    cliente = ClienteRoteirizado([erro_api(429, -1003, "Too many requests"), erro_api(418, -1003, "banned"),
+                                  executada])
+    _, ordem = executar(cliente)
+    assert ordem == executada
+    assert cliente.nomes() == ["create_order"] * 3
+
+
+def test_consulta_respeita_a_pausa():
+    gateway = None
+
+    def pausa_e_cai():
+        # O hook de resposta marcaria a pausa; aqui ela chega junto com a queda da conexão
+        gateway._pausa_ate = time.monotonic() + 0.3
+        return requests.ConnectionError()
+
+    executada = {"symbol": "BTCUSDT", "status": "FILLED"}
+    cliente = ClienteRoteirizado([pausa_e_cai], [executada])
+    gateway = GatewayOrdens(cliente, trabalhadores=1, tentativas=3)
+    assert gateway.executar(timeout=5, symbol="BTCUSDT", side="BUY", type="MARKET", quantity=1) == executada
+    (_, envio, _), (_, consulta, _) = cliente.chamadas
+    assert consulta - envio >= 0.29
+
+
+def test_erro_definitivo_sobe_sem_nova_tentativa():
+    cliente = ClienteRoteirizado([erro_api(400, -2010, "Account has insufficient balance")])
+    with pytest.raises(BinanceAPIException):
+        executar(cliente)
+    assert cliente.nomes() == ["create_order"]
+
+
+def test_balde_sincroniza_com_o_servidor():
+    balde = Balde(10, 10)
+    assert balde.espera() == 0
+    balde.sincronizar(10)
+    # Sem fichas: a próxima só depois de repor uma (taxa de 1 por segundo)
+    assert balde.espera() == pytest.approx(1.0, abs=0.01)
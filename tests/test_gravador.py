@@ -0,0 +1,86 @@
+import os
+import numpy as np
+from backtest import carregar_klines
+from gravador import GravadorColunas, compactar, ler_coluna, ler_tabela
+
+DIA = 1_586_908_800_000  # 2020-04-15 00:00 UTC, bem antes do limite de dias brutos
+
+
+def _gravar(pasta, inicio, n):
+    gravador = GravadorColunas(pasta)
+    for i in range(inicio, inicio + n):
+        gravador.adicionar("BTCUSDT", "aggtrades", DIA + i, (i, 100.0 + i, 0.5, DIA + i, i % 2))
+    gravador.descarregar()
+
+
+def _ids(pasta):
+    return ler_tabela("BTCUSDT", "aggtrades", ["2020-04-15"], pasta)["id"].tolist()
+
+
+def test_evento_atrasado_depois_da_compactacao(tmp_path):
+    pasta = str(tmp_path)
+    _gravar(pasta, 0, 100)
+    compactar(pasta)
+    _gravar(pasta, 100, 5)  # chegou depois que o dia foi compactado
+    assert _ids(pasta) == list(range(105))
+    compactar(pasta)
+    _gravar(pasta, 105, 3)
+    compactar(pasta)
+    assert _ids(pasta) == list(range(108))
+    nomes = sorted(os.listdir(os.path.join(pasta, "BTCUSDT", "2020-04-15", "aggtrades")))
+    assert [n for n in nomes if n.startswith("id.")] == ["id.bin.1.z", "id.bin.2.z", "id.bin.z"]
+
+
+def test_compactacao_interrompida_nao_perde_nem_duplica(tmp_path):
+    pasta = str(tmp_path)
+    _gravar(pasta, 0, 10)
+    compactar(pasta)
+    _gravar(pasta, 10, 10)
+    coluna = os.path.join(pasta, "BTCUSDT", "2020-04-15", "aggtrades", "preco.bin")
+    # Crash logo depois de renomear o .bin para o lote 1
+    os.replace(coluna, coluna + ".1.lote")
+    assert np.array_equal(ler_coluna("BTCUSDT", "2020-04-15", "aggtrades", "preco", pasta), 100.0 + np.arange(20))
+    # Crash depois de gravar o .z do lote, antes de apagar o .lote
+    with open(coluna + ".1.lote", "rb") as f:
+        bruto = f.read()
+    compactar(pasta)
+    with open(coluna + ".1.lote", "wb") as f:
+        f.write(bruto)
+    assert _ids(pasta) == list(range(20))
+    compactar(pasta)
+    assert not os.path.exists(coluna + ".1.lote")
+    assert _ids(pasta) == list(range(20))
+
+
+def test_crash_entre_colunas_nao_desalinha_as_linhas_seguintes(tmp_path):
+    pasta = str(tmp_path)
+    _gravar(pasta, 0, 10)
+    # Crash no meio do próximo anexo: só o id (e meia linha do preço) chegou ao disco
+    colunas = os.path.join(pasta, "BTCUSDT", "2020-04-15", "aggtrades")
+    with open(os.path.join(colunas, "id.bin"), "ab") as f:
+        f.write(np.arange(10, 15, dtype="<i8").tobytes())
+    with open(os.path.join(colunas, "preco.bin"), "ab") as f:
+        f.write(b"\0" * 4)
+    _gravar(pasta, 10, 5)
+    tabela = ler_tabela("BTCUSDT", "aggtrades", ["2020-04-15"], pasta)
+    assert tabela["id"].tolist() == list(range(15))
+    assert np.array_equal(tabela["preco"], 100.0 + np.arange(15))
+
+
+def test_backtest_le_as_klines_gravadas(tmp_path):
+    pasta = str(tmp_path)
+    gravador = GravadorColunas(pasta)
+    hora = 60 * 60 * 1000
+    # Dois dias de klines de 1h, o primeiro já compactado
+    for i in range(30):
+        t = DIA + i * hora
+        gravador.adicionar("BTCUSDT", "klines_1h", t, (t, 1.0 * i, i + 1.0, i - 1.0, i + 0.5, 2.0, t + hora - 1, 7, 1.0))
+    gravador.descarregar()
+    compactar(pasta)
+    gravador.adicionar("BTCUSDT", "klines_1h", DIA + 30 * hora, (DIA + 30 * hora, 30.0, 31.0, 29.0, 30.5, 2.0,
+                                                                 DIA + 31 * hora - 1, 7, 1.0))
+    gravador.descarregar()
+    klines = carregar_klines(os.path.join(pasta, "BTCUSDT", "*", "klines_1h"))
+    assert klines.shape == (31, 7)
+    assert np.array_equal(klines[:, 0], DIA + np.arange(31) * hora)
+    assert np.array_equal(klines[:, 4], np.arange(31) + 0.5)
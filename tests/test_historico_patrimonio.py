@@ -0,0 +1,43 @@
+from datetime import datetime
+import pytest
+from historico_patrimonio import ArmazemPatrimonio, HORA, REGISTRO
+
+
+@pytest.fixture
+def armazem(tmp_path):
+    return ArmazemPatrimonio(str(tmp_path / "patrimonio.bin"), str(tmp_path / "patrimonio_ativos.jsonl"))
+
+
+def test_variacoes(armazem):
+    agora = datetime(2025, 3, 10, 12).timestamp()
+    inicio_ano = datetime(2025, 1, 1).timestamp()
+    armazem.adicionar(800, inicio_ano - HORA)
+    armazem.adicionar(1000, agora - 48 * HORA)
+    armazem.adicionar(900, agora - 2 * HORA)
+    armazem.adicionar(990, agora)
+    variacoes = armazem.variacoes(agora=agora)
+    # Cada horizonte compara com o último ponto até o seu início
+    assert variacoes["1h"] == pytest.approx(10.0)  # 900 -> 990
+    assert variacoes["24h"] == pytest.approx(-1.0)  # 1000 -> 990
+    assert variacoes["7d"] == pytest.approx(23.75)  # 800 -> 990
+    assert variacoes["30d"] == pytest.approx(23.75)
+    assert variacoes["ytd"] == pytest.approx(23.75)
+
+
+def test_variacoes_sem_historico_suficiente(armazem):
+    agora = datetime(2025, 3, 10, 12).timestamp()
+    assert armazem.variacoes(agora=agora) == dict.fromkeys(("1h", "24h", "7d", "30d", "ytd"))
+    armazem.adicionar(1000, agora - HORA / 2)
+    variacoes = armazem.variacoes({"1h": HORA, "10min": 600}, agora=agora)
+    assert variacoes == {"1h": None, "10min": 0.0}
+
+
+def test_outro_processo_e_registro_cortado(armazem):
+    armazem.adicionar(1000, 100)
+    leitor = ArmazemPatrimonio(armazem.arquivo, armazem.arquivo_composicao)
+    armazem.adicionar(1100, 200)
+    with open(armazem.arquivo, "ab") as f:
+        f.write(REGISTRO.pack(300, 1200)[:5])  # gravação interrompida
+    assert len(leitor) == 2 and leitor.atual() == 1100
+    armazem.adicionar(1300, 400)
+    assert len(leitor) == 3 and leitor.valores.tolist() == [1000, 1100, 1300] and leitor.atual() == 1300
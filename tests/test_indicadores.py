@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+from indicadores import SMA, EMA, RSI, _IndicadorRecursivo, sma_vetorizada
+
+
+@pytest.fixture
+def closes():
+    return 100 + np.random.default_rng(7).normal(0, 1, 500).cumsum()
+
+
+def _rsi_pandas(closes, periodo):
+    variacoes = pd.Series(closes).diff().iloc[1:]
+    ganhos = variacoes.clip(lower=0).ewm(alpha=1 / periodo, adjust=False).mean()
+    perdas = (-variacoes).clip(lower=0).ewm(alpha=1 / periodo, adjust=False).mean()
+    return (100 - 100 / (1 + ganhos / perdas)).to_numpy()
+
+
+def _incremental(indicador, closes):
+    return np.array([np.nan if v is None else v for v in (indicador.atualizar(c) for c in closes)])
+
+
+def test_sma_igual_ao_rolling_do_pandas(closes):
+    esperado = pd.Series(closes).rolling(20).mean().to_numpy()
+    np.testing.assert_allclose(_incremental(SMA(20), closes), esperado, rtol=1e-10)
+    np.testing.assert_allclose(sma_vetorizada(closes, 20), esperado, rtol=1e-10)
+
+
+def test_ema_igual_ao_ewm_do_pandas(closes):
+    esperado = pd.Series(closes).ewm(span=20, adjust=False).mean().to_numpy(copy=True)
+    esperado[:19] = np.nan
+    np.testing.assert_allclose(_incremental(EMA(20), closes), esperado, rtol=1e-10)
+
+
+def test_rsi_igual_a_suavizacao_de_wilder(closes):
+    esperado = np.r_[np.nan, _rsi_pandas(closes, 14)]
+    esperado[:14] = np.nan
+    np.testing.assert_allclose(_incremental(RSI(14), closes), esperado, rtol=1e-9)
+
+
+@pytest.mark.parametrize("classe", [SMA, EMA, RSI])
+def test_inicializar_igual_ao_incremental(classe, closes):
+    incremental = classe(14)
+    for close in closes:
+        incremental.atualizar(close)
+    inicializado = classe(14)
+    inicializado.inicializar(closes)
+    assert inicializado.atual == pytest.approx(incremental.atual, rel=1e-9)
+    assert inicializado.anterior == pytest.approx(incremental.anterior, rel=1e-9)
+
+
+@pytest.mark.parametrize("classe", [SMA, EMA, RSI])
+def test_substituir_candle_em_aberto(classe, closes):
+    # Atualizar o último candle várias vezes dá o mesmo que só o valor final
+    indicador, referencia = classe(14), classe(14)
+    for close in closes[:-1]:
+        indicador.atualizar(close)
+        referencia.atualizar(close)
+    indicador.atualizar(closes[-1] + 5)
+    indicador.atualizar(closes[-1] - 3, novo=False)
+    indicador.atualizar(closes[-1], novo=False)
+    referencia.atualizar(closes[-1])
+    assert indicador.atual == pytest.approx(referencia.atual, rel=1e-12)
+    assert indicador.anterior == pytest.approx(referencia.anterior, rel=1e-12)
+
+
+def test_indicador_recursivo_exige_aplicar_e_valor():
+    class SoAplicar(_IndicadorRecursivo):
+        def _aplicar(self, estado, entrada):
+            return entrada
+
+    with pytest.raises(TypeError):
+        SoAplicar(14)
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from cache_candles import COLUNAS, OPEN_TIME, HIGH, LOW
+from janela_rolante import ExtremoRolante, JanelasRolantes
+
+MINUTO = 60_000
+
+
+def _candles(n, semente=0):
+    rng = np.random.default_rng(semente)
+    dados = np.zeros((n, len(COLUNAS)))
+    dados[:, OPEN_TIME] = np.arange(n) * MINUTO
+    meio = 100 + np.cumsum(rng.normal(0, 1, n))
+    dados[:, HIGH] = meio + rng.uniform(0, 1, n)
+    dados[:, LOW] = meio - rng.uniform(0, 1, n)
+    return dados
+
+
+@pytest.mark.parametrize("maximo", [True, False])
+def test_fila_monotonica_igual_ao_extremo_ingenuo(maximo):
+    rng = np.random.default_rng(1)
+    tempos = np.cumsum(rng.integers(1, 5, 2000))
+    valores = rng.integers(0, 50, 2000).astype(float)  # com repetições
+    extremo = ExtremoRolante(horizonte=60, maximo=maximo)
+    escolher = max if maximo else min
+    agora = 0
+    for i, (tempo, valor) in enumerate(zip(tempos, valores)):
+        extremo.adicionar(tempo, valor)
+        # As consultas andam com o relógio: nunca voltam no tempo
+        agora = max(agora, tempo + rng.integers(0, 10))
+        janela = [v for t, v in zip(tempos[:i + 1], valores[:i + 1]) if t >= agora - 60]
+        assert extremo.valor(agora) == (escolher(janela) if janela else None)
+
+
+def test_sincronizar_aos_pedacos_com_candle_em_aberto():
+    candles = _candles(3000)
+    janelas = JanelasRolantes({"1h": 60 * MINUTO, "1d": 24 * 60 * MINUTO})
+    fim = 0
+    rng = np.random.default_rng(2)
+    while fim < len(candles):
+        fim = min(len(candles), fim + int(rng.integers(1, 40)))
+        # O último candle chega primeiro em aberto (máxima menor, mínima maior) e depois fechado
+        parcial = candles[:fim].copy()
+        parcial[-1, HIGH] -= 0.5
+        parcial[-1, LOW] += 0.5
+        janelas.sincronizar("BTCUSDT", parcial)
+        janelas.sincronizar("BTCUSDT", candles[:fim])
+        agora = candles[fim - 1, OPEN_TIME]
+        for nome, horizonte in janelas.horizontes.items():
+            dentro = candles[:fim][candles[:fim, OPEN_TIME] >= agora - horizonte]
+            assert janelas.maximo("BTCUSDT", nome, agora) == dentro[:, HIGH].max()
+            assert janelas.minimo("BTCUSDT", nome, agora) == dentro[:, LOW].min()
@@ -0,0 +1,281 @@
+import json
+import threading
+import numpy as np
+import pytest
+from cache_candles import COLUNAS, OPEN_TIME, OPEN, HIGH, LOW, CLOSE, VOLUME, CLOSE_TIME
+from feed_mercado import FeedReplay
+from simulador import ClienteSimulado, Relogio
+import estrategias  # registra os plugins de estratégia
+from motor import Motor
+
+HORA = 60 * 60 * 1000
+MINUTO = 60 * 1000
+INICIO = 1_699_999_200_000  # alinhado na hora, como os candles da Binance
+AQUECIMENTO = 24  # horas de histórico antes do replay
+
+
+def _klines():
+    # Queda de 120 para 100 no aquecimento, alta até 108 (cruzamento para cima) e queda até 95 (stop)
+    horas = [0, AQUECIMENTO, AQUECIMENTO + 3, AQUECIMENTO + 6, AQUECIMENTO + 7, AQUECIMENTO + 10]
+    precos = [120, 100, 108, 108, 95, 95]
+    tempos = INICIO + np.arange((AQUECIMENTO + 10) * 60) * MINUTO
+    closes = np.interp(tempos, INICIO + np.array(horas) * HORA, precos)
+    dados = np.zeros((len(tempos), len(COLUNAS)))
+    dados[:, OPEN_TIME] = tempos
+    dados[:, OPEN] = np.r_[closes[0], closes[:-1]]
+    dados[:, CLOSE] = closes
+    dados[:, HIGH] = np.maximum(dados[:, OPEN], closes) + 0.05
+    dados[:, LOW] = np.minimum(dados[:, OPEN], closes) - 0.05
+    dados[:, VOLUME] = 1
+    dados[:, CLOSE_TIME] = tempos + MINUTO - 1
+    return dados
+
+
+def _eventos(klines, relogio):
+    # Gravação no formato do WebSocket; o relógio simulado anda junto com o stream
+    for k in klines:
+        relogio.agora = (k[CLOSE_TIME] + 1) / 1000
+        yield {"stream": "btcusdt@kline_1m", "data": {"e": "kline", "E": int(k[CLOSE_TIME]) + 1, "s": "BTCUSDT", "k": {
+            "t": int(k[OPEN_TIME]), "T": int(k[CLOSE_TIME]), "o": str(k[OPEN]), "h": str(k[HIGH]),
+            "l": str(k[LOW]), "c": str(k[CLOSE]), "v": str(k[VOLUME]), "x": True}}}
+        yield {"stream": "btcusdt@bookTicker", "data": {"s": "BTCUSDT", "b": str(k[LOW]), "a": str(k[LOW] + 0.01)}}
+
+
+def _negociar(motor, symbol, preco):
+    motor.monitor_protecao.ao_preco(symbol, preco)
+    # A saída roda numa thread própria; espera por ela para o teste ser determinístico
+    for thread in threading.enumerate():
+        if thread.name.startswith("protecao-"):
+            thread.join()
+
+
+def _motor(klines, relogio, ordens_oco=False):
+    cliente = ClienteSimulado({"BTCUSDT": klines}, relogio=relogio)
+    motor = Motor([("cruzamento", {"moedas": ["BTCUSDT"], "janela_curta": 2, "janela_longa": 5})],
+                  streaming=True, cliente=cliente, ativos=("USDT", "BTC"), dias_historico_base=1,
+                  pasta_graficos=None, ordens_oco=ordens_oco)
+    motor.pegar_dados("BTCUSDT")
+    return motor, cliente
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # o motor grava cache, estado e patrimônio no diretório atual
+    klines = _klines()
+    relogio = Relogio(klines[AQUECIMENTO * 60, OPEN_TIME] / 1000)
+    relogio.instalar()
+    try:
+        def executar(ordens_oco, horas=None, lacuna=()):
+            motor, cliente = _motor(klines, relogio, ordens_oco)
+            fim = None if horas is None else int((AQUECIMENTO + horas) * 60)
+            # lacuna: índices das klines que o WebSocket perde
+            stream = np.delete(np.arange(len(klines)), lacuna)[AQUECIMENTO * 60:fim]
+            FeedReplay(_eventos(klines[stream], relogio), motor.ao_candle, motor.ao_preco,
+                       ao_conta=motor.saldos.ao_evento, ao_negocio=lambda s, p: _negociar(motor, s, p)).executar()
+            return motor, cliente
+        yield executar
+    finally:
+        relogio.desinstalar()
+
+
+def _executadas(cliente):
+    return [ordem for ordem in cliente.ordens.values() if ordem["status"] == "FILLED"]
+
+
+def test_replay_compra_no_cruzamento_e_sai_no_stop(replay):
+    motor, cliente = replay(ordens_oco=False)
+    compra, venda = _executadas(cliente)
+    assert (compra["side"], venda["side"]) == ("BUY", "SELL")
+    preco_compra = motor.precos_compra["BTCUSDT"]
+    assert 100 < preco_compra < 108
+    assert motor.stop_losses["BTCUSDT"] == pytest.approx(preco_compra * 0.97)
+    # Vendido pelo monitor no primeiro bookTicker abaixo do stop, não no fechamento da hora
+    assert float(venda["fills"][0]["price"]) == pytest.approx(motor.stop_losses["BTCUSDT"], rel=0.002)
+    assert motor.posicoes["BTCUSDT"] is False
+    assert motor.monitor_protecao.niveis("BTCUSDT") is None
+    # Saldos locais (só deltas das ordens) batem com a corretora
+    assert motor.saldos["USDT"] == pytest.approx(cliente.saldos["USDT"])
+    assert motor.saldos["BTC"] == pytest.approx(cliente.saldos["BTC"], abs=1e-12)
+    assert 950 < cliente.saldos["USDT"] < 1000
+    assert motor.estado_persistente.recuperar()["posicoes"] == {"BTCUSDT": False}
+
+
+def test_replay_preenche_lacuna_do_websocket(replay, monkeypatch):
+    decisoes = []
+    decidir = Motor._decidir
+
+    def anotar(motor, symbol, candles, saldo_usdt):
+        decisoes.append(int(candles[-1, CLOSE_TIME]) + 1)
+        decidir(motor, symbol, candles, saldo_usdt)
+
+    monkeypatch.setattr(Motor, "_decidir", anotar)
+    # O WebSocket perde os minutos em volta do fechamento da hora do cruzamento
+    fechamento = (AQUECIMENTO + 2) * 60
+    motor, _ = replay(ordens_oco=False, horas=4, lacuna=np.arange(fechamento - 5, fechamento + 5))
+    # Cada hora fechada tem a sua decisão, inclusive a que fechou na lacuna, sobre a barra dessa hora
+    assert decisoes == [INICIO + h * HORA for h in range(AQUECIMENTO + 1, AQUECIMENTO + 5)]
+    # Os candles perdidos vieram da API REST: a série de 1m não tem buracos
+    open_times = motor.cache_candles.janela("BTCUSDT", "1m")[:, OPEN_TIME]
+    assert (np.diff(open_times) == MINUTO).all()
+
+
+def test_replay_com_oco_fecha_a_posicao_na_sincronizacao(replay):
+    # Para um minuto antes do fechamento da hora em que as médias cruzam para baixo
+    motor, cliente = replay(ordens_oco=True, horas=7 - 1 / 60)
+    assert cliente.get_open_orders() == []  # o simulador executa as pernas tocadas na consulta
+    assert [ordem["type"] for ordem in _executadas(cliente)] == ["MARKET", "STOP_LOSS_LIMIT"]
+    # A proteção executou na corretora; o motor só descobre na sincronização do ciclo
+    assert motor.posicoes["BTCUSDT"] is True
+    motor.ciclo()
+    assert motor.posicoes["BTCUSDT"] is False
+    assert not cliente.abertas and not cliente.travados["BTC"]
+    assert motor.saldos["USDT"] == pytest.approx(cliente.saldos["USDT"])
+    assert motor.patrimonio()[0] == pytest.approx(cliente.saldos["USDT"] + cliente.saldos["BTC"] * 95, rel=1e-4)
+
+
+def test_replay_com_oco_executada_antes_da_saida_da_estrategia(replay):
+    motor, cliente = replay(ordens_oco=True)
+    # O cruzamento para baixo encontra a proteção já executada: fecha sem tentar vender o resto
+    assert [ordem["type"] for ordem in _executadas(cliente)] == ["MARKET", "STOP_LOSS_LIMIT"]
+    assert motor.posicoes["BTCUSDT"] is False
+    assert motor.ordens_oco.colocadas == {}
+    motor.ciclo()
+    assert len(cliente.ordens) == 3  # compra e as duas pernas da OCO; nada recolocado
+
+
+class TimerAnotado:
+    """Substitui o threading.Timer: só anota a espera; o teste dispara quando quiser."""
+
+    criados = []
+
+    def __init__(self, espera, funcao, args=()):
+        self.espera, self.funcao, self.args = espera, funcao, args
+        self.daemon = False
+
+    def start(self):
+        TimerAnotado.criados.append(self)
+
+    def disparar(self):
+        self.funcao(*self.args)
+
+
+@pytest.fixture
+def motor_sem_venda(tmp_path, monkeypatch):
+    # Posição aberta cuja venda sempre falha
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("motor.threading.Timer", TimerAnotado)
+    TimerAnotado.criados = []
+    klines = _klines()
+    relogio = Relogio(klines[AQUECIMENTO * 60, OPEN_TIME] / 1000)
+    relogio.instalar()
+    try:
+        motor, cliente = _motor(klines, relogio)
+
+        def vender_tudo(symbol, preco):
+            raise ConnectionError("sem rede")
+        motor.vender_tudo = vender_tudo
+        motor.abrir_posicao("BTCUSDT", 100.0, 97.0, 110.0)
+        yield motor, cliente
+    finally:
+        relogio.desinstalar()
+
+
+def test_saida_de_protecao_com_espera_crescente_e_limitada(motor_sem_venda):
+    motor, cliente = motor_sem_venda
+    cliente.saldos["BTC"] = 1.0
+    for _ in range(4):
+        _negociar(motor, "BTCUSDT", 96.0)
+        assert motor.monitor_protecao.niveis("BTCUSDT") is None  # desarmado durante a espera
+        TimerAnotado.criados[-1].disparar()
+        assert motor.monitor_protecao.niveis("BTCUSDT") == ("BTCUSDT", 97.0, 110.0)
+    assert [timer.espera for timer in TimerAnotado.criados] == [5, 10, 20, 40]
+    assert all(timer.daemon for timer in TimerAnotado.criados)
+    # Na última falha não há novo timer; ainda há BTC, então a posição fica aberta para a estratégia
+    _negociar(motor, "BTCUSDT", 96.0)
+    assert len(TimerAnotado.criados) == 4
+    assert motor.posicoes["BTCUSDT"] is True
+    assert motor.monitor_protecao.niveis("BTCUSDT") is None
+
+
+def test_saida_de_protecao_esgotada_sem_saldo_fecha_a_posicao(motor_sem_venda):
+    motor, _ = motor_sem_venda
+    for _ in range(5):
+        motor._sair_por_protecao("BTCUSDT", "stop", 97.0, 96.0)
+    assert motor.posicoes["BTCUSDT"] is False
+    assert motor.falhas_protecao == {}
+
+
+def test_posicao_fechada_durante_a_espera_nao_rearma(motor_sem_venda):
+    motor, _ = motor_sem_venda
+    _negociar(motor, "BTCUSDT", 96.0)
+    motor.fechar_posicao("BTCUSDT")
+    TimerAnotado.criados[-1].disparar()
+    assert motor.monitor_protecao.niveis("BTCUSDT") is None
+    motor._sair_por_protecao("BTCUSDT", "stop", 97.0, 96.0)
+    assert len(TimerAnotado.criados) == 1
+
+
+def _reiniciar(estrategias, estado):
+    # Motor novo sobre um dados_bot.json de uma execução anterior, seguido de um ciclo por polling
+    with open("dados_bot.json", "w") as f:
+        json.dump({campo: {symbol: valores[i] for symbol, valores in estado.items()}
+                   for i, campo in enumerate(("posicoes", "precos_compra", "stop_losses", "take_profits"))}, f)
+    klines = _klines()
+    relogio = Relogio(klines[AQUECIMENTO * 60, OPEN_TIME] / 1000)
+    relogio.instalar()
+    try:
+        cliente = ClienteSimulado({"BTCUSDT": klines, "SOLUSDT": klines}, {"SOL": 1.0}, relogio=relogio)
+        motor = Motor(estrategias, streaming=False, cliente=cliente, ativos=("USDT", "BTC", "SOL"),
+                      dias_historico_base=1, pasta_graficos=None)
+        moedas = list(motor.moedas)
+        motor.ciclo()
+    finally:
+        relogio.desinstalar()
+    with open("dados_bot.json") as f:
+        return motor, moedas, json.load(f)
+
+
+def test_universo_acompanha_posicao_recuperada_do_scanner(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    motor, moedas, dados = _reiniciar([("universo", {"liquidez_minima": float("inf")})],
+                                      {"SOLUSDT": (True, 110, 50, 200)})
+    assert moedas == ["SOLUSDT"] and motor.moedas == ["SOLUSDT"]
+    assert motor.posicoes["SOLUSDT"] is True
+    assert dados["posicoes"] == {"SOLUSDT": True} and dados["stop_losses"] == {"SOLUSDT": 50}
+
+
+def test_snapshot_mantem_simbolos_sem_estrategia(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    motor, moedas, dados = _reiniciar([("cruzamento", {"moedas": ["BTCUSDT"]})],
+                                      {"ETHUSDT": (True, 3000, 2900, 3300)})
+    assert moedas == ["BTCUSDT"] and "ETHUSDT" not in motor.posicoes
+    assert dados["posicoes"] == {"ETHUSDT": True, "BTCUSDT": False}
+    assert dados["take_profits"] == {"ETHUSDT": 3300, "BTCUSDT": 0}
+
+
+def test_falha_nos_candles_nao_repete_a_decisao(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    klines = _klines()
+    relogio = Relogio(klines[(AQUECIMENTO + 2) * 60, OPEN_TIME] / 1000 + 1)  # logo depois do candle do cruzamento
+    relogio.instalar()
+    try:
+        cliente = ClienteSimulado({"BTCUSDT": klines}, relogio=relogio)
+        motor = Motor([("balanceada", {"moedas": ["BTCUSDT"], "janela_curta": 2, "janela_longa": 5, "saldo_minimo": 1})],
+                      streaming=False, cliente=cliente, ativos=("USDT", "BTC"), dias_historico_base=1,
+                      pasta_graficos=None)
+        motor.ciclo()
+        assert len(cliente.ordens) == 1  # comprou no cruzamento
+
+        def sem_klines(*args, **kwargs):
+            raise ConnectionError("sem rede")
+        monkeypatch.setattr(cliente, "get_klines", sem_klines)
+        for _ in range(3):
+            relogio.agora += 60 * 60
+            # Um depósito a cada hora: só as médias repetidas poderiam disparar outra compra
+            cliente.saldos["USDT"] += 1000
+            motor.saldos.carregar()
+            motor.ciclo()
+    finally:
+        relogio.desinstalar()
+    # Sem candles novos a moeda fica fora do ciclo; as médias antigas não geram outra compra
+    assert len(cliente.ordens) == 1
@@ -0,0 +1,43 @@
+import json
+from persistencia import EstadoPersistente
+
+
+def _estado(tmp_path, **config):
+    return EstadoPersistente(str(tmp_path / "dados_bot.json"), str(tmp_path / "dados_bot.diario"), **config)
+
+
+def test_recuperar_com_diario_cortado(tmp_path):
+    estado = _estado(tmp_path)
+    estado.recuperar()
+    estado.registrar("BTCUSDT", posicoes=True, precos_compra=95000, stop_losses=92150, take_profits=99000)
+    estado.snapshot()
+    estado.registrar("SOLUSDT", posicoes=True, precos_compra=150)
+    estado.registrar("BTCUSDT", posicoes=False)
+    with open(estado.diario, "a") as f:
+        f.write(json.dumps({"campo": "posicoes", "symbol": "SOLUSDT", "valor": False})[:20])  # crash no meio
+
+    dados = _estado(tmp_path).recuperar()
+    assert dados["posicoes"] == {"BTCUSDT": False, "SOLUSDT": True}
+    assert dados["precos_compra"] == {"BTCUSDT": 95000, "SOLUSDT": 150}
+    assert dados["stop_losses"] == {"BTCUSDT": 92150}
+
+
+def test_snapshot_ilegivel_recupera_pelo_diario(tmp_path):
+    estado = _estado(tmp_path)
+    estado.recuperar()
+    estado.registrar("BTCUSDT", posicoes=True, stop_losses=92150)
+    with open(estado.arquivo, "w") as f:
+        f.write('{"posicoes": {"BTC')
+    dados = _estado(tmp_path).recuperar()
+    assert dados["posicoes"] == {"BTCUSDT": True}
+    assert dados["take_profits"] == {}
+
+
+def test_compacta_o_diario(tmp_path):
+    estado = _estado(tmp_path, max_registros=4)
+    estado.recuperar()
+    for i in range(5):
+        estado.registrar("BTCUSDT", stop_losses=i, take_profits=10 * i)
+    with open(estado.arquivo) as f:
+        assert json.load(f)["stop_losses"] == {"BTCUSDT": 3}
+    assert _estado(tmp_path).recuperar()["take_profits"] == {"BTCUSDT": 40}
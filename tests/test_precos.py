@@ -0,0 +1,58 @@
+import json
+import numpy as np
+import pytest
+from cache_candles import COLUNAS, OPEN_TIME, CLOSE, CLOSE_TIME
+from precos import SnapshotPrecos
+from simulador import ClienteSimulado, Relogio
+
+
+def _klines(preco):
+    dados = np.zeros((10, len(COLUNAS)))
+    dados[:, OPEN_TIME] = np.arange(10) * 60_000
+    dados[:, CLOSE] = preco
+    dados[:, CLOSE_TIME] = dados[:, OPEN_TIME] + 59_999
+    return dados
+
+
+class ClienteContado(ClienteSimulado):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.consultas = []
+
+    def get_symbol_ticker(self, symbol=None, symbols=None):
+        self.consultas.append(sorted(json.loads(symbols)))
+        return super().get_symbol_ticker(symbol, symbols)
+
+
+@pytest.fixture
+def relogio():
+    relogio = Relogio(600)
+    relogio.instalar()
+    yield relogio
+    relogio.desinstalar()
+
+
+def test_simbolo_invalido_nao_derruba_o_snapshot(relogio):
+    cliente = ClienteContado({"BTCUSDT": _klines(95000), "SOLUSDT": _klines(150)}, relogio=relogio)
+    snapshot = SnapshotPrecos(cliente, ["BTCUSDT", "XYZUSDT"])
+    snapshot.acompanhar("SOLUSDT")
+    assert snapshot.atualizar()
+    assert snapshot["BTCUSDT"] == 95000 and snapshot["SOLUSDT"] == 150
+    assert snapshot.simbolos == ["BTCUSDT", "SOLUSDT"]
+    # O inválido não volta pela próxima acompanhar(), e a consulta em lote volta a funcionar
+    snapshot.acompanhar("XYZUSDT")
+    assert snapshot.atualizar()
+    assert cliente.consultas == [["BTCUSDT", "SOLUSDT", "XYZUSDT"], ["BTCUSDT", "SOLUSDT"]]
+
+
+def test_snapshot_vencido_nao_tem_preco(relogio):
+    cliente = ClienteSimulado({"BTCUSDT": _klines(95000)}, relogio=relogio)
+    snapshot = SnapshotPrecos(cliente, ["BTCUSDT"], validade=60)
+    assert snapshot["BTCUSDT"] == 0 and snapshot.vencido()
+    snapshot.atualizar()
+    relogio.agora += 30
+    assert snapshot["BTCUSDT"] == 95000
+    relogio.agora += 31
+    assert snapshot["BTCUSDT"] == 0
+    snapshot.atualizar_se_vencido()
+    assert snapshot["BTCUSDT"] == 95000
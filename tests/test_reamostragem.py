@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from cache_candles import COLUNAS, OPEN_TIME, OPEN, HIGH, LOW, CLOSE, VOLUME, CLOSE_TIME
+from reamostragem import Reamostrador
+
+MINUTO = 60_000
+
+
+class CacheFixo:
+    """Só a janela() do CacheCandles, sobre um array que o teste vai aumentando."""
+
+    def __init__(self, dados):
+        self.dados = dados
+
+    def janela(self, symbol, intervalo, n=None):
+        return self.dados if n is None else self.dados[-n:]
+
+
+def _klines(n, inicio=1_699_999_200_000):
+    rng = np.random.default_rng(3)
+    closes = 100 + rng.normal(0, 1, n).cumsum()
+    dados = np.zeros((n, len(COLUNAS)))
+    dados[:, OPEN_TIME] = inicio + np.arange(n) * MINUTO
+    dados[:, OPEN] = np.r_[closes[0], closes[:-1]]
+    dados[:, CLOSE] = closes
+    dados[:, HIGH] = np.maximum(dados[:, OPEN], closes) + rng.uniform(0, 1, n)
+    dados[:, LOW] = np.minimum(dados[:, OPEN], closes) - rng.uniform(0, 1, n)
+    dados[:, VOLUME] = rng.uniform(1, 10, n)
+    dados[:, CLOSE_TIME] = dados[:, OPEN_TIME] + MINUTO - 1
+    return dados
+
+
+def _pandas(dados, regra):
+    df = pd.DataFrame(dados[:, [OPEN, HIGH, LOW, CLOSE, VOLUME]], columns=["o", "h", "l", "c", "v"],
+                      index=pd.to_datetime(dados[:, OPEN_TIME].astype(np.int64), unit="ms"))
+    barras = df.resample(regra).agg({"o": "first", "h": "max", "l": "min", "c": "last", "v": "sum"}).dropna()
+    return barras.index.as_unit("ms").asi8, barras.to_numpy()
+
+
+@pytest.mark.parametrize("intervalo,regra", [("5m", "5min"), ("15m", "15min"), ("1h", "1h"), ("4h", "4h")])
+def test_igual_ao_resample_do_pandas(intervalo, regra):
+    dados = _klines(3000)
+    cache = CacheFixo(dados[:0])
+    reamostrador = Reamostrador(cache, capacidade=4)
+    # Chega aos pedaços, com o último candle do intervalo em aberto a cada passo
+    for fim in (1, 7, 61, 62, 500, 1234, 3000):
+        cache.dados = dados[:fim]
+        reamostrador.atualizar("BTCUSDT", intervalo)
+        tempos, barras = _pandas(dados[:fim], regra)
+        janela = reamostrador.janela("BTCUSDT", intervalo)
+        np.testing.assert_array_equal(janela[:, OPEN_TIME], tempos)
+        np.testing.assert_allclose(janela[:, [OPEN, HIGH, LOW, CLOSE, VOLUME]], barras, rtol=1e-12)
+
+
+def test_sem_mudanca_nao_reagrega():
+    dados = _klines(120)
+    reamostrador = Reamostrador(CacheFixo(dados))
+    assert reamostrador.atualizar("BTCUSDT", "1h") == 0
+    assert reamostrador.atualizar("BTCUSDT", "1h") is None
+    assert reamostrador.fechou("1h", dados[59])
+    assert not reamostrador.fechou("1h", dados[58])
@@ -0,0 +1,82 @@
+import pytest
+from saldos import Saldos
+
+
+class ClienteConta:
+    def __init__(self, saldos, momento=1000):
+        self.saldos = dict(saldos)
+        self.momento = momento
+        self.consultas = 0
+        self.falhar = False
+
+    def get_account(self):
+        self.consultas += 1
+        if self.falhar:
+            raise ConnectionError("sem rede")
+        return {"updateTime": self.momento,
+                "balances": [{"asset": a, "free": str(v), "locked": "0"} for a, v in self.saldos.items()]}
+
+
+class RegistroFixo:
+    def filtros(self, symbol):
+        return {"base": symbol[:-4], "quote": "USDT"} if symbol.endswith("USDT") else None
+
+
+def _compra(quantidade, custo, comissao, momento):
+    return {"symbol": "BTCUSDT", "side": "BUY", "executedQty": str(quantidade), "cummulativeQuoteQty": str(custo),
+            "transactTime": momento, "fills": [{"commission": str(comissao), "commissionAsset": "BNB"}]}
+
+
+@pytest.fixture
+def saldos():
+    saldos = Saldos(ClienteConta({"USDT": 1000.0, "BNB": 1.0}), RegistroFixo())
+    saldos.carregar()
+    return saldos
+
+
+def test_ordem_aplica_deltas_sem_consultar_a_conta(saldos):
+    saldos.aplicar_ordem(_compra(0.01, 500.0, 0.001, momento=2000))
+    assert saldos["USDT"] == pytest.approx(500.0)
+    assert saldos["BTC"] == pytest.approx(0.01)
+    assert saldos["BNB"] == pytest.approx(0.999)
+    assert saldos.cliente.consultas == 1
+
+
+def test_fill_anterior_ao_snapshot_ja_esta_contido(saldos):
+    # A resposta da ordem chegou depois do snapshot que já a inclui: não desconta de novo
+    saldos.aplicar_ordem(_compra(0.01, 500.0, 0.001, momento=900))
+    assert saldos["USDT"] == 1000.0 and saldos["BTC"] == pytest.approx(0.01)
+
+
+def test_eventos_do_stream_em_qualquer_ordem(saldos):
+    saldos.ao_evento({"e": "outboundAccountPosition", "u": 3000, "B": [{"a": "USDT", "f": "700", "l": "100"}]})
+    # balanceUpdate mais antigo que a posição absoluta: já contido nela
+    saldos.ao_evento({"e": "balanceUpdate", "a": "USDT", "d": "50", "T": 2500})
+    assert saldos["USDT"] == 700.0
+    saldos.ao_evento({"e": "balanceUpdate", "a": "USDT", "d": "50", "T": 3500})
+    assert saldos["USDT"] == 750.0
+    # Posição absoluta atrasada não desfaz a mais nova
+    saldos.ao_evento({"e": "outboundAccountPosition", "u": 2000, "B": [{"a": "USDT", "f": "1", "l": "0"}]})
+    assert saldos.resumo(["USDT"], incluir_travados=True)["USDT"] == 850.0
+
+
+def test_reserva_passa_do_livre_para_o_travado(saldos):
+    saldos.reservar("USDT", 300.0)
+    assert saldos["USDT"] == 700.0
+    assert saldos.resumo(["USDT", "BTC"], incluir_travados=True) == {"USDT": 1000.0, "BTC": 0.0, "BNB": 1.0}
+    saldos.reservar("USDT", -300.0)
+    assert saldos.resumo(["USDT"]) == {"USDT": 1000.0, "BNB": 1.0}
+
+
+def test_reconciliacao_so_no_prazo_e_corrige_divergencias(saldos, monkeypatch):
+    agora = [saldos.carregado_em]
+    monkeypatch.setattr("saldos.time.time", lambda: agora[0])
+    cliente = saldos.cliente
+    cliente.saldos["USDT"] = 1200.0  # depósito sem evento no stream
+    assert not saldos.atualizar() and saldos["USDT"] == 1000.0
+    agora[0] += saldos.reconciliar_a_cada
+    assert saldos.atualizar() and saldos["USDT"] == 1200.0
+    # Falha na consulta: mantém a visão local
+    cliente.falhar = True
+    assert not saldos.atualizar(forcar=True) and saldos["USDT"] == 1200.0
+    assert cliente.consultas == 3
@@ -0,0 +1,44 @@
+import numpy as np
+from cache_candles import COLUNAS, CLOSE, VOLUME
+from indicadores import sma_vetorizada
+from scanner import Scanner, cruzamentos
+
+
+def test_cruzamentos_iguais_as_medias_de_cada_serie():
+    rng = np.random.default_rng(0)
+    closes = 100 + np.cumsum(rng.normal(0, 1, (2000, 60)), axis=1)
+    curta, longa, cima, baixo = cruzamentos(closes, 7, 40)
+    for i, serie in enumerate(closes):
+        media_curta, media_longa = sma_vetorizada(serie, 7), sma_vetorizada(serie, 40)
+        assert np.isclose(curta[i], media_curta[-1]) and np.isclose(longa[i], media_longa[-1])
+        assert cima[i] == (media_curta[-2] <= media_longa[-2] and media_curta[-1] > media_longa[-1])
+        assert baixo[i] == (media_curta[-2] >= media_longa[-2] and media_curta[-1] < media_longa[-1])
+    # Com séries aleatórias, os dois sentidos aparecem
+    assert cima.any() and baixo.any()
+
+
+class CacheFixo:
+    def __init__(self, series):
+        self.series = series
+
+    def janela(self, symbol, intervalo, n=None):
+        return self.series[symbol][-n:]
+
+
+def _serie(closes, volume=1.0):
+    dados = np.zeros((len(closes), len(COLUNAS)))
+    dados[:, CLOSE] = closes
+    dados[:, VOLUME] = volume
+    return dados
+
+
+def test_ranking_poe_cruzamentos_primeiro_e_ordena_pela_liquidez():
+    subida = np.r_[np.full(40, 100.0), 110.0]  # a curta passa a longa no último candle
+    parado = np.full(41, 100.0)
+    scanner = Scanner(CacheFixo({"AAAUSDT": _serie(subida), "BBBUSDT": _serie(subida, volume=10.0),
+                                 "CCCUSDT": _serie(parado, volume=100.0), "DDDUSDT": _serie(parado[:30])}),
+                      registro_filtros=None)
+    tabela = scanner.avaliar(["AAAUSDT", "BBBUSDT", "CCCUSDT", "DDDUSDT"])
+    # DDDUSDT não tem candles suficientes e fica de fora
+    assert tabela["symbol"].tolist() == ["BBBUSDT", "AAAUSDT", "CCCUSDT"]
+    assert tabela["cruzou_para_cima"].tolist() == [True, True, False]